@@ -1,17 +1,23 @@
+from .startup import startup_report
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_cors import CORS
+from sqlalchemy import text
 import os
 
 # Initialize SQLAlchemy
 db = SQLAlchemy()
 
+def _running_cli_command():
+    """Whether the app is being loaded for a `flask` command other than `flask run`."""
+    import click
+    ctx = click.get_current_context(silent=True)
+    return ctx is not None and ctx.info_name != 'run'
+
 def create_app():
+    startup_report.begin()
     app = Flask(__name__)
     
-    # Configuration
-    basedir = os.path.abspath(os.path.dirname(__file__))
-    
     # Database configuration
     db_user = os.environ.get('DB_USER', 'postgres')
     db_password = os.environ.get('DB_PASSWORD', 'root')
@@ -19,41 +25,214 @@ def create_app():
     db_port = os.environ.get('DB_PORT', '5432')
     db_name = os.environ.get('DB_NAME', 'resume_shortlister')
     
-    # Construct PostgreSQL URL - always use PostgreSQL for both local and production
-    postgres_url = f"postgresql://{db_user}:{db_password}@{db_host}:{db_port}/{db_name}"
-    app.config['SQLALCHEMY_DATABASE_URI'] = postgres_url
-    print(f"Using PostgreSQL database: {postgres_url}")
+    database_url = os.environ.get('DATABASE_URL')
+    if database_url:
+        # Render and Heroku still hand out postgres:// URLs, which SQLAlchemy 2 rejects
+        if database_url.startswith('postgres://'):
+            database_url = 'postgresql://' + database_url[len('postgres://'):]
+        app.config['SQLALCHEMY_DATABASE_URI'] = database_url
+        print(f"Using database from DATABASE_URL ({database_url.split(':', 1)[0]})")
+    else:
+        # Construct PostgreSQL URL from the DB_* settings
+        postgres_url = f"postgresql://{db_user}:{db_password}@{db_host}:{db_port}/{db_name}"
+        app.config['SQLALCHEMY_DATABASE_URI'] = postgres_url
+        print(f"Using PostgreSQL database: {postgres_url}")
+    
+    # Connection pool sizing, pre-ping and recycling (DB_POOL_* variables)
+    from .pool import engine_options
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config['SQLALCHEMY_DATABASE_URI'])
+    
+    # Apply pending schema migrations on startup (0 = run migrate.py instead)
+    app.config['AUTO_MIGRATE'] = os.environ.get('AUTO_MIGRATE', '1') == '1'
+    
+    # Extraction processes re-import the main module of the process that
+    # started them; an app created there must not migrate the schema (or, see
+    # TaskQueue and UploadReaper, start background threads)
+    from .sandbox import in_extraction_process
+    if in_extraction_process():
+        app.config['AUTO_MIGRATE'] = False
+    
+    # Task worker threads and the upload reaper belong to serving processes
+    # (web server, worker.py); tools and tests set BACKGROUND_THREADS=0, and
+    # `flask` commands other than `flask run` never start them
+    app.config['BACKGROUND_THREADS'] = (
+        os.environ.get('BACKGROUND_THREADS', '1') == '1' and not _running_cli_command()
+    )
     
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
     app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev')
     app.config['UPLOAD_FOLDER'] = os.path.join(app.root_path, 'static', 'uploads')
     
+    # Upload limits: whole request, and each file within it
+    app.config['MAX_CONTENT_LENGTH'] = int(os.environ.get('MAX_CONTENT_LENGTH', str(16 * 1024 * 1024)))
+    app.config['MAX_FILE_SIZE'] = int(os.environ.get('MAX_FILE_SIZE', str(16 * 1024 * 1024)))
+    
+    # Stream uploaded files straight into the upload folder
+    from .uploads import UploadRequest
+    app.request_class = UploadRequest
+    
+    # Background resume processing (0 workers = rely on worker.py processes)
+    app.config['TASK_WORKERS'] = int(os.environ.get('TASK_WORKERS', '2'))
+    app.config['TASK_POLL_INTERVAL'] = float(os.environ.get('TASK_POLL_INTERVAL', '5'))
+    
+    # Seconds after which a running task is presumed lost with its worker and
+    # queued again, and how many times a task is tried before it fails
+    app.config['TASK_TIMEOUT'] = float(os.environ.get('TASK_TIMEOUT', '900'))
+    app.config['TASK_MAX_ATTEMPTS'] = int(os.environ.get('TASK_MAX_ATTEMPTS', '3'))
+    
+    # Bulk uploads (0 extraction processes = one per CPU)
+    app.config['EXTRACTION_PROCESSES'] = int(os.environ.get('EXTRACTION_PROCESSES', '0'))
+    app.config['BULK_COMMIT_SIZE'] = int(os.environ.get('BULK_COMMIT_SIZE', '200'))
+    app.config['BULK_MAX_FILES'] = int(os.environ.get('BULK_MAX_FILES', '5000'))
+    app.config['BULK_MAX_CONTENT_LENGTH'] = int(os.environ.get('BULK_MAX_CONTENT_LENGTH', str(512 * 1024 * 1024)))
+    # Bytes the ZIP files of one bulk upload may unpack to in total
+    app.config['BULK_MAX_EXTRACTED_SIZE'] = int(os.environ.get('BULK_MAX_EXTRACTED_SIZE', str(1024 * 1024 * 1024)))
+    
+    # Parse single resumes on the extraction pool too, keeping CPU-bound work
+    # off threads that serve requests (gunicorn.conf.py turns this on)
+    app.config['EXTRACTION_OFFLOAD'] = os.environ.get('EXTRACTION_OFFLOAD', '0') == '1'
+    
+    # Limits of each extraction process: address space (MB), CPU seconds per
+    # resume and resumes handled before it is replaced (0 = no limit)
+    app.config['EXTRACTION_MEMORY_LIMIT'] = int(os.environ.get('EXTRACTION_MEMORY_LIMIT', '1024'))
+    app.config['EXTRACTION_CPU_LIMIT'] = int(os.environ.get('EXTRACTION_CPU_LIMIT', '30'))
+    app.config['EXTRACTION_MAX_TASKS_PER_CHILD'] = int(os.environ.get('EXTRACTION_MAX_TASKS_PER_CHILD', '200'))
+    
+    # Per-job scoring models
+    app.config['SCORING_MODEL_DIR'] = os.environ.get(
+        'SCORING_MODEL_DIR', os.path.join(app.instance_path, 'scoring_models'))
+    app.config['SCORING_MODEL_CACHE_SIZE'] = int(os.environ.get('SCORING_MODEL_CACHE_SIZE', '128'))
+    app.config['SCORING_MODEL_PERSIST_EVERY'] = int(os.environ.get('SCORING_MODEL_PERSIST_EVERY', '20'))
+    app.config['SCORING_MODEL_COMPACT_EVERY'] = int(os.environ.get('SCORING_MODEL_COMPACT_EVERY', '1000'))
+    app.config['FEATURE_STORE_PATH'] = os.environ.get(
+        'FEATURE_STORE_PATH', os.path.join(app.instance_path, 'features.sqlite3'))
+    
+    # Estimated text similarity from which two resumes count as near-duplicates
+    app.config['DUPLICATE_THRESHOLD'] = float(os.environ.get('DUPLICATE_THRESHOLD', '0.8'))
+    
+    # Listing endpoints are paginated; exports stream in batches
+    app.config['PAGE_SIZE'] = int(os.environ.get('PAGE_SIZE', '100'))
+    app.config['MAX_PAGE_SIZE'] = int(os.environ.get('MAX_PAGE_SIZE', '1000'))
+    app.config['EXPORT_BATCH_SIZE'] = int(os.environ.get('EXPORT_BATCH_SIZE', '1000'))
+    
+    # Top candidates kept in memory per job and overall (0 = always query the database)
+    app.config['LEADERBOARD_SIZE'] = int(os.environ.get('LEADERBOARD_SIZE', '200'))
+    app.config['LEADERBOARD_TTL'] = float(os.environ.get('LEADERBOARD_TTL', '30'))
+    
+    # Full-text search indexes kept in memory, and how long before one is rebuilt
+    app.config['SEARCH_INDEX_CACHE_SIZE'] = int(os.environ.get('SEARCH_INDEX_CACHE_SIZE', '8'))
+    app.config['SEARCH_INDEX_TTL'] = float(os.environ.get('SEARCH_INDEX_TTL', '300'))
+    
+    # Seconds before the in-memory job vectors used for matching are rebuilt
+    app.config['JOB_MATCH_TTL'] = float(os.environ.get('JOB_MATCH_TTL', '60'))
+    
+    # Browser caching of resumes and previews (seconds); FILE_OFFLOAD hands
+    # resume bodies to a fronting proxy: x-sendfile or x-accel-redirect (nginx,
+    # with an internal location at ACCEL_REDIRECT_PREFIX serving UPLOAD_FOLDER)
+    app.config['RESUME_CACHE_MAX_AGE'] = int(os.environ.get('RESUME_CACHE_MAX_AGE', '3600'))
+    app.config['FILE_OFFLOAD'] = os.environ.get('FILE_OFFLOAD', '').lower()
+    if app.config['FILE_OFFLOAD'] not in ('', 'x-sendfile', 'x-accel-redirect'):
+        raise ValueError(f"FILE_OFFLOAD must be x-sendfile or x-accel-redirect, not {app.config['FILE_OFFLOAD']!r}")
+    app.config['ACCEL_REDIRECT_PREFIX'] = os.environ.get('ACCEL_REDIRECT_PREFIX', '/protected-uploads/')
+    
+    # Resume previews: characters of text shown, and first page images
+    # (width in pixels) cached in PREVIEW_DIR
+    app.config['PREVIEW_CHARS'] = int(os.environ.get('PREVIEW_CHARS', '2000'))
+    app.config['PREVIEW_WIDTH'] = int(os.environ.get('PREVIEW_WIDTH', '600'))
+    app.config['PREVIEW_DIR'] = os.environ.get('PREVIEW_DIR', os.path.join(app.instance_path, 'previews'))
+    
+    # Rows deleted per transaction when a job is deleted
+    app.config['DELETE_CHUNK_SIZE'] = int(os.environ.get('DELETE_CHUNK_SIZE', '1000'))
+    
+    # Seconds between sweeps for orphaned uploads (0 = never), and how old an
+    # unreferenced file must be before a sweep removes it
+    app.config['UPLOAD_REAP_INTERVAL'] = float(os.environ.get('UPLOAD_REAP_INTERVAL', '3600'))
+    app.config['UPLOAD_ORPHAN_AGE'] = float(os.environ.get('UPLOAD_ORPHAN_AGE', '3600'))
+    
+    # cProfile requests sending "X-Profile: <PROFILE_TOKEN>" (unset = disabled),
+    # and a sampled share of all requests and tasks; profiles go to PROFILE_DIR
+    app.config['PROFILE_TOKEN'] = os.environ.get('PROFILE_TOKEN') or None
+    app.config['PROFILE_SAMPLE_RATE'] = float(os.environ.get('PROFILE_SAMPLE_RATE', '0'))
+    app.config['PROFILE_DIR'] = os.environ.get('PROFILE_DIR', os.path.join(app.instance_path, 'profiles'))
+    app.config['PROFILE_MAX_FILES'] = int(os.environ.get('PROFILE_MAX_FILES', '200'))
+    
     # Ensure upload directory exists
     os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
     
+    startup_report.mark('config')
+    
     # Initialize extensions
     CORS(app)
     db.init_app(app)  # Initialize db with app
     
-    # Import models here to avoid circular imports
-    from .models import Job, Candidate
+    # Request and processing stage latencies, served by GET /metrics
+    from .metrics import metrics
+    metrics.init_app(app)
     
-    # Create database tables if they don't exist
+    # Bring the schema up to date (never drops existing tables)
     with app.app_context():
         try:
-            # Only create tables that don't exist yet (don't drop existing tables)
-            db.create_all()
-            print("Database tables created successfully")
+            if app.config['AUTO_MIGRATE']:
+                from .migrations import upgrade
+                applied = upgrade(db.engine)
+                print(f"Applied database migrations: {applied}" if applied else "Database schema is up to date")
+            else:
+                # Test database connection (the migrations above already did)
+                with db.engine.connect() as conn:
+                    conn.execute(text('SELECT 1'))
+                print("Database connection test successful")
             
-            # Test database connection
-            db.session.execute('SELECT 1')
-            print("Database connection test successful")
+            from .pool import pool_metrics
+            pool_metrics.watch(db.engine)
+            if pool_metrics.exposition not in metrics.collectors:
+                metrics.collectors.append(pool_metrics.exposition)
         except Exception as e:
             print(f"Error initializing database: {str(e)}")
             raise e
+    startup_report.mark('database')
     
     # Register blueprints
     from .routes import main
     app.register_blueprint(main)
+    startup_report.mark('routes')
+    
+    # Extraction results shared by every job, keyed by file content hash
+    from .feature_store import feature_store
+    feature_store.init_app(app)
+    startup_report.mark('feature_store')
+    
+    # Scoring models are fitted over the job's existing resumes on first use
+    from .scoring import model_cache
+    from .pipeline import resume_corpus
+    model_cache.init_app(app, corpus_loader=resume_corpus)
+    startup_report.mark('scoring_models')
+    
+    # Top resumes are served from memory, loaded from the database on first read
+    from .leaderboard import leaderboard
+    leaderboard.init_app(app)
+    
+    # Per-job full-text search indexes, built on a job's first search
+    from .search import search_indexes
+    search_indexes.init_app(app)
+    
+    # Job description vectors for scoring one resume against every job
+    from .matching import job_matcher
+    job_matcher.init_app(app)
+    
+    # First page images of resumes, rendered on first view
+    from .previews import resume_previews
+    resume_previews.init_app(app)
+    
+    # Removes the files of deleted jobs and other orphaned uploads
+    from .cleanup import upload_reaper
+    upload_reaper.init_app(app)
+    if upload_reaper.exposition not in metrics.collectors:
+        metrics.collectors.append(upload_reaper.exposition)
+    
+    # Start the resume processing workers
+    from .tasks import task_queue
+    task_queue.init_app(app)
+    startup_report.mark('task_workers')
+    startup_report.ready()
     
     return app 
\ No newline at end of file
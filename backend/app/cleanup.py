@@ -0,0 +1,230 @@
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from .models import db, Candidate, Job, Task
+from .sandbox import in_extraction_process
+from .tasks import QUEUED, RUNNING
+from .uploads import SHARD_CHARS
+
+logger = logging.getLogger(__name__)
+
+# File names checked against the database per query
+REFERENCE_BATCH_SIZE = 500
+
+
+def delete_job_rows(job, chunk_size=1000):
+    """
+    Deletes a job with its tasks and candidates, committing every chunk_size
+    rows so deleting a job with 100k candidates never holds locks for long
+    or builds one huge transaction.
+
+    The job is flagged as deleting first: uploads check the flag in the
+    transaction that adds their candidate (pipeline.lock_job), so none can
+    be added between the chunks and block the final delete of the job row.
+
+    Returns (number of candidates deleted, names of the uploaded files the
+    deleted rows referred to).
+    """
+    db.session.query(Job).filter(Job.id == job.id).update({'deleting': True}, synchronize_session=False)
+    db.session.commit()
+    deleted = 0
+    filenames = []
+    for model, column in ((Task, Task.filename), (Candidate, Candidate.resume_path)):
+        while True:
+            rows = db.session.query(model.id, column).filter(model.job_id == job.id).limit(chunk_size).all()
+            if not rows:
+                break
+            db.session.query(model).filter(model.id.in_([row[0] for row in rows])).delete(synchronize_session=False)
+            db.session.commit()
+            filenames.extend(row[1] for row in rows if row[1])
+            if model is Candidate:
+                deleted += len(rows)
+    db.session.delete(job)
+    db.session.commit()
+    return deleted, filenames
+
+
+class UploadReaper:
+    """
+    Removes uploaded files that no candidate or task refers to any more: the
+    resumes of deleted jobs, resumes replaced by a re-upload, and temporary
+    files (.part uploads, job matching uploads) left behind by a crash.
+
+    Files of deleted jobs are handed over with discard() and removed by a
+    background thread, which also sweeps the whole upload folder every
+    UPLOAD_REAP_INTERVAL seconds. Swept files must be older than
+    UPLOAD_ORPHAN_AGE so uploads whose candidate is not committed yet are
+    left alone.
+
+    Like the task workers, the thread starts once per process and only where
+    BACKGROUND_THREADS is set; elsewhere discard() removes files right away
+    and sweeps run from reap_uploads.py.
+    """
+
+    def __init__(self):
+        self.app = None
+        self._pending = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.sweeps = 0
+            self.files_removed = 0
+            self.bytes_reclaimed = 0
+            self.last_sweep = None
+
+    def init_app(self, app):
+        self.app = app
+        if self._thread is not None or in_extraction_process() or not app.config['BACKGROUND_THREADS']:
+            return
+        self._thread = threading.Thread(target=self._run, name='upload-reaper', daemon=True)
+        self._thread.start()
+
+    def discard(self, filenames):
+        """
+        Queues uploaded files (names relative to the upload folder) for
+        removal; removes them at once when no reaper thread runs.
+        """
+        filenames = list(filenames)
+        if not filenames:
+            return
+        if self._thread is None:
+            self.remove(filenames)
+        else:
+            self._pending.put(filenames)
+
+    def _run(self):
+        interval = self.app.config['UPLOAD_REAP_INTERVAL']
+        next_sweep = time.monotonic() + interval if interval > 0 else None
+        while True:
+            try:
+                timeout = max(next_sweep - time.monotonic(), 0) if next_sweep is not None else None
+                filenames = self._pending.get(timeout=timeout)
+            except queue.Empty:
+                filenames = None
+
+            with self.app.app_context():
+                try:
+                    if filenames:
+                        self.remove(filenames)
+                    if next_sweep is not None and time.monotonic() >= next_sweep:
+                        next_sweep = time.monotonic() + interval
+                        self.sweep()
+                except Exception as e:
+                    logger.error(f"Upload reaper error: {str(e)}")
+                    db.session.rollback()
+
+    def unreferenced(self, filenames):
+        """
+        The given upload names no candidate and no queued or running task
+        refers to. The uploads of failed tasks count as unreferenced, e.g.
+        those of tasks abandoned by tasks.requeue_stale_tasks.
+        """
+        unreferenced = set(filenames)
+        names = list(unreferenced)
+        for start in range(0, len(names), REFERENCE_BATCH_SIZE):
+            chunk = names[start:start + REFERENCE_BATCH_SIZE]
+            references = (
+                db.session.query(Candidate.resume_path).filter(Candidate.resume_path.in_(chunk)),
+                db.session.query(Task.filename).filter(Task.filename.in_(chunk), Task.status.in_((QUEUED, RUNNING)))
+            )
+            for query in references:
+                unreferenced.difference_update(name for name, in query)
+        return unreferenced
+
+    def _path(self, filename):
+        return os.path.join(self.app.config['UPLOAD_FOLDER'], *filename.split('/'))
+
+    def remove(self, filenames, dry_run=False):
+        """
+        Removes the given uploads unless something refers to them. Returns
+        (files removed, bytes reclaimed).
+        """
+        removed = reclaimed = 0
+        for filename in self.unreferenced(filenames):
+            file_path = self._path(filename)
+            try:
+                size = os.path.getsize(file_path)
+                if not dry_run:
+                    os.remove(file_path)
+            except FileNotFoundError:
+                continue
+            except OSError as e:
+                logger.error(f"Could not remove upload {filename}: {str(e)}")
+                continue
+            removed += 1
+            reclaimed += size
+        if not dry_run:
+            with self._lock:
+                self.files_removed += removed
+                self.bytes_reclaimed += reclaimed
+        return removed, reclaimed
+
+    def _directories(self):
+        # The upload folder itself (files saved before uploads were sharded,
+        # temporary files) and its shard directories
+        upload_folder = self.app.config['UPLOAD_FOLDER']
+        yield upload_folder, ''
+        with os.scandir(upload_folder) as entries:
+            shards = sorted(entry.name for entry in entries if entry.is_dir(follow_symlinks=False)
+                            and len(entry.name) == SHARD_CHARS)
+        for shard in shards:
+            yield os.path.join(upload_folder, shard), shard + '/'
+
+    def sweep(self, min_age=None, dry_run=False):
+        """
+        Removes every file in the upload folder older than min_age seconds
+        (UPLOAD_ORPHAN_AGE by default) that nothing refers to, one directory
+        at a time. Returns {'files', 'bytes', 'seconds'} of the sweep.
+        """
+        started = time.perf_counter()
+        min_age = self.app.config['UPLOAD_ORPHAN_AGE'] if min_age is None else min_age
+        cutoff = time.time() - min_age
+        removed = reclaimed = 0
+        for directory, prefix in self._directories():
+            old = []
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.name.startswith('.') and not entry.name.endswith('.part'):
+                        continue
+                    if entry.is_file(follow_symlinks=False) and entry.stat(follow_symlinks=False).st_mtime < cutoff:
+                        old.append(prefix + entry.name)
+            files, size = self.remove(old, dry_run)
+            removed += files
+            reclaimed += size
+
+        result = {'files': removed, 'bytes': reclaimed, 'seconds': round(time.perf_counter() - started, 3)}
+        if not dry_run:
+            with self._lock:
+                self.sweeps += 1
+                self.last_sweep = dict(result, finished_at=datetime.utcnow().isoformat())
+            logger.info(f"Upload sweep removed {removed} orphaned files ({reclaimed} bytes)")
+        return result
+
+    def stats(self):
+        with self._lock:
+            return {
+                'sweeps': self.sweeps,
+                'files_removed': self.files_removed,
+                'bytes_reclaimed': self.bytes_reclaimed,
+                'last_sweep': self.last_sweep,
+                'pending_batches': self._pending.qsize()
+            }
+
+    def exposition(self):
+        """The reaper statistics as Prometheus text exposition lines, for GET /metrics."""
+        stats = self.stats()
+        return [
+            '# TYPE upload_reaper_files_removed_total counter',
+            f"upload_reaper_files_removed_total {stats['files_removed']}",
+            '# TYPE upload_reaper_bytes_reclaimed_total counter',
+            f"upload_reaper_bytes_reclaimed_total {stats['bytes_reclaimed']}",
+        ]
+
+
+upload_reaper = UploadReaper()
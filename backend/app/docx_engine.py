@@ -0,0 +1,132 @@
+import logging
+import os
+import posixpath
+import threading
+import zipfile
+
+logger = logging.getLogger(__name__)
+
+W_NAMESPACE = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+RELATIONSHIPS_NAMESPACE = 'http://schemas.openxmlformats.org/package/2006/relationships'
+OFFICE_DOCUMENT = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument'
+
+_BODY = f'{{{W_NAMESPACE}}}body'
+_PARAGRAPH = f'{{{W_NAMESPACE}}}p'
+_RUN = f'{{{W_NAMESPACE}}}r'
+_TEXT = f'{{{W_NAMESPACE}}}t'
+_TAB = f'{{{W_NAMESPACE}}}tab'
+_BREAKS = (f'{{{W_NAMESPACE}}}br', f'{{{W_NAMESPACE}}}cr')
+
+
+class DocxTooLarge(Exception):
+    pass
+
+
+def _paragraph_text(paragraph):
+    # What python-docx's Paragraph.text returns: the runs directly inside the
+    # paragraph, with tabs and breaks as characters
+    parts = []
+    for run in paragraph.iterchildren(_RUN):
+        for child in run:
+            if child.tag == _TEXT:
+                parts.append(child.text or '')
+            elif child.tag == _TAB:
+                parts.append('\t')
+            elif child.tag in _BREAKS:
+                parts.append('\n')
+    return ''.join(parts)
+
+
+class DocxExtractionEngine:
+    """
+    Extracts the paragraphs of a DOCX resume without building the whole
+    document in memory: the main document part is parsed as a stream, each
+    paragraph is dropped once its text is taken, and parsing stops after
+    max_chars characters. Archives that would decompress to more than
+    max_uncompressed bytes (zip bombs) are refused before anything is
+    inflated.
+
+    Settings come from the environment (DOCX_MAX_UNCOMPRESSED,
+    DOCX_MAX_CHARS) because extraction also runs in pool processes without
+    an application context.
+    """
+
+    def __init__(self, max_uncompressed=64 * 1024 * 1024, max_chars=50000):
+        self.max_uncompressed = max_uncompressed
+        self.max_chars = max_chars
+        self._lock = threading.Lock()
+        self.refused = 0
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            max_uncompressed=int(os.environ.get('DOCX_MAX_UNCOMPRESSED', str(64 * 1024 * 1024))),
+            max_chars=int(os.environ.get('DOCX_MAX_CHARS', '50000'))
+        )
+
+    def _check_size(self, archive):
+        # zipfile never inflates a member past its declared size, so the
+        # declared sizes bound what parsing can decompress
+        total = sum(member.file_size for member in archive.infolist())
+        if self.max_uncompressed and total > self.max_uncompressed:
+            with self._lock:
+                self.refused += 1
+            raise DocxTooLarge(f'DOCX decompresses to {total} bytes (limit {self.max_uncompressed})')
+
+    @staticmethod
+    def _document_part(archive):
+        # The main part is named by the package relationships; Word always
+        # uses word/document.xml but other producers need not
+        from lxml import etree
+        try:
+            with archive.open('_rels/.rels') as f:
+                relationships = etree.parse(f, etree.XMLParser(resolve_entities=False)).getroot()
+        except KeyError:
+            return 'word/document.xml'
+        for relationship in relationships.iter(f'{{{RELATIONSHIPS_NAMESPACE}}}Relationship'):
+            if relationship.get('Type') == OFFICE_DOCUMENT:
+                return posixpath.normpath(relationship.get('Target', '').lstrip('/'))
+        return 'word/document.xml'
+
+    def paragraphs(self, source):
+        """Yields the text of each body paragraph of a DOCX (path or binary buffer), in order."""
+        from lxml import etree
+
+        with zipfile.ZipFile(source) as archive:
+            self._check_size(archive)
+            with archive.open(self._document_part(archive)) as document:
+                for _, element in etree.iterparse(document, events=('end',), tag=_PARAGRAPH,
+                                                  resolve_entities=False, huge_tree=False):
+                    parent = element.getparent()
+                    if parent is None or parent.tag != _BODY:
+                        # Paragraphs in tables and text boxes, which
+                        # doc.paragraphs leaves out; freed with their container
+                        continue
+                    yield _paragraph_text(element)
+                    # Drop the paragraph and everything parsed before it
+                    element.clear()
+                    while element.getprevious() is not None:
+                        del parent[0]
+
+    def extract(self, source):
+        """Returns the text of a DOCX, one line per paragraph, cut at max_chars characters."""
+        parts = []
+        chars = 0
+        for text in self.paragraphs(source):
+            parts.append(text)
+            chars += len(text) + 1
+            if self.max_chars and chars >= self.max_chars:
+                break
+        text = '\n'.join(parts)
+        return text[:self.max_chars] if self.max_chars else text
+
+    def stats(self):
+        with self._lock:
+            return {
+                'max_uncompressed': self.max_uncompressed,
+                'max_chars': self.max_chars,
+                'refused': self.refused
+            }
+
+
+docx_engine = DocxExtractionEngine.from_env()
@@ -1,153 +1,220 @@
+import logging
+import os
 import re
 import string
-from nltk.tokenize import word_tokenize
-from nltk.corpus import stopwords
-import PyPDF2
-from docx import Document
-from flask import current_app
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-
-# Initialize NLTK stopwords
-try:
-    import nltk
-    nltk.download('stopwords', quiet=True)
-    nltk.download('punkt', quiet=True)
-    stop_words = set(stopwords.words('english'))
-except Exception as e:
-    print(f"Error initializing NLTK: {str(e)}")
-    # Fallback to a simple list of common English stopwords
-    stop_words = set(['i', 'me', 'my', 'myself', 'we', 'our', 'ours', 'ourselves', 'you', 'your', 'yours',
-                   'yourself', 'yourselves', 'he', 'him', 'his', 'himself', 'she', 'her', 'hers',
-                   'herself', 'it', 'its', 'itself', 'they', 'them', 'their', 'theirs', 'themselves',
-                   'what', 'which', 'who', 'whom', 'this', 'that', 'these', 'those', 'am', 'is', 'are',
-                   'was', 'were', 'be', 'been', 'being', 'have', 'has', 'had', 'having', 'do', 'does',
-                   'did', 'doing', 'a', 'an', 'the', 'and', 'but', 'if', 'or', 'because', 'as', 'until',
-                   'while', 'of', 'at', 'by', 'for', 'with', 'about', 'against', 'between', 'into',
-                   'through', 'during', 'before', 'after', 'above', 'below', 'to', 'from', 'up', 'down',
-                   'in', 'out', 'on', 'off', 'over', 'under', 'again', 'further', 'then', 'once', 'here',
-                   'there', 'when', 'where', 'why', 'how', 'all', 'any', 'both', 'each', 'few', 'more',
-                   'most', 'other', 'some', 'such', 'no', 'nor', 'not', 'only', 'own', 'same', 'so',
-                   'than', 'too', 'very', 's', 't', 'can', 'will', 'just', 'don', 'should', 'now'])
-
-# Check if scikit-learn is available
-try:
-    sklearn_available = True
-except NameError:
-    sklearn_available = False
+from .docx_engine import docx_engine
+from .metrics import metrics
+from .pdf_engine import pdf_engine
+
+# Module logger rather than current_app.logger so extraction also works in
+# pool processes that have no application context
+logger = logging.getLogger(__name__)
+
+# NLTK's English stopword list, vendored so importing this module never
+# touches the network. STOPWORDS_PATH points at a replacement list (one word
+# per line).
+STOPWORDS_PATH = os.environ.get(
+    'STOPWORDS_PATH', os.path.join(os.path.dirname(__file__), 'data', 'stopwords_english.txt'))
+
+def load_stopwords(path=STOPWORDS_PATH):
+    with open(path, encoding='utf-8') as f:
+        return set(line.strip() for line in f if line.strip())
+
+stop_words = frozenset(load_stopwords())
+
+# Cleaned text holds only lowercase ASCII words, so every word clean_text drops
+# (stopwords and words under three letters) fits in one set lookup
+_dropped_words = stop_words | frozenset(
+    first + second for first in string.ascii_lowercase for second in [''] + list(string.ascii_lowercase))
+
+# Cleaning keeps only ASCII letters and whitespace (after dropping URLs), which
+# is what the old chain of substitutions, punctuation stripping and digit
+# removal left behind
+_url_pattern = re.compile(r'http\S+')
+_non_letters_pattern = re.compile(r'[^a-zA-Z\s]+')
+# The same characters as bytes, so ASCII text is cleaned by bytes.translate
+_ASCII_NON_LETTERS = bytes(i for i in range(128) if _non_letters_pattern.match(chr(i)))
 
 def extract_text_from_pdf(file_path):
     text = ''
     try:
-        # Try pdfplumber first (better text extraction)
-        try:
-            import pdfplumber
-            with pdfplumber.open(file_path) as pdf:
-                for page in pdf.pages:
-                    page_text = page.extract_text()
-                    if page_text:
-                        text += page_text + "\n"
-        except ImportError:
-            # Fall back to PyPDF2
-            with open(file_path, 'rb') as file:
-                try:
-                    # For PyPDF2 3.x
-                    reader = PyPDF2.PdfReader(file)
-                    for page in reader.pages:
-                        text += page.extract_text() + "\n"
-                except Exception:
-                    # Try old PyPDF2 version
-                    file.seek(0)
-                    reader = PyPDF2.PdfFileReader(file)
-                    for page_num in range(reader.getNumPages()):
-                        text += reader.getPage(page_num).extractText() + "\n"
+        # Fastest installed backend first, limited to the first pages of the document
+        text = pdf_engine.extract(file_path)
     except Exception as e:
-        current_app.logger.error(f"Error reading PDF: {str(e)}")
+        logger.error(f"Error reading PDF: {str(e)}")
     
     return text.strip() or "Unable to extract text from PDF."
 
 def extract_text_from_docx(file_path):
     text = ''
     try:
-        doc = Document(file_path)
-        for para in doc.paragraphs:
-            text += para.text + '\n'
+        # Streamed paragraph by paragraph, refusing archives that decompress
+        # past DOCX_MAX_UNCOMPRESSED
+        text = docx_engine.extract(file_path)
     except Exception as e:
-        current_app.logger.error(f"Error reading DOCX: {str(e)}")
+        logger.error(f"Error reading DOCX: {str(e)}")
     return text.strip() or "Unable to extract text from DOCX."
 
+def _strip_to_letters(text):
+    if 'http' in text:
+        text = _url_pattern.sub('', text)
+    if text.isascii():
+        return text.encode('ascii').translate(None, _ASCII_NON_LETTERS).decode('ascii')
+    return _non_letters_pattern.sub('', text)
+
+# NLTK's word_tokenize, which clean_text replaced, split these words in two;
+# the second halves are stopwords or too short, so only the first is kept
+# ("cannot" -> "can" "not", both stopwords; "gonna" -> "gon" "na" -> "gon")
+_CONTRACTIONS = {'cannot': 'can', 'gimme': 'gim', 'gonna': 'gon', 'gotta': 'got', 'lemme': 'lem', 'wanna': 'wan'}
+
 def clean_text(text):
-    text = re.sub(r'http\S+', '', text)
-    text = re.sub(r'[^a-zA-Z0-9\s.,;:!?\-&]', '', text)
-    text = text.translate(str.maketrans('', '', string.punctuation))
-    text = re.sub(r'\d+', '', text)
-    words = word_tokenize(text.lower())
-    filtered_words = [word for word in words if word not in stop_words and len(word) > 2]
-    return ' '.join(filtered_words)
+    """Lowercased words of three or more letters, minus stopwords, joined by spaces."""
+    words = _strip_to_letters(text).lower().split()
+    if not _CONTRACTIONS.keys().isdisjoint(words):
+        words = [_CONTRACTIONS.get(word, word) for word in words]
+    return ' '.join([word for word in words if word not in _dropped_words])
 
-def extract_email(text):
-    # Standard email pattern
-    email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-    match = re.search(email_pattern, text, re.IGNORECASE)
-    if match:
-        return match.group(0)
-    return ''
+def clean_texts(texts):
+    """
+    clean_text for a batch of documents. Identical documents (the same job
+    description or a resume uploaded twice) are only cleaned once.
+    """
+    cleaned = {}
+    results = []
+    for text in texts:
+        if text not in cleaned:
+            cleaned[text] = clean_text(text)
+        results.append(cleaned[text])
+    return results
 
-def extract_phone(text):
-    # Common phone patterns
-    phone_patterns = [
-        r'(?:\+?\d{1,3}[-.\s]?)?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}',  # (123) 456-7890, 123-456-7890
-        r'\b\d{10}\b',  # 1234567890
+class FieldExtractor:
+    """
+    Pulls the contact details and highest qualification out of resume text.
+
+    Patterns are compiled once and each starts with a cheap lookahead on its
+    possible first characters, so the regex engine skips most positions
+    without trying the full pattern. Email, phone and city searches stop at
+    their first match (the email search starts right before the first '@'),
+    the name is looked for in the first lines only, and every qualification
+    level is matched by one combined pattern in a single scan (stopping early
+    once the highest level is seen) instead of one scan per level.
+    """
+
+    email_pattern = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', re.IGNORECASE)
+    email_local_chars = frozenset(string.ascii_letters + string.digits + '._%+-')
+    # (123) 456-7890, 123-456-7890, +91 1234567890; also covers bare 10-digit numbers
+    phone_pattern = re.compile(r'(?=[+(\d])(?:\+?\d{1,3}[-.\s]?)?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}')
+    phone_strip_pattern = re.compile(r'[^\d+]')
+    city_pattern = re.compile(
+        r'(?=[lbrfi])(?:located|based|live|living|residing|from|in)\s+(?:in|at|near)?\s+([A-Z][a-zA-Z\s]+)',
+        re.IGNORECASE
+    )
+
+    # Highest level first
+    qualification_levels = [
+        ('PhD', r'ph\.?d|doctorate'),
+        ('Masters', r'm\.?sc|master[\'’]s|m\.?a|m\.?ed|msc|ma|ms'),
+        ('Bachelors', r'b\.?sc|bachelor[\'’]s|b\.?a|b\.?ed|bsc|ba'),
+        ('Diploma', r'diploma|certificate'),
+        ('High School', r'h\.s|high school|secondary school'),
     ]
-    
-    for pattern in phone_patterns:
-        match = re.search(pattern, text)
+
+    def __init__(self, name_lines=10):
+        self.name_lines = name_lines
+        self.qualification_pattern = re.compile(
+            r'(?=[bcdhmps])\b(?:' + '|'.join(
+                f'(?P<level{rank}>{pattern})' for rank, (_, pattern) in enumerate(self.qualification_levels)
+            ) + r')\b',
+            re.IGNORECASE
+        )
+
+    def email(self, text):
+        at = text.find('@')
+        if at == -1:
+            return ''
+        # No match can start before the local part in front of the first '@'
+        start = at
+        while start > 0 and text[start - 1] in self.email_local_chars:
+            start -= 1
+        match = self.email_pattern.search(text, start)
+        return match.group(0) if match else ''
+
+    def phone(self, text):
+        match = self.phone_pattern.search(text)
         if match:
             # Clean the match
-            phone = re.sub(r'[^\d+]', '', match.group(0))
-            return phone[:15]  # Limit length
-    return ''
+            return self.phone_strip_pattern.sub('', match.group(0))[:15]  # Limit length
+        return ''
 
-def extract_name(text):
-    # Look for name in the first few lines
-    lines = text.split('\n')
-    for line in lines[:10]:
-        line = line.strip()
-        if line and 2 <= len(line.split()) <= 4:
+    def name(self, text):
+        # Look for name in the first few lines
+        for line in text.split('\n', self.name_lines)[:self.name_lines]:
             words = line.split()
-            if all(word[0].isupper() for word in words if word) and not any(char.isdigit() for char in line):
-                return line
-    return ''
+            if 2 <= len(words) <= 4:
+                if all(word[0].isupper() for word in words) and not any(char.isdigit() for char in line):
+                    return line.strip()
+        return ''
+
+    def city(self, text):
+        match = self.city_pattern.search(text)
+        return match.group(1).strip() if match else ''
+
+    def highest_qualification(self, text):
+        best = None
+        for match in self.qualification_pattern.finditer(text):
+            rank = int(match.lastgroup[len('level'):])
+            if best is None or rank < best:
+                best = rank
+                if best == 0:
+                    break
+        return self.qualification_levels[best][0] if best is not None else ''
+
+    def extract(self, text):
+        """
+        Returns every field as a dict keyed like the Candidate columns, timing
+        each extractor as a "fields.<column>" stage.
+        """
+        fields = {}
+        for field, extractor in (
+            ('name', self.name),
+            ('email', self.email),
+            ('mobile', self.phone),
+            ('city', self.city),
+            ('highest_qualification', self.highest_qualification)
+        ):
+            with metrics.stage('fields.' + field):
+                fields[field] = extractor(text)
+        return fields
+
+
+field_extractor = FieldExtractor()
+
+def extract_email(text):
+    return field_extractor.email(text)
+
+def extract_phone(text):
+    return field_extractor.phone(text)
+
+def extract_name(text):
+    return field_extractor.name(text)
 
 def extract_address(text):
-    # Simple city pattern
-    city_pattern = r'(?:located|based|live|living|residing|from|in)\s+(?:in|at|near)?\s+([A-Z][a-zA-Z\s]+)'
-    match = re.search(city_pattern, text, re.IGNORECASE)
-    if match:
-        return match.group(1).strip()
-    return ''
+    return field_extractor.city(text)
 
 def extract_highest_qualification(text):
-    qualifications = {
-        'PhD': r'\b(ph\.?d|doctorate)\b',
-        'Masters': r'\b(m\.?sc|master\'s|m\.?a|m\.?ed|msc|ma|ms)\b',
-        'Bachelors': r'\b(b\.?sc|bachelor\'s|b\.?a|b\.?ed|bsc|ba)\b',
-        'Diploma': r'\b(diploma|certificate)\b',
-        'High School': r'\b(h\.s|high school|secondary school)\b'
-    }
-    
-    # Check each qualification level
-    for level, pattern in qualifications.items():
-        if re.search(pattern, text, re.IGNORECASE):
-            return level
-    
-    return ''
+    return field_extractor.highest_qualification(text)
 
 def calculate_score(resume_text, job_description):
     if not resume_text or not job_description:
         return 0.0
     
     try:
+        try:
+            from sklearn.feature_extraction.text import TfidfVectorizer
+            from sklearn.metrics.pairwise import cosine_similarity
+            sklearn_available = True
+        except ImportError:
+            sklearn_available = False
         if sklearn_available:
             # Use TF-IDF vectorization and cosine similarity for better matching
             vectorizer = TfidfVectorizer()
@@ -169,5 +236,5 @@ def calculate_score(resume_text, job_description):
             score = (len(common_words) / len(job_words)) * 100
             return round(score, 2)
     except Exception as e:
-        current_app.logger.error(f"Score calculation error: {str(e)}")
+        logger.error(f"Score calculation error: {str(e)}")
         return 0.0
\ No newline at end of file
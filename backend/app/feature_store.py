@@ -0,0 +1,329 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import zlib
+from array import array
+from collections import Counter
+from .fingerprints import band_buckets, signature, similarity
+from .scoring import search_term_frequencies, section_term_frequencies, term_frequencies
+
+logger = logging.getLogger(__name__)
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS features (
+    content_hash TEXT PRIMARY KEY,
+    text BLOB NOT NULL,
+    tokens BLOB NOT NULL,
+    term_ids BLOB NOT NULL,
+    counts BLOB NOT NULL,
+    fields TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    search_ids BLOB,
+    search_counts BLOB,
+    minhash BLOB,
+    section_ids BLOB,
+    section_counts BLOB
+)
+"""
+
+# Columns added after the first release; stores created earlier get them on open
+_ADDED_COLUMNS = (
+    ('search_ids', 'BLOB'), ('search_counts', 'BLOB'), ('minhash', 'BLOB'),
+    ('section_ids', 'BLOB'), ('section_counts', 'BLOB')
+)
+
+# Locality-sensitive hashing index over the MinHash signatures
+_BANDS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS minhash_bands (
+    band INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    content_hash TEXT NOT NULL,
+    PRIMARY KEY (band, bucket, content_hash)
+) WITHOUT ROWID
+"""
+
+
+def file_hash(file_path):
+    """SHA-256 of a file's bytes, the key resumes are stored under."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def encode_term_counts(tf):
+    """Packs sparse term counts ({term id: count}) as two uint32 blobs."""
+    return array('I', tf.keys()).tobytes(), array('I', tf.values()).tobytes()
+
+
+def decode_term_counts(ids_blob, counts_blob):
+    ids = array('I')
+    ids.frombytes(ids_blob)
+    counts = array('I')
+    counts.frombytes(counts_blob)
+    return Counter(dict(zip(ids, counts)))
+
+
+def resume_features(analysis):
+    """
+    The counts and fingerprint FeatureStore.put stores next to an analysis,
+    as {column: packed blob}: its scoring term counts, search term counts,
+    section term counts and MinHash signature. Needs no store, so the
+    extraction pool computes them next to the extraction and the web
+    process only writes the blobs.
+    """
+    term_ids, counts = encode_term_counts(term_frequencies(analysis.get('tokens', '')))
+    search_ids, search_counts = encode_term_counts(search_term_frequencies(analysis.get('text', '')))
+    section_ids, section_counts = encode_term_counts(section_term_frequencies(analysis.get('text', '')))
+    return {
+        'term_ids': term_ids,
+        'counts': counts,
+        'search_ids': search_ids,
+        'search_counts': search_counts,
+        'section_ids': section_ids,
+        'section_counts': section_counts,
+        'minhash': signature(analysis.get('tokens', ''))
+    }
+
+
+class FeatureStore:
+    """
+    Content-addressed store of resume extraction results, keyed by the SHA-256
+    of the uploaded file. Each entry holds the extracted text, the cleaned
+    tokens, the sparse term counts used for TF-IDF scoring (hashed term ids
+    and counts, see scoring.term_frequencies), the search term counts of the
+    raw text (scoring.search_term_frequencies), its term counts by resume
+    section (scoring.section_term_frequencies) and the extracted contact
+    fields, so a file uploaded to several jobs is parsed only once and every
+    scoring engine reads precomputed counts.
+
+    Entries live in a single SQLite file (zlib-compressed text, packed count
+    arrays) that every app and worker process can share.
+    """
+
+    def __init__(self):
+        self.path = None
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.open(app.config['FEATURE_STORE_PATH'])
+
+    def open(self, path):
+        """Uses the store file at path, creating or upgrading its schema."""
+        self.path = path
+        # Connections threads opened to a previous path are not reused
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(_SCHEMA)
+            existing = {row[1] for row in conn.execute('PRAGMA table_info(features)')}
+            for name, column_type in _ADDED_COLUMNS:
+                if name not in existing:
+                    conn.execute(f'ALTER TABLE features ADD COLUMN {name} {column_type}')
+            conn.execute(_BANDS_SCHEMA)
+            unfingerprinted = conn.execute('SELECT 1 FROM features WHERE minhash IS NULL LIMIT 1').fetchone()
+        if unfingerprinted:
+            # Entries stored before fingerprinting are indexed without delaying startup
+            threading.Thread(target=self.backfill_fingerprints, name='fingerprint-backfill', daemon=True).start()
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    @property
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+        return conn
+
+    def _count(self, hits, misses):
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+
+    def get(self, content_hash):
+        """Returns the stored analysis for a file hash, or None."""
+        row = self._conn.execute(
+            'SELECT text, tokens, fields FROM features WHERE content_hash = ?', (content_hash,)
+        ).fetchone()
+        if row is None:
+            self._count(0, 1)
+            return None
+        self._count(1, 0)
+        text, tokens, fields = row
+        return {
+            'text': zlib.decompress(text).decode('utf-8'),
+            'tokens': zlib.decompress(tokens).decode('utf-8'),
+            **json.loads(fields)
+        }
+
+    def put(self, content_hash, analysis, features=None):
+        """
+        Stores an analysis produced by pipeline.analyze_resume with its
+        resume_features, which are computed here unless already given.
+        """
+        if features is None:
+            features = resume_features(analysis)
+        fields = {key: value for key, value in analysis.items() if key not in ('text', 'tokens', 'score')}
+        with self._conn as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO features '
+                '(content_hash, text, tokens, term_ids, counts, fields, search_ids, search_counts, minhash, '
+                'section_ids, section_counts) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (
+                    content_hash,
+                    zlib.compress(analysis.get('text', '').encode('utf-8')),
+                    zlib.compress(analysis.get('tokens', '').encode('utf-8')),
+                    features['term_ids'],
+                    features['counts'],
+                    json.dumps(fields),
+                    features['search_ids'],
+                    features['search_counts'],
+                    features['minhash'],
+                    features['section_ids'],
+                    features['section_counts']
+                )
+            )
+            self._index_fingerprint(conn, content_hash, features['minhash'])
+
+    def _index_fingerprint(self, conn, content_hash, minhash):
+        conn.executemany(
+            'INSERT OR IGNORE INTO minhash_bands (band, bucket, content_hash) VALUES (?, ?, ?)',
+            [(band, bucket, content_hash) for band, bucket in band_buckets(minhash)]
+        )
+
+    def get_term_counts(self, content_hashes, chunk_size=500):
+        """
+        Returns {hash: (term ids blob, counts blob)} for many files at once;
+        hashes that are not stored are left out. The packed blobs are used as
+        is to build scoring matrices without touching the text.
+        """
+        hashes = list(set(content_hashes))
+        result = {}
+        for start in range(0, len(hashes), chunk_size):
+            chunk = hashes[start:start + chunk_size]
+            placeholders = ','.join('?' * len(chunk))
+            rows = self._conn.execute(
+                f'SELECT content_hash, term_ids, counts FROM features WHERE content_hash IN ({placeholders})',
+                chunk
+            )
+            for content_hash, term_ids, counts in rows:
+                result[content_hash] = (term_ids, counts)
+        return result
+
+    def get_search_term_counts(self, content_hashes, chunk_size=500):
+        """
+        Like get_term_counts, for the full-text search terms of each file
+        (scoring.search_term_frequencies of the raw text). Entries stored
+        before search existed have theirs computed from the text and saved.
+        """
+        return self._get_text_counts('search_ids', 'search_counts', search_term_frequencies, content_hashes, chunk_size)
+
+    def get_section_term_counts(self, content_hashes, chunk_size=500):
+        """
+        Like get_term_counts, for the term counts of each file by resume
+        section (scoring.section_term_frequencies of the raw text). Entries
+        stored before sections were counted have theirs computed and saved.
+        """
+        return self._get_text_counts(
+            'section_ids', 'section_counts', section_term_frequencies, content_hashes, chunk_size
+        )
+
+    def _get_text_counts(self, ids_column, counts_column, counter, content_hashes, chunk_size):
+        hashes = list(set(content_hashes))
+        result = {}
+        missing = []
+        for start in range(0, len(hashes), chunk_size):
+            chunk = hashes[start:start + chunk_size]
+            placeholders = ','.join('?' * len(chunk))
+            rows = self._conn.execute(
+                f'SELECT content_hash, {ids_column}, {counts_column}, text FROM features '
+                f'WHERE content_hash IN ({placeholders})',
+                chunk
+            )
+            for content_hash, ids, counts, text in rows:
+                if ids is None:
+                    ids, counts = encode_term_counts(counter(zlib.decompress(text).decode('utf-8')))
+                    missing.append((ids, counts, content_hash))
+                result[content_hash] = (ids, counts)
+        if missing:
+            with self._conn as conn:
+                conn.executemany(
+                    f'UPDATE features SET {ids_column} = ?, {counts_column} = ? WHERE content_hash = ?', missing
+                )
+        return result
+
+    def similar(self, content_hash, threshold=0.8, max_candidates=1000):
+        """
+        Stored files whose cleaned text is a near-duplicate of content_hash's:
+        [(hash, estimated Jaccard similarity)] at or above threshold, most
+        similar first. Only files sharing an LSH bucket with it are compared,
+        so the cost depends on the number of near matches, not the store size.
+        """
+        row = self._conn.execute('SELECT minhash FROM features WHERE content_hash = ?', (content_hash,)).fetchone()
+        if row is None or not row[0]:
+            return []
+        minhash = row[0]
+        buckets = band_buckets(minhash)
+        matches = ' OR '.join('(band = ? AND bucket = ?)' for _ in buckets)
+        candidates = [h for (h,) in self._conn.execute(
+            f'SELECT DISTINCT content_hash FROM minhash_bands WHERE {matches} LIMIT ?',
+            [value for key in buckets for value in key] + [max_candidates + 1]
+        ) if h != content_hash]
+
+        results = []
+        placeholders = ','.join('?' * len(candidates))
+        rows = self._conn.execute(
+            f'SELECT content_hash, minhash FROM features WHERE content_hash IN ({placeholders})', candidates
+        ) if candidates else []
+        for other_hash, other_minhash in rows:
+            score = similarity(minhash, other_minhash)
+            if score >= threshold:
+                results.append((other_hash, score))
+        results.sort(key=lambda item: (-item[1], item[0]))
+        return results
+
+    def backfill_fingerprints(self, batch_size=200):
+        """Computes and indexes the MinHash signature of every entry stored without one."""
+        done = 0
+        while True:
+            rows = self._conn.execute(
+                'SELECT content_hash, tokens FROM features WHERE minhash IS NULL LIMIT ?', (batch_size,)
+            ).fetchall()
+            if not rows:
+                break
+            with self._conn as conn:
+                for content_hash, tokens in rows:
+                    minhash = signature(zlib.decompress(tokens).decode('utf-8'))
+                    conn.execute('UPDATE features SET minhash = ? WHERE content_hash = ?', (minhash, content_hash))
+                    self._index_fingerprint(conn, content_hash, minhash)
+            done += len(rows)
+        if done:
+            logger.info(f"Fingerprinted {done} stored resumes")
+        return done
+
+    def stats(self):
+        entries = self._conn.execute('SELECT COUNT(*) FROM features').fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else None,
+            'entries': entries,
+            'store_bytes': os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        }
+
+
+feature_store = FeatureStore()
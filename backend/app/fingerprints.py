@@ -0,0 +1,60 @@
+import random
+import zlib
+
+# MinHash signatures of NUM_PERM values, split into BANDS bands of ROWS values
+# for locality-sensitive hashing. Two resumes share a band bucket with
+# probability 1 - (1 - s^ROWS)^BANDS for Jaccard similarity s: about 0.25 at
+# s = 0.6, 0.8 at s = 0.75, 0.95 at s = 0.8 and over 0.99 from s = 0.85.
+NUM_PERM = 128
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+
+# Resumes are compared as sets of overlapping word 3-grams of their cleaned tokens
+SHINGLE_SIZE = 3
+
+_PRIME = 4294967291  # largest prime below 2 ** 32
+_rng = random.Random(20240531)
+_A = [_rng.randrange(1, _PRIME) for _ in range(NUM_PERM)]
+_B = [_rng.randrange(0, _PRIME) for _ in range(NUM_PERM)]
+
+
+def shingles(tokens):
+    """Hashes of the word n-grams of cleaned text; short texts use their words."""
+    words = tokens.split()
+    if len(words) < SHINGLE_SIZE:
+        grams = words
+    else:
+        grams = (' '.join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1))
+    return {zlib.crc32(gram.encode('utf-8')) for gram in grams}
+
+
+def signature(tokens):
+    """
+    MinHash signature of cleaned text as NUM_PERM packed uint32 values, or
+    b'' when there is no text. The fraction of equal values between two
+    signatures estimates the Jaccard similarity of their shingle sets.
+    """
+    import numpy as np
+
+    values = np.fromiter(shingles(tokens), dtype=np.uint64)
+    if not len(values):
+        return b''
+    a = np.array(_A, dtype=np.uint64)[:, None]
+    b = np.array(_B, dtype=np.uint64)[:, None]
+    # a * x + b stays below 2 ** 64 because every operand is below 2 ** 32
+    return ((a * values[None, :] + b) % _PRIME).min(axis=1).astype(np.uint32).tobytes()
+
+
+def band_buckets(packed):
+    """(band, bucket) keys of a signature, one per band."""
+    width = ROWS * 4
+    return [(band, zlib.crc32(packed[band * width:(band + 1) * width])) for band in range(BANDS)] if packed else []
+
+
+def similarity(first, second):
+    """Estimated Jaccard similarity of two packed signatures."""
+    import numpy as np
+
+    if not first or not second:
+        return 0.0
+    return float(np.count_nonzero(np.frombuffer(first, dtype=np.uint32) == np.frombuffer(second, dtype=np.uint32))) / NUM_PERM
@@ -0,0 +1,222 @@
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from .models import db, Job, Candidate, CANDIDATE_FIELDS, CANDIDATE_ORDER
+from .pagination import decode_cursor, encode_cursor
+
+# Board holding the best candidates over all jobs
+ALL_JOBS = None
+
+
+def top_resumes_query(job_id=None):
+    """Listing columns plus job id and title of the candidates of one job, or of every job."""
+    query = db.session.query(*CANDIDATE_FIELDS, Candidate.job_id, Job.title.label('job_title')) \
+        .outerjoin(Job, Job.id == Candidate.job_id)
+    if job_id is not None:
+        query = query.filter(Candidate.job_id == job_id)
+    return query
+
+
+def candidate_row(candidate):
+    """Leaderboard entry for a Candidate instance; read before commit expires its attributes."""
+    row = {column.key: getattr(candidate, column.key) for column in CANDIDATE_FIELDS}
+    row['job_id'] = candidate.job_id
+    return row
+
+
+def _sort_key(row):
+    # Ascending order of (-score, -id) is the listing order: score DESC, id DESC
+    return (-(row['score'] or 0.0), -row['id'])
+
+
+class _Board:
+    """
+    The best len(keys) candidates of a job (or of all jobs) in listing order.
+    Unless complete, candidates outside the board may exist, but none of them
+    ranks above its last entry.
+    """
+
+    def __init__(self, rows, complete):
+        rows = sorted(rows, key=_sort_key)
+        self.keys = [_sort_key(row) for row in rows]
+        self.rows = rows
+        self.by_id = {row['id']: key for row, key in zip(rows, self.keys)}
+        self.complete = complete
+        self.loaded_at = time.monotonic()
+
+    def remove(self, candidate_id):
+        key = self.by_id.pop(candidate_id, None)
+        if key is None:
+            return
+        position = bisect_left(self.keys, key)
+        del self.keys[position]
+        del self.rows[position]
+
+    def put(self, row, capacity):
+        self.remove(row['id'])
+        key = _sort_key(row)
+        if not self.complete and (not self.keys or key > self.keys[-1]):
+            # Ranks below candidates that are not on the board
+            return
+        position = bisect_right(self.keys, key)
+        self.keys.insert(position, key)
+        self.rows.insert(position, row)
+        self.by_id[row['id']] = key
+        while len(self.keys) > capacity:
+            self.keys.pop()
+            del self.by_id[self.rows.pop()['id']]
+            self.complete = False
+
+
+class Leaderboard:
+    """
+    In-process top-K of candidates by score for every job and across all jobs,
+    serving /api/top-resumes without querying the database.
+
+    A board is loaded from the database on first read (LEADERBOARD_SIZE rows)
+    and kept up to date as candidates of this process are saved; rescoring,
+    bulk uploads and job deletion invalidate it. Other processes (dedicated
+    workers, further web workers) write to the database only, so boards also
+    expire after LEADERBOARD_TTL seconds. Pages beyond the board fall back to
+    the database.
+    """
+
+    def __init__(self):
+        self.capacity = 200
+        self.ttl = 30.0
+        self._boards = {}
+        self._titles = {}
+        self._versions = {}
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.fallbacks = 0
+
+    def init_app(self, app):
+        self.capacity = app.config['LEADERBOARD_SIZE']
+        self.ttl = app.config['LEADERBOARD_TTL']
+
+    def _touch(self, job_id):
+        # Loads that started before a change must not install their stale rows
+        for key in (job_id, ALL_JOBS):
+            self._versions[key] = self._versions.get(key, 0) + 1
+
+    def _load(self, job_id):
+        with self._lock:
+            version = self._versions.get(job_id, 0)
+        rows = [row._asdict() for row in top_resumes_query(job_id).order_by(
+            *(column.desc() for column in CANDIDATE_ORDER)
+        ).limit(self.capacity).all()]
+        board = _Board(rows, complete=len(rows) < self.capacity)
+        with self._lock:
+            for row in rows:
+                self._titles[row['job_id']] = row.pop('job_title')
+            if self._versions.get(job_id, 0) == version:
+                self._boards[job_id] = board
+        return board
+
+    def page(self, job_id, limit, cursor=None):
+        """
+        One page of the best candidates of a job (job_id=None for all jobs),
+        like pagination.keyset_page over top_resumes_query with CANDIDATE_ORDER.
+
+        Returns (rows, next_cursor), or None when the page reaches past the
+        board and has to come from the database.
+        """
+        if self.capacity <= 0:
+            return None
+        after = None
+        if cursor:
+            # Only numbers (or a null score) get past the decoder
+            values = decode_cursor(cursor, CANDIDATE_ORDER)
+            after = _sort_key(dict(zip((column.key for column in CANDIDATE_ORDER), values)))
+
+        with self._lock:
+            board = self._boards.get(job_id)
+            if board is not None and time.monotonic() - board.loaded_at > self.ttl:
+                del self._boards[job_id]
+                board = None
+            if board is not None:
+                rows = self._window(board, limit, after)
+                if rows is None and len(board.rows) >= self.capacity:
+                    # Past a full board: only the database has these rows
+                    self.fallbacks += 1
+                    return None
+                # A row saved for a job this process has not loaded yet has no title
+                if rows is not None and all(row['job_id'] in self._titles for row in rows):
+                    self.hits += 1
+                    return self._result(rows, limit)
+
+        board = self._load(job_id)
+        with self._lock:
+            rows = self._window(board, limit, after)
+            if rows is None:
+                self.fallbacks += 1
+                return None
+            self.misses += 1
+            return self._result(rows, limit)
+
+    def _window(self, board, limit, after):
+        """Up to limit + 1 rows after the board key after, or None if the board may not hold them all."""
+        start = bisect_right(board.keys, after) if after else 0
+        rows = board.rows[start:start + limit + 1]
+        if len(rows) <= limit and not board.complete:
+            return None
+        return rows
+
+    def _result(self, rows, limit):
+        result = [dict(row, job_title=self._titles.get(row['job_id'])) for row in rows[:limit]]
+        if len(rows) <= limit:
+            return result, None
+        last = result[-1]
+        return result, encode_cursor(last[column.key] for column in CANDIDATE_ORDER)
+
+    def put(self, row):
+        """Records a committed insert or score change of one candidate."""
+        if self.capacity <= 0:
+            return
+        with self._lock:
+            self._touch(row['job_id'])
+            for key in (row['job_id'], ALL_JOBS):
+                board = self._boards.get(key)
+                if board is not None:
+                    board.put(dict(row), self.capacity)
+
+    def set_job_title(self, job_id, title):
+        with self._lock:
+            self._titles[job_id] = title
+
+    def invalidate(self, job_id):
+        """Drops the boards a job's candidates appear on, e.g. after rescoring it."""
+        with self._lock:
+            self._touch(job_id)
+            self._boards.pop(job_id, None)
+            self._boards.pop(ALL_JOBS, None)
+
+    def discard_job(self, job_id):
+        """Forgets a deleted job and removes its candidates from the overall board."""
+        with self._lock:
+            self._touch(job_id)
+            self._boards.pop(job_id, None)
+            self._titles.pop(job_id, None)
+            board = self._boards.get(ALL_JOBS)
+            if board is not None:
+                for row in [row for row in board.rows if row['job_id'] == job_id]:
+                    board.remove(row['id'])
+
+    def stats(self):
+        with self._lock:
+            reads = self.hits + self.misses + self.fallbacks
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'fallbacks': self.fallbacks,
+                'hit_rate': round(self.hits / reads, 4) if reads else None,
+                'boards': len(self._boards),
+                'entries': sum(len(board.rows) for board in self._boards.values()),
+                'capacity': self.capacity,
+                'ttl_seconds': self.ttl
+            }
+
+
+leaderboard = Leaderboard()
@@ -0,0 +1,131 @@
+import math
+import threading
+import time
+from .models import db, Job
+from .extractors import clean_text
+from .scoring import description_hash, term_frequencies
+
+
+class JobMatrix:
+    """
+    TF-IDF vectors of many job descriptions as the rows of one sparse matrix,
+    for scoring a resume against every job in a single matrix-vector product.
+
+    Term weights use the smoothed idf of each term across the job
+    descriptions (as sklearn's TfidfVectorizer does), so terms that every job
+    asks for count less than the ones that tell jobs apart. Columns are the
+    terms of the job vocabulary only; rows are l2-normalised.
+    """
+
+    def __init__(self, jobs):
+        """jobs is a list of (job id, title, term counts) tuples."""
+        import numpy as np
+        from scipy import sparse
+
+        self.job_ids = np.array([job_id for job_id, _, _ in jobs], dtype=np.int64)
+        self.titles = [title for _, title, _ in jobs]
+        vocabulary = sorted({term for _, _, tf in jobs for term in tf})
+        self.terms = np.array(vocabulary, dtype=np.uint32)
+
+        n_jobs = len(jobs)
+        columns = {term: column for column, term in enumerate(vocabulary)}
+        indptr = [0]
+        indices = []
+        data = []
+        for _, _, tf in jobs:
+            indices.extend(columns[term] for term in tf)
+            data.extend(tf.values())
+            indptr.append(len(indices))
+        matrix = sparse.csr_matrix(
+            (np.array(data, dtype=np.float64), np.array(indices, dtype=np.int32), np.array(indptr, dtype=np.int64)),
+            shape=(n_jobs, len(vocabulary))
+        )
+
+        df = np.bincount(matrix.indices, minlength=len(vocabulary))
+        self.idf = np.log((1 + n_jobs) / (1 + df)) + 1
+        # Weight of a resume term no job mentions; it only lowers the resume's norm
+        self.unseen_idf = math.log(1 + n_jobs) + 1
+
+        matrix.data *= self.idf[matrix.indices]
+        norms = np.sqrt(np.asarray(matrix.power(2).sum(axis=1)).ravel())
+        norms[norms == 0] = 1.0
+        self.matrix = sparse.csr_matrix(matrix.multiply((1 / norms)[:, None]))
+
+    def __len__(self):
+        return len(self.job_ids)
+
+    def score(self, tf, limit):
+        """
+        Cosine similarity (as a percentage) between a resume's term counts and
+        every job. Returns [(job id, title, score)] for the best limit jobs.
+        """
+        import numpy as np
+
+        if not tf or not len(self.terms):
+            return []
+        terms = np.fromiter(tf.keys(), dtype=np.uint32, count=len(tf))
+        counts = np.fromiter(tf.values(), dtype=np.float64, count=len(tf))
+        columns = np.minimum(np.searchsorted(self.terms, terms), len(self.terms) - 1)
+        known = self.terms[columns] == terms
+
+        weights = counts * np.where(known, self.idf[columns], self.unseen_idf)
+        norm = math.sqrt(float(weights @ weights))
+        resume = np.zeros(len(self.terms))
+        resume[columns[known]] = weights[known]
+        scores = self.matrix @ resume / norm
+
+        best = np.flatnonzero(scores > 0)
+        if len(best) > limit:
+            best = best[np.argpartition(-scores[best], limit - 1)[:limit]]
+        best = best[np.lexsort((self.job_ids[best], -scores[best]))]
+        return [(int(self.job_ids[row]), self.titles[row], round(float(scores[row]) * 100, 2)) for row in best]
+
+
+class JobMatcher:
+    """
+    The JobMatrix of every job, held in memory. It is rebuilt after jobs are
+    created, edited or deleted in this process, and every JOB_MATCH_TTL
+    seconds to pick up changes made by other processes; job descriptions are
+    only re-tokenized when they changed.
+    """
+
+    def __init__(self):
+        self.ttl = 60.0
+        self._matrix = None
+        self._built_at = 0.0
+        self._term_counts = {}  # job id -> (description hash, term counts)
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.ttl = app.config['JOB_MATCH_TTL']
+
+    def invalidate(self):
+        with self._lock:
+            self._matrix = None
+
+    def matrix(self):
+        with self._lock:
+            if self._matrix is not None and time.monotonic() - self._built_at <= self.ttl:
+                return self._matrix
+
+            jobs = []
+            term_counts = {}
+            for job_id, title, description in db.session.query(Job.id, Job.title, Job.description).order_by(Job.id):
+                desc_hash = description_hash(description)
+                cached = self._term_counts.get(job_id)
+                if cached is None or cached[0] != desc_hash:
+                    cached = (desc_hash, term_frequencies(clean_text(description)))
+                term_counts[job_id] = cached
+                jobs.append((job_id, title, cached[1]))
+            self._term_counts = term_counts
+            self._matrix = JobMatrix(jobs)
+            self._built_at = time.monotonic()
+            return self._matrix
+
+    def match(self, tf, limit):
+        """Returns (number of jobs scored, [(job id, title, score)] for the best limit jobs)."""
+        matrix = self.matrix()
+        return len(matrix), matrix.score(tf, limit)
+
+
+job_matcher = JobMatcher()
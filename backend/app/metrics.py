@@ -0,0 +1,247 @@
+import cProfile
+import logging
+import os
+import random
+import re
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the duration histograms
+DURATION_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in list(zip(names, values)) + list(extra)]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class Histogram:
+    """A Prometheus histogram with one series per combination of label values."""
+
+    def __init__(self, name, documentation, labels=(), buckets=DURATION_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}  # label values -> [bucket counts, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][bisect_left(self.buckets, value)] += 1
+            series[1] += value
+
+    def snapshot(self):
+        """{label values: (bucket counts, sum)}"""
+        with self._lock:
+            return {values: (list(counts), total) for values, (counts, total) in self._series.items()}
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        for values, (counts, total) in sorted(self.snapshot().items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{_labels(self.labels, values, [("le", bound)])} {cumulative}')
+            lines.append(f'{self.name}_sum{_labels(self.labels, values)} {total:.6f}')
+            lines.append(f'{self.name}_count{_labels(self.labels, values)} {cumulative}')
+        return lines
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+
+class Stage:
+    """Times the block it wraps as one stage of resume processing."""
+
+    __slots__ = ('metrics', 'name', 'started')
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.metrics.record_stage(self.name, time.perf_counter() - self.started)
+
+
+class Metrics:
+    """
+    Latency metrics of this process, served in the Prometheus text format by
+    GET /metrics: the duration of every HTTP request and background task, and
+    of each stage of resume processing (saving the upload, text extraction,
+    cleaning, every field extractor, scoring, database lookups and commits).
+
+    Stages timed while a request is handled also go into that response's
+    Server-Timing header. Requests can be profiled with cProfile, either on
+    demand (the X-Profile header carrying PROFILE_TOKEN) or for a random
+    PROFILE_SAMPLE_RATE share of requests and tasks; each profile is written
+    to PROFILE_DIR for pstats or snakeviz.
+    """
+
+    def __init__(self):
+        self.requests = Histogram(
+            'http_request_duration_seconds', 'Time spent handling HTTP requests.', ('method', 'endpoint', 'status'))
+        self.tasks = Histogram('resume_task_duration_seconds', 'Time spent processing queued resumes.', ('status',))
+        self.stages = Histogram('resume_stage_duration_seconds', 'Time spent in each resume processing stage.', ('stage',))
+        self.collectors = []  # callables returning more exposition lines
+        self.profile_token = None
+        self.profile_sample_rate = 0.0
+        self.profile_dir = None
+        self.profile_max_files = 200
+        self._local = threading.local()
+
+    def init_app(self, app):
+        self.profile_token = app.config['PROFILE_TOKEN']
+        self.profile_sample_rate = app.config['PROFILE_SAMPLE_RATE']
+        self.profile_dir = app.config['PROFILE_DIR']
+        self.profile_max_files = app.config['PROFILE_MAX_FILES']
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+
+    def stage(self, name):
+        return Stage(self, name)
+
+    def record_stage(self, name, seconds):
+        self.stages.observe(seconds, name)
+        timings = getattr(self._local, 'timings', None)
+        if timings is not None:
+            timings.append((name, seconds))
+
+    def record_stages(self, timings):
+        """Records stage timings measured elsewhere, e.g. in an extraction pool process."""
+        for name, seconds in timings:
+            self.record_stage(name, seconds)
+
+    def collect(self):
+        """
+        Starts collecting the stage timings of this thread; returns the list
+        they are appended to until stop_collecting().
+        """
+        self._local.timings = []
+        return self._local.timings
+
+    def stop_collecting(self):
+        timings = getattr(self._local, 'timings', None)
+        self._local.timings = None
+        return timings or []
+
+    # Profiling
+
+    def _start_profile(self, requested=False):
+        if not requested and (not self.profile_sample_rate or random.random() >= self.profile_sample_rate):
+            return None
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler is already running in this thread
+            return None
+        return profiler
+
+    def _save_profile(self, profiler, label):
+        profiler.disable()
+        if not self.profile_dir:
+            return None
+        os.makedirs(self.profile_dir, exist_ok=True)
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}_{re.sub(r'[^A-Za-z0-9_.-]+', '_', label)}_{uuid.uuid4().hex[:8]}.prof"
+        try:
+            profiler.dump_stats(os.path.join(self.profile_dir, name))
+            self._prune_profiles(keep=name)
+        except OSError as e:
+            logger.error(f"Could not save profile {name}: {str(e)}")
+            return None
+        return name
+
+    def _prune_profiles(self, keep):
+        # Oldest first; names only order profiles to the second
+        names = [name for _, name in sorted(
+            (entry.stat().st_mtime_ns, entry.name) for entry in os.scandir(self.profile_dir)
+            if entry.name.endswith('.prof') and entry.name != keep
+        )]
+        for name in names[:max(len(names) + 1 - self.profile_max_files, 0)]:
+            try:
+                os.remove(os.path.join(self.profile_dir, name))
+            except OSError:
+                pass
+
+    @contextmanager
+    def sampled_profile(self, label):
+        """Profiles the block for a PROFILE_SAMPLE_RATE share of calls, e.g. background tasks."""
+        profiler = self._start_profile()
+        try:
+            yield
+        finally:
+            if profiler is not None:
+                name = self._save_profile(profiler, label)
+                if name:
+                    logger.info(f"Saved profile {name}")
+
+    # Request hooks
+
+    def _before_request(self):
+        from flask import g, request
+
+        g.request_started = time.perf_counter()
+        g.stage_timings = self.collect()
+        requested = bool(self.profile_token) and request.headers.get('X-Profile') == self.profile_token
+        g.profiler = self._start_profile(requested)
+
+    def _after_request(self, response):
+        from flask import g, request
+
+        started = g.pop('request_started', None)
+        if started is None:
+            return response
+        self.requests.observe(
+            time.perf_counter() - started, request.method, request.url_rule.rule if request.url_rule else 'unmatched',
+            response.status_code
+        )
+        totals = {}
+        for name, seconds in self.stop_collecting():
+            totals[name] = totals.get(name, 0.0) + seconds
+        if totals:
+            response.headers['Server-Timing'] = ', '.join(
+                f'{re.sub(r"[^A-Za-z0-9_-]", "-", name)};dur={seconds * 1000:.2f}' for name, seconds in totals.items()
+            )
+        profiler = g.pop('profiler', None)
+        if profiler is not None:
+            name = self._save_profile(profiler, request.endpoint or 'unmatched')
+            if name:
+                response.headers['X-Profile-File'] = name
+        return response
+
+    def _teardown_request(self, exception):
+        from flask import g
+
+        # After an unhandled exception after_request never ran
+        profiler = g.pop('profiler', None)
+        if profiler is not None:
+            profiler.disable()
+        self.stop_collecting()
+
+    def render(self):
+        lines = self.requests.render() + self.tasks.render() + self.stages.render()
+        for collector in self.collectors:
+            lines.extend(collector())
+        return '\n'.join(lines) + '\n'
+
+
+metrics = Metrics()
@@ -0,0 +1,119 @@
+import logging
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import IntegrityError
+from . import db
+from .models import Candidate, Task
+
+logger = logging.getLogger(__name__)
+
+_VERSION_TABLE = """
+CREATE TABLE IF NOT EXISTS schema_version (
+    version INTEGER PRIMARY KEY,
+    description VARCHAR(200) NOT NULL,
+    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+)
+"""
+
+# Every migration must be safe to run against a database that already has its
+# changes: deployments created by the old db.create_all() start at version 0
+# with some or all of the schema in place.
+MIGRATIONS = []
+
+
+def migration(version, description):
+    def register(function):
+        MIGRATIONS.append((version, description, function))
+        return function
+    return register
+
+
+def _has_column(conn, table, column):
+    return column in {c['name'] for c in inspect(conn).get_columns(table)}
+
+
+def _create_indexes(conn, model, names):
+    # Named rather than every index of the model, so a migration never
+    # creates indexes that later migrations add
+    indexes = {index.name: index for index in model.__table__.indexes}
+    for name in names:
+        indexes[name].create(bind=conn, checkfirst=True)
+
+
+@migration(1, 'Create job, candidate and task tables')
+def create_tables(conn):
+    db.metadata.create_all(bind=conn, checkfirst=True)
+
+
+@migration(2, 'Add candidate.content_hash')
+def add_content_hash(conn):
+    if not _has_column(conn, 'candidate', 'content_hash'):
+        conn.execute(text('ALTER TABLE candidate ADD COLUMN content_hash VARCHAR(64)'))
+
+
+@migration(3, 'Index candidates by content hash, score and mobile number')
+def add_candidate_indexes(conn):
+    _create_indexes(conn, Candidate, (
+        'ix_candidate_content_hash', 'ix_candidate_job_id_score', 'ix_candidate_score', 'ix_candidate_mobile_job_id'
+    ))
+
+
+@migration(4, 'Add job.scoring_engine')
+def add_scoring_engine(conn):
+    if not _has_column(conn, 'job', 'scoring_engine'):
+        conn.execute(text("ALTER TABLE job ADD COLUMN scoring_engine VARCHAR(20) NOT NULL DEFAULT 'tfidf'"))
+
+
+@migration(5, 'Index tasks by job and file')
+def add_task_indexes(conn):
+    _create_indexes(conn, Task, ('ix_task_job_id', 'ix_task_filename'))
+
+
+@migration(6, 'Add job.deleting')
+def add_job_deleting(conn):
+    if not _has_column(conn, 'job', 'deleting'):
+        conn.execute(text('ALTER TABLE job ADD COLUMN deleting BOOLEAN NOT NULL DEFAULT FALSE'))
+
+
+def current_version(conn):
+    conn.execute(text(_VERSION_TABLE))
+    return conn.execute(text('SELECT COALESCE(MAX(version), 0) FROM schema_version')).scalar()
+
+
+def _lock(conn):
+    # Serialise concurrent upgrades (e.g. several gunicorn workers booting at
+    # once); SQLite already allows only one writer.
+    if conn.dialect.name == 'postgresql':
+        conn.execute(text('SELECT pg_advisory_xact_lock(7406311)'))
+
+
+def upgrade(engine):
+    """
+    Applies pending migrations in order, each in its own transaction together
+    with its schema_version row. Returns the versions that were applied.
+    """
+    applied = []
+    for version, description, function in sorted(MIGRATIONS, key=lambda m: m[0]):
+        try:
+            with engine.begin() as conn:
+                _lock(conn)
+                if current_version(conn) >= version:
+                    continue
+                function(conn)
+                conn.execute(
+                    text('INSERT INTO schema_version (version, description) VALUES (:version, :description)'),
+                    {'version': version, 'description': description}
+                )
+        except IntegrityError:
+            # Another process recorded this version first
+            continue
+        logger.info(f"Applied migration {version}: {description}")
+        applied.append(version)
+    return applied
+
+
+def status(engine):
+    """Returns (current version, [(version, description) still pending])."""
+    with engine.begin() as conn:
+        version = current_version(conn)
+    pending = [(v, d) for v, d, _ in sorted(MIGRATIONS, key=lambda m: m[0]) if v > version]
+    return version, pending
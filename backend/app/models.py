@@ -7,6 +7,10 @@ class Job(db.Model):
     title = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Name of the engine in scorers.SCORERS that ranks the job's candidates
+    scoring_engine = db.Column(db.String(20), nullable=False, default='tfidf', server_default='tfidf')
+    # Set while cleanup.delete_job_rows removes the job; no candidates are added to it then
+    deleting = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())
     candidates = db.relationship('Candidate', backref='job', lazy=True)
 
 class Candidate(db.Model):
@@ -18,6 +22,7 @@ class Candidate(db.Model):
     city = db.Column(db.String(100), nullable=True)
     highest_qualification = db.Column(db.String(200), nullable=True)
     resume_path = db.Column(db.String(255))
+    content_hash = db.Column(db.String(64), nullable=True, index=True)  # key into the feature store
     score = db.Column(db.Float, default=0.0)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     job_id = db.Column(db.Integer, db.ForeignKey('job.id'), nullable=False)
@@ -26,4 +31,42 @@ class Candidate(db.Model):
     __table_args__ = (
         db.UniqueConstraint('email', 'job_id', name='unique_email_per_job'),
         db.UniqueConstraint('resume_path', 'job_id', name='unique_resume_per_job'),
-    )
\ No newline at end of file
+        # Score-ranked listings per job and overall (keyset order is score, id)
+        db.Index('ix_candidate_job_id_score', 'job_id', db.desc('score'), db.desc('id')),
+        db.Index('ix_candidate_score', db.desc('score'), db.desc('id')),
+        # Duplicate check by phone number when a resume has no email
+        db.Index('ix_candidate_mobile_job_id', 'mobile', 'job_id'),
+    )
+
+# Columns returned by the candidate listings; other columns are never loaded
+CANDIDATE_FIELDS = (
+    Candidate.id,
+    Candidate.candidate_id,
+    Candidate.name,
+    Candidate.email,
+    Candidate.mobile,
+    Candidate.city,
+    Candidate.highest_qualification,
+    Candidate.resume_path,
+    Candidate.score
+)
+
+# Candidates are listed best first; id breaks ties so the key is unique
+CANDIDATE_ORDER = (Candidate.score, Candidate.id)
+
+class Task(db.Model):
+    # Background resume-processing task; the row doubles as the queue entry
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    job_id = db.Column(db.Integer, db.ForeignKey('job.id'), nullable=False, index=True)
+    status = db.Column(db.String(20), default='queued', nullable=False, index=True)
+    filename = db.Column(db.String(255), index=True)
+    original_filename = db.Column(db.String(255))
+    content_hash = db.Column(db.String(64), nullable=True)
+    form_data = db.Column(db.Text, nullable=True)
+    result = db.Column(db.Text, nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    # Times a worker claimed the task; tasks of crashed workers are retried
+    attempts = db.Column(db.Integer, nullable=False, default=0, server_default='0')
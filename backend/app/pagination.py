@@ -0,0 +1,88 @@
+import base64
+import json
+from numbers import Real
+from flask import current_app
+from sqlalchemy import Integer, and_, or_
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(values):
+    """Opaque cursor holding the sort key of the last row on a page."""
+    return base64.urlsafe_b64encode(json.dumps(list(values)).encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def _valid_value(column, value):
+    # Cursors are JSON from the client: each value must fit its key column
+    if value is None:
+        return column.nullable
+    if isinstance(value, bool):
+        return False
+    if isinstance(column.type, Integer):
+        return isinstance(value, int)
+    return isinstance(value, Real)
+
+
+def decode_cursor(cursor, columns):
+    """The sort key values a cursor holds for columns; raises InvalidCursor unless they fit them."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (ValueError, TypeError):
+        raise InvalidCursor('Invalid cursor')
+    if not isinstance(values, list) or len(values) != len(columns):
+        raise InvalidCursor('Invalid cursor')
+    if not all(_valid_value(column, value) for column, value in zip(columns, values)):
+        raise InvalidCursor('Invalid cursor')
+    return values
+
+
+def after_key(columns, values, descending):
+    """
+    Filter selecting the rows that come after values when ordering by columns,
+    e.g. (score, id) DESC: score < s OR (score = s AND id < i). Written out
+    rather than as a row-value comparison so every database can use the
+    index on the sort columns.
+    """
+    clauses = []
+    for position, (column, value) in enumerate(zip(columns, values)):
+        equal = [previous == previous_value for previous, previous_value in zip(columns[:position], values[:position])]
+        beyond = column < value if descending else column > value
+        clauses.append(and_(*equal, beyond))
+    return or_(*clauses)
+
+
+def page_size(requested, default=None):
+    """Clamps a requested page size to 1..MAX_PAGE_SIZE, falling back to PAGE_SIZE."""
+    limit = requested or default or current_app.config['PAGE_SIZE']
+    return max(1, min(limit, current_app.config['MAX_PAGE_SIZE']))
+
+
+def keyset_page(query, columns, limit, cursor=None, descending=True):
+    """
+    Fetches one page of query ordered by columns (a unique key such as
+    (score, id)), starting after the row the cursor points at.
+
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    Raises InvalidCursor for a cursor that was not produced here.
+    """
+    if cursor:
+        query = query.filter(after_key(columns, decode_cursor(cursor, columns), descending))
+    order = [column.desc() if descending else column.asc() for column in columns]
+    rows = query.order_by(*order).limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(getattr(last, column.key) for column in columns)
+
+
+def iterate_keyset(query, columns, batch_size, descending=True):
+    """Yields every row of query in key order, fetching batch_size rows per query."""
+    cursor = None
+    while True:
+        rows, cursor = keyset_page(query, columns, batch_size, cursor, descending)
+        yield from rows
+        if cursor is None:
+            return
@@ -0,0 +1,278 @@
+import logging
+import os
+import signal
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+logger = logging.getLogger(__name__)
+
+
+class ExtractionTimeout(Exception):
+    pass
+
+
+def _open_binary(source):
+    # Backends take a path or an already open binary buffer (e.g. an mmap)
+    if isinstance(source, (str, os.PathLike)):
+        return open(source, 'rb')
+    source.seek(0)
+    return nullcontext(source)
+
+
+def _read_bytes(source):
+    with _open_binary(source) as f:
+        return f.read()
+
+
+class PdfBackend:
+    """
+    One way of pulling text out of a PDF. pages() yields the text of each page
+    in order, at most max_pages of them, so callers can stop early.
+    """
+    name = None
+    module = None
+
+    def available(self):
+        try:
+            __import__(self.module)
+            return True
+        except ImportError:
+            return False
+
+    def pages(self, source, max_pages):
+        raise NotImplementedError
+
+
+class PyMuPDFBackend(PdfBackend):
+    name = 'pymupdf'
+    module = 'pymupdf'
+
+    def pages(self, source, max_pages):
+        import pymupdf
+        if isinstance(source, (str, os.PathLike)):
+            doc = pymupdf.open(source)
+        else:
+            doc = pymupdf.open(stream=_read_bytes(source), filetype='pdf')
+        with doc:
+            for index in range(min(doc.page_count, max_pages)):
+                yield doc[index].get_text()
+
+
+class PdfiumBackend(PdfBackend):
+    name = 'pypdfium2'
+    module = 'pypdfium2'
+
+    def pages(self, source, max_pages):
+        import pypdfium2
+        doc = pypdfium2.PdfDocument(source if isinstance(source, (str, os.PathLike)) else _read_bytes(source))
+        try:
+            for index in range(min(len(doc), max_pages)):
+                page = doc[index]
+                textpage = page.get_textpage()
+                try:
+                    yield textpage.get_text_range().replace('\r\n', '\n')
+                finally:
+                    textpage.close()
+                    page.close()
+        finally:
+            doc.close()
+
+
+class PyPDF2Backend(PdfBackend):
+    name = 'pypdf2'
+    module = 'PyPDF2'
+
+    def pages(self, source, max_pages):
+        import PyPDF2
+        with _open_binary(source) as file:
+            try:
+                # For PyPDF2 3.x
+                reader = PyPDF2.PdfReader(file)
+                pages = reader.pages
+                count = len(pages)
+                get_text = lambda index: pages[index].extract_text()
+            except AttributeError:
+                # Old PyPDF2 versions
+                file.seek(0)
+                reader = PyPDF2.PdfFileReader(file)
+                count = reader.getNumPages()
+                get_text = lambda index: reader.getPage(index).extractText()
+            for index in range(min(count, max_pages)):
+                yield get_text(index)
+
+
+class PdfplumberBackend(PdfBackend):
+    name = 'pdfplumber'
+    module = 'pdfplumber'
+
+    def pages(self, source, max_pages):
+        import pdfplumber
+        with _open_binary(source) as file:
+            # Only the first max_pages pages are parsed at all
+            with pdfplumber.open(file, pages=range(1, max_pages + 1)) as pdf:
+                for page in pdf.pages:
+                    text = page.extract_text()
+                    # Free the page's parsed layout before the next one, so
+                    # only one page is held in memory at a time
+                    page.flush_cache()
+                    yield text
+
+
+BACKENDS = {backend.name: backend for backend in (
+    PyMuPDFBackend(),
+    PdfiumBackend(),
+    PyPDF2Backend(),
+    PdfplumberBackend(),
+)}
+
+# Fastest first; the first installed backend that yields text wins
+DEFAULT_BACKEND_ORDER = 'pymupdf,pypdfium2,pdfplumber,pypdf2'
+
+
+@contextmanager
+def cpu_deadline(seconds):
+    """
+    Raises ExtractionTimeout in the calling code once it has used more than
+    `seconds` of CPU time. Uses a SIGPROF timer when running on the main thread
+    (pool processes, CLI tools); other threads get a cooperative check from
+    check_deadline() between pages.
+    """
+    state = {'deadline': time.thread_time() + seconds if seconds else None}
+    use_signal = (
+        seconds and hasattr(signal, 'setitimer')
+        and threading.current_thread() is threading.main_thread()
+    )
+    if not use_signal:
+        yield state
+        return
+
+    def on_timeout(signum, frame):
+        raise ExtractionTimeout(f'PDF extraction exceeded {seconds}s of CPU time')
+
+    previous = signal.signal(signal.SIGPROF, on_timeout)
+    signal.setitimer(signal.ITIMER_PROF, seconds)
+    try:
+        yield state
+    finally:
+        signal.setitimer(signal.ITIMER_PROF, 0)
+        signal.signal(signal.SIGPROF, previous)
+
+
+def check_deadline(state, seconds):
+    if state['deadline'] is not None and time.thread_time() > state['deadline']:
+        raise ExtractionTimeout(f'PDF extraction exceeded {seconds}s of CPU time')
+
+
+class PdfExtractionEngine:
+    """
+    Extracts resume text with the fastest available backend, stopping after
+    max_pages pages or max_chars characters and giving up on a document after
+    timeout seconds of CPU time. Per-backend call counts and timings are
+    kept for the stats endpoint.
+
+    Settings come from the environment (PDF_BACKENDS, PDF_MAX_PAGES,
+    PDF_MAX_CHARS, PDF_TIMEOUT) because extraction also runs in pool
+    processes without an application context.
+    """
+
+    def __init__(self, backend_order=DEFAULT_BACKEND_ORDER, max_pages=5, max_chars=50000, timeout=10.0):
+        self.backend_order = [name.strip() for name in backend_order.split(',') if name.strip()]
+        self.max_pages = max_pages
+        self.max_chars = max_chars
+        self.timeout = timeout
+        self._backends = None
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            backend_order=os.environ.get('PDF_BACKENDS', DEFAULT_BACKEND_ORDER),
+            max_pages=int(os.environ.get('PDF_MAX_PAGES', '5')),
+            max_chars=int(os.environ.get('PDF_MAX_CHARS', '50000')),
+            timeout=float(os.environ.get('PDF_TIMEOUT', '10'))
+        )
+
+    @property
+    def backends(self):
+        if self._backends is None:
+            self._backends = [
+                BACKENDS[name] for name in self.backend_order
+                if name in BACKENDS and BACKENDS[name].available()
+            ]
+        return self._backends
+
+    def _record(self, backend, seconds, pages, outcome):
+        with self._lock:
+            stats = self._stats.setdefault(backend.name, {
+                'calls': 0, 'pages': 0, 'seconds': 0.0, 'failures': 0, 'timeouts': 0
+            })
+            stats['calls'] += 1
+            stats['pages'] += pages
+            stats['seconds'] += seconds
+            if outcome == 'failure':
+                stats['failures'] += 1
+            elif outcome == 'timeout':
+                stats['timeouts'] += 1
+
+    def extract_with(self, backend, source):
+        """Runs one backend under the page, character and CPU limits."""
+        parts = []
+        chars = 0
+        pages = 0
+        started = time.perf_counter()
+        outcome = 'success'
+        try:
+            with cpu_deadline(self.timeout) as state:
+                for page_text in backend.pages(source, self.max_pages):
+                    pages += 1
+                    if page_text:
+                        parts.append(page_text)
+                        chars += len(page_text) + 1
+                    if chars >= self.max_chars:
+                        break
+                    check_deadline(state, self.timeout)
+        except ExtractionTimeout:
+            outcome = 'timeout'
+            raise
+        except Exception:
+            outcome = 'failure'
+            raise
+        finally:
+            self._record(backend, time.perf_counter() - started, pages, outcome)
+        return '\n'.join(parts)[:self.max_chars]
+
+    def extract(self, source):
+        """
+        Returns the text of a PDF (path or binary buffer), trying backends in
+        order until one produces text. A timeout is not retried with slower
+        backends.
+        """
+        for backend in self.backends:
+            try:
+                text = self.extract_with(backend, source)
+            except ExtractionTimeout:
+                raise
+            except Exception as e:
+                logger.warning(f"PDF backend {backend.name} failed: {str(e)}")
+                continue
+            if text.strip():
+                return text
+        return ''
+
+    def stats(self):
+        with self._lock:
+            return {
+                'backends': [backend.name for backend in self.backends],
+                'max_pages': self.max_pages,
+                'max_chars': self.max_chars,
+                'timeout': self.timeout,
+                'timings': {
+                    name: dict(stats, seconds=round(stats['seconds'], 6), avg_seconds=round(stats['seconds'] / stats['calls'], 6))
+                    for name, stats in self._stats.items()
+                }
+            }
+
+
+pdf_engine = PdfExtractionEngine.from_env()
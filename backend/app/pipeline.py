@@ -0,0 +1,596 @@
+import hashlib
+import logging
+import mmap
+import os
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from flask import current_app
+from sqlalchemy import Float, Integer, column, update, values
+from sqlalchemy.exc import IntegrityError
+from .models import db, Job, Candidate
+from .extractors import (
+    extract_text_from_pdf,
+    extract_text_from_docx,
+    field_extractor,
+    clean_text
+)
+from .feature_store import decode_term_counts, feature_store, file_hash, resume_features
+from .scoring import fit_and_score, model_cache, term_frequencies
+from .scorers import get_scorer
+from .leaderboard import candidate_row, leaderboard
+from .metrics import metrics
+from .sandbox import ExtractionContext, limit_process, task_limits
+from .search import search_indexes
+
+logger = logging.getLogger(__name__)
+
+_extraction_pool = None
+_extraction_pool_lock = threading.Lock()
+
+
+class MappedFile(mmap.mmap):
+    # A read-only mmap that passes for a binary file (zipfile, used for DOCX,
+    # checks seekable())
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+
+def analyze_resume(file_path):
+    """
+    Extracts and cleans the text of a saved resume and pulls out the
+    candidate's contact details. Every step falls back to an empty value so a
+    bad document never stops the upload.
+
+    The file is memory-mapped and parsed straight from that buffer, so its
+    bytes are never copied into the worker's heap.
+
+    Needs no application context, so it can run on the extraction pool.
+    """
+    resume_text = ""
+    try:
+        with metrics.stage('extract'), open(file_path, 'rb') as f, \
+                MappedFile(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            if file_path.lower().endswith('.pdf'):
+                resume_text = extract_text_from_pdf(buffer)
+            else:
+                resume_text = extract_text_from_docx(buffer)
+
+        # Log the first 100 characters of extracted text for debugging
+        logger.info("Extracted text preview: {}".format(resume_text[:100].replace('\n', ' ') + "..."))
+    except Exception as e:
+        logger.error(f"Text extraction error but continuing: {str(e)}")
+        resume_text = "Error extracting text from document. Processing with minimal information."
+
+    try:
+        with metrics.stage('clean'):
+            tokens = clean_text(resume_text)
+    except Exception as e:
+        logger.error(f"Text cleaning error but continuing: {str(e)}")
+        tokens = ''
+
+    try:
+        fields = field_extractor.extract(resume_text)
+    except Exception as e:
+        logger.error(f"Field extraction error but continuing: {str(e)}")
+        fields = dict.fromkeys(('name', 'email', 'mobile', 'city', 'highest_qualification'), '')
+
+    return {
+        'text': resume_text,
+        'tokens': tokens,
+        **fields
+    }
+
+
+def analyze_resume_timed(file_path):
+    """
+    analyze_resume returning (analysis, its resume_features, [(stage,
+    seconds), ...]), for the extraction pool: the caller stores the analysis
+    with the precomputed features and records stage timings measured in a
+    pool process with metrics.record_stages. Runs under the pool's per-task
+    CPU limit.
+    """
+    metrics.collect()
+    try:
+        with task_limits():
+            analysis = analyze_resume(file_path)
+            with metrics.stage('features'):
+                features = resume_features(analysis)
+    finally:
+        timings = metrics.stop_collecting()
+    return analysis, features, timings
+
+
+def analyze_cached(file_path, content_hash=None):
+    """
+    Returns (analysis, content_hash) for a saved resume, parsing the file only
+    if no identical file was analyzed before.
+    """
+    content_hash = content_hash or file_hash(file_path)
+    with metrics.stage('feature_store'):
+        analysis = feature_store.get(content_hash)
+    if analysis is None:
+        if current_app.config['EXTRACTION_OFFLOAD']:
+            # Parsing is CPU-bound; on the process pool it leaves the threads
+            # (or greenlets) of this process free to serve requests
+            pool = get_extraction_pool(current_app.config)
+            try:
+                analysis, features, timings = pool.submit(analyze_resume_timed, file_path).result()
+            except BrokenProcessPool:
+                discard_extraction_pool(pool)
+                raise RuntimeError('Resume extraction process died (memory or CPU limit exceeded)')
+            metrics.record_stages(timings)
+        else:
+            analysis = analyze_resume(file_path)
+            with metrics.stage('features'):
+                features = resume_features(analysis)
+        with metrics.stage('feature_store'):
+            feature_store.put(content_hash, analysis, features)
+    return analysis, content_hash
+
+
+def score_analysis(job, analysis):
+    """
+    Adds an analyzed resume to the job's scoring model and returns its score
+    from the job's scoring engine. The model (and the job description vector)
+    is shared by every upload to the job instead of being refitted per resume.
+    """
+    try:
+        with metrics.stage('score'):
+            tf = term_frequencies(analysis.get('tokens', ''))
+            model = model_cache.add_document(job, tf, analysis.get('content_hash'))
+            return get_scorer(job.scoring_engine).score(job, model, analysis, tf)
+    except Exception as e:
+        logger.error(f"Score calculation error but continuing: {str(e)}")
+        return 1.0  # Default minimal score
+
+
+def resume_corpus(job):
+    """
+    Yields (content hash, term counts) of every resume already stored for a
+    job; used to fit a job's scoring model when no persisted model exists.
+    """
+    _, content_hashes = candidate_hashes(job.id)
+    for content_hash, (term_ids, counts) in zip(content_hashes, stored_features(content_hashes)):
+        yield content_hash, decode_term_counts(term_ids, counts)
+
+
+def candidate_hashes(job_id):
+    """
+    Returns (candidate ids, content hashes) of every candidate of a job.
+    Candidates stored before the feature store existed have their resume file
+    analyzed once and linked to it.
+    """
+    rows = db.session.query(Candidate.id, Candidate.content_hash, Candidate.resume_path).filter(
+        Candidate.job_id == job_id
+    ).all()
+
+    linked = []
+    upload_folder = current_app.config['UPLOAD_FOLDER']
+    for index, (candidate_id, content_hash, resume_path) in enumerate(rows):
+        file_path = os.path.join(upload_folder, resume_path or '')
+        if content_hash is None and resume_path and os.path.exists(file_path):
+            _, content_hash = analyze_cached(file_path)
+            linked.append({'id': candidate_id, 'content_hash': content_hash})
+            rows[index] = (candidate_id, content_hash, resume_path)
+    if linked:
+        db.session.execute(update(Candidate), linked)
+        db.session.commit()
+    return [row[0] for row in rows], [row[1] for row in rows]
+
+
+def stored_features(content_hashes, load=None):
+    """
+    Stored (ids, counts) blobs aligned with content_hashes, empty where nothing
+    is stored. load picks other stored counts (a Scorer.stored_features);
+    plain term counts by default.
+    """
+    stored = (load or feature_store.get_term_counts)(h for h in content_hashes if h)
+    empty = (b'', b'')
+    return [stored.get(h, empty) for h in content_hashes]
+
+
+def update_scores(scores, chunk_size=10000):
+    """
+    Writes {candidate id: score} back to the database. On PostgreSQL each chunk
+    is a single UPDATE ... FROM (VALUES ...) statement; other databases get an
+    executemany of the same UPDATE.
+    """
+    rows = [{'id': candidate_id, 'score': score} for candidate_id, score in scores.items()]
+    postgres = db.engine.dialect.name == 'postgresql'
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start:start + chunk_size]
+        if postgres:
+            new_scores = values(
+                column('id', Integer), column('score', Float), name='new_scores'
+            ).data([(row['id'], row['score']) for row in chunk])
+            db.session.execute(
+                update(Candidate)
+                .where(Candidate.id == new_scores.c.id)
+                .values(score=new_scores.c.score)
+            )
+        else:
+            db.session.execute(update(Candidate), chunk)
+    db.session.commit()
+
+
+def rescore_job(job):
+    """
+    Re-ranks every candidate of a job against its current description with
+    the job's scoring engine. The job's scoring model is refitted over the
+    stored term counts and all scores are computed in one vectorized pass,
+    then written back in bulk.
+
+    Returns the number of candidates rescored.
+    """
+    scorer = get_scorer(job.scoring_engine)
+    candidate_ids, content_hashes = candidate_hashes(job.id)
+    model, scores = fit_and_score(job.id, job.description, stored_features(content_hashes), content_hashes)
+    model_cache.replace(model)
+    if not scorer.scores_from_fit:
+        scores = scorer.score_all(job, model, stored_features(content_hashes, scorer.stored_features))
+    update_scores({candidate_id: float(score) for candidate_id, score in zip(candidate_ids, scores)})
+    leaderboard.invalidate(job.id)
+    return len(candidate_ids)
+
+
+def find_duplicates(content_hash, exclude_candidate_id=None):
+    """
+    Candidates in any job whose resume is the same file (exact) or whose
+    cleaned text is a near-duplicate of it by MinHash similarity of at least
+    DUPLICATE_THRESHOLD. Returns dicts, most similar first.
+    """
+    if not content_hash:
+        return []
+    similar = dict(feature_store.similar(content_hash, current_app.config['DUPLICATE_THRESHOLD']))
+    similar[content_hash] = 1.0
+
+    query = db.session.query(
+        Candidate.candidate_id, Candidate.name, Candidate.email, Candidate.score,
+        Candidate.job_id, Job.title.label('job_title'), Candidate.content_hash
+    ).outerjoin(Job, Job.id == Candidate.job_id).filter(Candidate.content_hash.in_(list(similar)))
+    if exclude_candidate_id:
+        query = query.filter(Candidate.candidate_id != exclude_candidate_id)
+
+    duplicates = []
+    for row in query:
+        duplicate = row._asdict()
+        duplicate['exact'] = duplicate.pop('content_hash') == content_hash
+        duplicate['similarity'] = round(similar[row.content_hash], 3)
+        duplicates.append(duplicate)
+    duplicates.sort(key=lambda d: (-d['similarity'], d['job_id'], d['candidate_id']))
+    return duplicates
+
+
+class RecyclingProcessPool:
+    """
+    A ProcessPoolExecutor whose processes are replaced once they handled
+    max_tasks_per_child tasks on average: new work then goes to a fresh
+    executor while the old one finishes what it was given and exits. Memory
+    fragmented or leaked by the parsers is returned to the system this way.
+    (ProcessPoolExecutor's own max_tasks_per_child can deadlock on Python
+    3.11 once more tasks are queued than there are processes.)
+    """
+
+    def __init__(self, workers, max_tasks_per_child=None, initializer=None, initargs=()):
+        self.workers = workers
+        self.max_tasks_per_child = max_tasks_per_child
+        self.initializer = initializer
+        self.initargs = initargs
+        self._lock = threading.Lock()
+        self._executor = self._start()
+        self._submitted = 0
+
+    def _start(self):
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=ExtractionContext(),
+            initializer=self.initializer,
+            initargs=self.initargs
+        )
+
+    def submit(self, fn, *args, **kwargs):
+        with self._lock:
+            if self.max_tasks_per_child and self._submitted >= self.workers * self.max_tasks_per_child:
+                self._executor.shutdown(wait=False)
+                self._executor = self._start()
+                self._submitted = 0
+            self._submitted += 1
+            return self._executor.submit(fn, *args, **kwargs)
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        with self._lock:
+            self._executor.shutdown(wait=wait, cancel_futures=cancel_futures)
+
+
+def get_extraction_pool(config):
+    """
+    Returns the shared process pool used for bulk extraction. Text extraction
+    is CPU-bound pure Python, so processes rather than threads are needed to
+    use more than one core. Workers are spawned rather than forked because the
+    app process already runs threads (the task workers).
+
+    Parsing untrusted documents is confined to these processes: each one is
+    capped at EXTRACTION_MEMORY_LIMIT of address space and
+    EXTRACTION_CPU_LIMIT seconds of CPU per resume, and the processes are
+    replaced every EXTRACTION_MAX_TASKS_PER_CHILD resumes each, so the
+    pool's footprint stays predictable.
+    """
+    global _extraction_pool
+    with _extraction_pool_lock:
+        if _extraction_pool is None:
+            workers = config['EXTRACTION_PROCESSES'] or os.cpu_count()
+            max_tasks = config['EXTRACTION_MAX_TASKS_PER_CHILD'] or None
+            _extraction_pool = RecyclingProcessPool(
+                workers, max_tasks,
+                initializer=limit_process,
+                # One process may get every task of its generation
+                initargs=(config['EXTRACTION_MEMORY_LIMIT'] * 1024 * 1024, config['EXTRACTION_CPU_LIMIT'],
+                          max_tasks and workers * max_tasks)
+            )
+        return _extraction_pool
+
+
+def discard_extraction_pool(pool):
+    """
+    Drops a pool one of whose processes was killed (by the kernel, past its
+    CPU or memory limit), so the next call to get_extraction_pool starts a
+    working one. Tasks still running on it fail.
+    """
+    global _extraction_pool
+    with _extraction_pool_lock:
+        if _extraction_pool is pool:
+            _extraction_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def resolve_fields(analysis, original_filename, form=None):
+    """
+    Merges extracted details with the values typed in by the recruiter (form),
+    which are used when extraction found nothing, and fills in a name and a
+    placeholder email when the resume has neither.
+    """
+    form = form or {}
+    name = analysis.get('name') or form.get('name', '')
+    email = analysis.get('email') or form.get('email', '')
+    mobile = analysis.get('mobile') or form.get('mobile', '')
+    city = analysis.get('city') or form.get('city', '')
+
+    # Log extracted information for debugging
+    logger.info(f"Extracted info - Name: '{name}', Email: '{email}', Mobile: '{mobile}', City: '{city}'")
+
+    # Generate a name from the filename if no name was found
+    if not name:
+        clean_filename = original_filename.replace('.pdf', '').replace('.docx', '')
+        name = clean_filename.replace('_', ' ').title()
+
+    # Generate placeholder email if needed, from the file's hash when known so
+    # re-uploads of one resume match while namesakes stay separate candidates
+    if not email and not mobile:
+        if analysis.get('content_hash'):
+            email = f"candidate_{analysis['content_hash'][:16]}@placeholder.com"
+        else:
+            name_hash = hashlib.md5(name.encode()).hexdigest()[:8]
+            email = f"candidate_{name_hash}@placeholder.com"
+
+    return {
+        'name': name,
+        'email': email,
+        'mobile': mobile,
+        'city': city,
+        'highest_qualification': analysis.get('highest_qualification', '')
+    }
+
+
+def save_candidate(job_id, analysis, filename, original_filename, form=None):
+    """
+    Creates or updates the candidate for an analyzed resume.
+
+    Returns a (response payload, created) tuple.
+    """
+    try:
+        return _save_candidate(job_id, analysis, filename, original_filename, form)
+    except IntegrityError:
+        # Another worker created the same candidate first; update it instead
+        db.session.rollback()
+        return _save_candidate(job_id, analysis, filename, original_filename, form)
+
+
+def lock_job(job_id):
+    """
+    Share-locks a job's row for the current transaction before candidates
+    are added to it. Raises ValueError if the job is being deleted: a delete
+    that started first is seen here, and one starting later waits for this
+    transaction to end before it flags the job (see cleanup.delete_job_rows).
+    """
+    job = db.session.query(Job.id).filter(Job.id == job_id, Job.deleting.is_(False)) \
+        .with_for_update(read=True).first()
+    if job is None:
+        raise ValueError(f'Job {job_id} is being deleted')
+
+
+def _save_candidate(job_id, analysis, filename, original_filename, form):
+    extracted_info = resolve_fields(analysis, original_filename, form)
+    name = extracted_info['name']
+    email = extracted_info['email']
+    mobile = extracted_info['mobile']
+    city = extracted_info['city']
+    qualification = extracted_info['highest_qualification']
+    score = analysis.get('score', 0.0)
+
+    # Check for existing candidate - but don't let this stop us
+    try:
+        existing = None
+        with metrics.stage('db_lookup'):
+            if email:
+                existing = Candidate.query.filter(
+                    Candidate.email == email,
+                    Candidate.job_id == job_id
+                ).first()
+
+            if not existing and mobile:
+                existing = Candidate.query.filter(
+                    Candidate.mobile == mobile,
+                    Candidate.job_id == job_id
+                ).first()
+
+        if existing:
+            logger.info(f"Found existing candidate with ID {existing.id}, updating")
+
+            existing.name = name
+            existing.mobile = mobile or existing.mobile
+            existing.email = email or existing.email
+            existing.city = city
+            existing.highest_qualification = qualification
+            existing.resume_path = filename
+            existing.content_hash = analysis.get('content_hash')
+            existing.score = score
+            row = candidate_row(existing)
+            with metrics.stage('commit'):
+                db.session.commit()
+            leaderboard.put(row)
+            search_indexes.update(job_id, row['id'], analysis.get('content_hash'))
+
+            return {
+                'message': 'Candidate updated',
+                'candidate_id': existing.candidate_id,
+                'score': score,
+                'extracted_info': extracted_info
+            }, False
+    except Exception as e:
+        logger.error(f"Error checking for existing candidate: {str(e)}")
+        db.session.rollback()
+        # Continue with new candidate creation
+
+    candidate_id = str(uuid.uuid4())
+    candidate = Candidate(
+        candidate_id=candidate_id,
+        name=name,
+        email=email,
+        mobile=mobile,
+        city=city,
+        highest_qualification=qualification,
+        resume_path=filename,
+        content_hash=analysis.get('content_hash'),
+        score=score,
+        job_id=job_id
+    )
+
+    with metrics.stage('commit'):
+        lock_job(job_id)
+        db.session.add(candidate)
+        db.session.flush()
+        row = candidate_row(candidate)
+        db.session.commit()
+    leaderboard.put(row)
+    search_indexes.update(job_id, row['id'], analysis.get('content_hash'))
+
+    return {
+        'message': 'Resume uploaded successfully',
+        'candidate_id': candidate_id,
+        'score': score,
+        'extracted_info': extracted_info
+    }, True
+
+
+def _load_existing(job_id):
+    by_email = {}
+    by_mobile = {}
+    with metrics.stage('db_lookup'):
+        for candidate in Candidate.query.filter_by(job_id=job_id):
+            if candidate.email:
+                by_email[candidate.email] = candidate
+            if candidate.mobile:
+                by_mobile[candidate.mobile] = candidate
+    return by_email, by_mobile
+
+
+def save_candidates_bulk(job_id, items, batch_size=200):
+    """
+    Creates or updates the candidates for many analyzed resumes of one job.
+    Existing candidates are loaded once instead of looked up per resume, and
+    rows are committed in batches of batch_size.
+
+    items is a list of (analysis, filename, original_filename) tuples; returns
+    one outcome dict per item, in the same order.
+    """
+    by_email, by_mobile = _load_existing(job_id)
+    outcomes = []
+    batch = []
+    replaced = []
+
+    def commit_batch():
+        nonlocal by_email, by_mobile
+        try:
+            with metrics.stage('commit'):
+                lock_job(job_id)
+                db.session.commit()
+            leaderboard.invalidate(job_id)
+            for candidate_id, content_hash in replaced:
+                search_indexes.update(job_id, candidate_id, content_hash)
+        except Exception as e:
+            logger.error(f"Bulk candidate commit failed: {str(e)}")
+            db.session.rollback()
+            for outcome in batch:
+                outcome.update({'status': 'failed', 'candidate_id': None, 'error': str(e)})
+            # Pending rows were discarded, so reload what actually exists
+            by_email, by_mobile = _load_existing(job_id)
+        batch.clear()
+        replaced.clear()
+
+    for analysis, filename, original_filename in items:
+        info = resolve_fields(analysis, original_filename)
+        score = analysis.get('score', 0.0)
+
+        existing = by_email.get(info['email']) if info['email'] else None
+        if existing is None and info['mobile']:
+            existing = by_mobile.get(info['mobile'])
+
+        if existing is not None:
+            existing.name = info['name']
+            existing.mobile = info['mobile'] or existing.mobile
+            existing.email = info['email'] or existing.email
+            existing.city = info['city']
+            existing.highest_qualification = info['highest_qualification']
+            existing.resume_path = filename
+            existing.content_hash = analysis.get('content_hash')
+            existing.score = score
+            candidate, status = existing, 'updated'
+            replaced.append((existing.id, analysis.get('content_hash')))
+        else:
+            candidate = Candidate(
+                candidate_id=str(uuid.uuid4()),
+                job_id=job_id,
+                resume_path=filename,
+                content_hash=analysis.get('content_hash'),
+                score=score,
+                **info
+            )
+            db.session.add(candidate)
+            status = 'created'
+
+        # Later duplicates within the same upload update this candidate
+        if candidate.email:
+            by_email[candidate.email] = candidate
+        if candidate.mobile:
+            by_mobile[candidate.mobile] = candidate
+
+        outcome = {
+            'filename': original_filename,
+            'status': status,
+            'candidate_id': candidate.candidate_id,
+            'score': score,
+            'extracted_info': info
+        }
+        outcomes.append(outcome)
+        batch.append(outcome)
+        if len(batch) >= batch_size:
+            commit_batch()
+
+    if batch:
+        commit_batch()
+    return outcomes
@@ -0,0 +1,155 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError
+from sqlalchemy.pool import QueuePool
+
+# Upper bounds (seconds) of the checkout wait histogram
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+
+
+class PoolMetrics:
+    """
+    Connection pool counters for this process: checkouts, how long each one
+    waited for a free connection, timeouts, and connections opened or
+    invalidated (e.g. by a failed pre-ping). Served by GET /api/db/pool.
+    """
+
+    def __init__(self):
+        self.pool = None
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.checkouts = 0
+            self.checkins = 0
+            self.connects = 0
+            self.invalidations = 0
+            self.timeouts = 0
+            self.wait_seconds = 0.0
+            self.max_wait_seconds = 0.0
+            self.wait_counts = [0] * (len(WAIT_BUCKETS) + 1)
+
+    def record_wait(self, seconds, timed_out=False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+                return
+            self.checkouts += 1
+            self.wait_seconds += seconds
+            self.max_wait_seconds = max(self.max_wait_seconds, seconds)
+            self.wait_counts[bisect_left(WAIT_BUCKETS, seconds)] += 1
+
+    def watch(self, engine):
+        """Counts connection lifecycle events of an engine's pool."""
+        self.pool = engine.pool
+
+        @event.listens_for(engine, 'connect')
+        def on_connect(dbapi_connection, connection_record):
+            with self._lock:
+                self.connects += 1
+
+        @event.listens_for(engine, 'checkin')
+        def on_checkin(dbapi_connection, connection_record):
+            with self._lock:
+                self.checkins += 1
+
+        @event.listens_for(engine, 'invalidate')
+        def on_invalidate(dbapi_connection, connection_record, exception):
+            with self._lock:
+                self.invalidations += 1
+
+    def exposition(self):
+        """The pool statistics as Prometheus text exposition lines, for GET /metrics."""
+        stats = self.to_dict()
+        lines = []
+        for key in ('checkouts', 'connects', 'invalidations', 'timeouts'):
+            lines += [f'# TYPE db_pool_{key}_total counter', f'db_pool_{key}_total {stats[key]}']
+        for key in ('pool_size', 'checked_out', 'idle', 'overflow'):
+            if key in stats:
+                lines += [f'# TYPE db_pool_{key} gauge', f'db_pool_{key} {stats[key]}']
+        lines.append('# TYPE db_pool_wait_seconds histogram')
+        cumulative = 0
+        for bucket in stats['wait_histogram']:
+            cumulative += bucket['count']
+            bound = '+Inf' if bucket['le'] == 'inf' else bucket['le']
+            lines.append(f'db_pool_wait_seconds_bucket{{le="{bound}"}} {cumulative}')
+        lines += [f'db_pool_wait_seconds_sum {stats["wait_seconds_total"]}', f'db_pool_wait_seconds_count {cumulative}']
+        return lines
+
+    def to_dict(self):
+        with self._lock:
+            buckets = [{'le': bound, 'count': count} for bound, count in zip(WAIT_BUCKETS + ('inf',), self.wait_counts)]
+            stats = {
+                'checkouts': self.checkouts,
+                'checkins': self.checkins,
+                'connects': self.connects,
+                'invalidations': self.invalidations,
+                'timeouts': self.timeouts,
+                'wait_seconds_total': round(self.wait_seconds, 6),
+                'wait_seconds_avg': round(self.wait_seconds / self.checkouts, 6) if self.checkouts else None,
+                'wait_seconds_max': round(self.max_wait_seconds, 6),
+                'wait_histogram': buckets
+            }
+        pool = self.pool
+        if isinstance(pool, QueuePool):
+            stats.update({
+                'pool_size': pool.size(),
+                'checked_out': pool.checkedout(),
+                'idle': pool.checkedin(),
+                'overflow': pool.overflow()
+            })
+        stats['pool'] = type(pool).__name__ if pool is not None else None
+        return stats
+
+
+pool_metrics = PoolMetrics()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that reports how long each checkout waited for a connection."""
+
+    _local = threading.local()
+
+    def _do_get(self):
+        # QueuePool._do_get retries by calling itself; time the outermost call only
+        if getattr(self._local, 'timing', False):
+            return super()._do_get()
+        self._local.timing = True
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except TimeoutError:
+            pool_metrics.record_wait(time.perf_counter() - started, timed_out=True)
+            raise
+        finally:
+            self._local.timing = False
+        pool_metrics.record_wait(time.perf_counter() - started)
+        return connection
+
+
+def engine_options(database_url):
+    """
+    SQLALCHEMY_ENGINE_OPTIONS from the DB_POOL_* environment variables.
+    Connections are pinged before use (DB_POOL_PRE_PING) and replaced after
+    DB_POOL_RECYCLE seconds, so idle periods do not surface as stale
+    connection errors. In-memory SQLite keeps Flask-SQLAlchemy's static pool.
+    """
+    options = {
+        'pool_pre_ping': os.environ.get('DB_POOL_PRE_PING', '1') == '1',
+    }
+    url = make_url(database_url)
+    if url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:'):
+        return options
+    options.update({
+        'poolclass': InstrumentedQueuePool,
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', '5')),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', '10')),
+        'pool_timeout': float(os.environ.get('DB_POOL_TIMEOUT', '30')),
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', '1800')),
+    })
+    return options
@@ -0,0 +1,121 @@
+import importlib.util
+import logging
+import os
+import tempfile
+import threading
+from concurrent.futures.process import BrokenProcessPool
+from flask import current_app
+from .sandbox import task_limits
+
+logger = logging.getLogger(__name__)
+
+
+class ResumePreviews:
+    """
+    Previews that let the UI show a resume without transferring the whole
+    file: the start of its extracted text, read from the feature store, and
+    a PNG of the first page of PDFs (rendered with PyMuPDF when installed).
+
+    Images are rendered once per distinct file, keyed by content hash, into
+    PREVIEW_DIR, on the extraction pool: rasterizing an untrusted PDF gets
+    the same memory and CPU limits as parsing it. DOCX resumes only get the
+    text preview.
+    """
+
+    def __init__(self):
+        self.directory = None
+        self.chars = 2000
+        self.width = 600
+        self._renderer = None
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.hits = 0
+            self.renders = 0
+            self.failures = 0
+
+    def init_app(self, app):
+        self.directory = app.config['PREVIEW_DIR']
+        self.chars = app.config['PREVIEW_CHARS']
+        self.width = app.config['PREVIEW_WIDTH']
+
+    @property
+    def renderer(self):
+        """Whether first pages can be rendered (PyMuPDF is installed)."""
+        if self._renderer is None:
+            # Looked up without importing it into the web process
+            self._renderer = importlib.util.find_spec('pymupdf') is not None
+        return self._renderer
+
+    def can_render(self, filename):
+        return self.renderer and filename.lower().endswith('.pdf')
+
+    def text(self, file_path, content_hash=None):
+        """(first PREVIEW_CHARS characters of the resume text, whether there is more)."""
+        from .pipeline import analyze_cached
+
+        analysis, _ = analyze_cached(file_path, content_hash)
+        text = analysis.get('text', '')
+        return text[:self.chars], len(text) > self.chars
+
+    def image(self, file_path, content_hash):
+        """Path of the first page of a PDF as a PNG, rendered on first use; None when it cannot be rendered."""
+        path = os.path.join(self.directory, content_hash[:2], f'{content_hash}-{self.width}.png')
+        if os.path.exists(path):
+            with self._lock:
+                self.hits += 1
+            return path
+        if not self.can_render(file_path):
+            return None
+
+        from .pipeline import discard_extraction_pool, get_extraction_pool
+
+        pool = get_extraction_pool(current_app.config)
+        try:
+            pool.submit(render_first_page, file_path, path, self.width).result()
+        except Exception as e:
+            if isinstance(e, BrokenProcessPool):
+                discard_extraction_pool(pool)
+            logger.error(f"Could not render a preview of {file_path}: {str(e)}")
+            with self._lock:
+                self.failures += 1
+            return None
+        with self._lock:
+            self.renders += 1
+        return path
+
+    def stats(self):
+        with self._lock:
+            return {
+                'renderer': 'pymupdf' if self.renderer else None,
+                'image_hits': self.hits,
+                'image_renders': self.renders,
+                'image_failures': self.failures
+            }
+
+
+def render_first_page(file_path, path, width):
+    """
+    Renders the first page of a PDF, width pixels wide, to the PNG at path.
+    Runs on the extraction pool, under the pool's per-task CPU limit.
+    """
+    import pymupdf
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.png')
+    os.close(fd)
+    try:
+        with task_limits(), pymupdf.open(file_path) as doc:
+            page = doc[0]
+            zoom = width / page.rect.width
+            page.get_pixmap(matrix=pymupdf.Matrix(zoom, zoom)).save(temp_path)
+        # Concurrent renders of one file each write their own temporary file
+        os.replace(temp_path, path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+
+resume_previews = ResumePreviews()
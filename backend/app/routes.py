@@ -1,38 +1,117 @@
-from flask import Blueprint, request, jsonify, current_app, send_from_directory
+from flask import Blueprint, Response, request, jsonify, current_app, send_file, stream_with_context
+from werkzeug.exceptions import HTTPException, RequestEntityTooLarge
 from werkzeug.utils import secure_filename
+import json
 import os
-from .models import db, Job, Candidate
-from .extractors import (
-    extract_text_from_pdf,
-    extract_text_from_docx,
-    extract_email,
-    extract_phone,
-    extract_name,
-    extract_address,
-    extract_highest_qualification,
-    calculate_score
+import time
+import zipfile
+import zlib
+from concurrent.futures.process import BrokenProcessPool
+from .models import db, Job, Candidate, Task, CANDIDATE_FIELDS, CANDIDATE_ORDER
+from .tasks import enqueue_resume, task_to_dict
+from .scoring import model_cache, search_terms, term_frequencies, term_id
+from .feature_store import decode_term_counts, feature_store
+from .docx_engine import docx_engine
+from .pdf_engine import pdf_engine
+from .startup import startup_report
+from .pool import pool_metrics
+from .metrics import metrics
+from .leaderboard import leaderboard, top_resumes_query
+from .search import search_indexes
+from .matching import job_matcher
+from .cleanup import delete_job_rows, upload_reaper
+from .scorers import DEFAULT_SCORER, SCORERS, get_scorer
+from .pagination import InvalidCursor, iterate_keyset, keyset_page, page_size
+from .uploads import copy_with_hash, private_cache, save_upload, send_upload, upload_name, upload_path
+from .previews import resume_previews
+from .pipeline import (
+    analyze_cached, analyze_resume_timed, discard_extraction_pool, find_duplicates, get_extraction_pool, rescore_job,
+    score_analysis, save_candidates_bulk
 )
-from sqlalchemy.exc import SQLAlchemyError
 import uuid
 
-# Try to import scikit-learn, but provide fallbacks if not available
-try:
-    from sklearn.feature_extraction.text import TfidfVectorizer
-    from sklearn.metrics.pairwise import cosine_similarity
-    sklearn_available = True
-except ImportError:
-    print("scikit-learn not available. Using basic scoring methods only.")
-    sklearn_available = False
-
 # Initialize Blueprint
 main = Blueprint('main', __name__)
 
 # Configure allowed file extensions
 ALLOWED_EXTENSIONS = {'pdf', 'docx'}
 
+# Words accepted in one full-text search query
+MAX_SEARCH_TERMS = 32
+
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def _unpack_member(archive, member, file_path, max_member_size):
+    """Unpacks one member to file_path, returning its SHA-256; nothing is left behind on failure."""
+    done = False
+    try:
+        with archive.open(member) as source, open(file_path, 'wb') as target:
+            content_hash = copy_with_hash(source, target, max_member_size)
+        done = True
+        return content_hash
+    finally:
+        if not done and os.path.exists(file_path):
+            os.remove(file_path)
+
+
+def save_zip_members(file, upload_folder, max_files, max_member_size, max_total_size=None):
+    """
+    Unpacks the resumes inside an uploaded ZIP into the upload folder.
+    Returns (saved, skipped, bytes unpacked): saved holds (filename,
+    original_filename, path, content_hash) tuples, skipped holds per-member
+    failure outcomes. Members are hashed while being unpacked and cut off at
+    max_member_size bytes whatever size the archive declares; members that
+    would take the archive past max_total_size bytes are skipped. A corrupt,
+    encrypted or oddly compressed member only fails itself.
+    """
+    saved = []
+    skipped = []
+    total = 0
+    try:
+        with zipfile.ZipFile(file.stream) as archive:
+            for member in archive.infolist():
+                if member.is_dir():
+                    continue
+                original_filename = secure_filename(os.path.basename(member.filename))
+                if not original_filename or not allowed_file(original_filename):
+                    continue
+                error = None
+                if len(saved) >= max_files:
+                    error = f'More than {max_files} resumes in upload'
+                elif member.file_size > max_member_size:
+                    error = 'File too large'
+                elif max_total_size is not None and total + member.file_size > max_total_size:
+                    error = f'ZIP contents exceed {max_total_size} bytes'
+                else:
+                    filename = upload_name(original_filename)
+                    file_path = upload_path(upload_folder, filename)
+                    try:
+                        content_hash = _unpack_member(archive, member, file_path, max_member_size)
+                    except RequestEntityTooLarge:
+                        error = 'File too large'
+                    except (zipfile.BadZipFile, zlib.error, EOFError):
+                        error = 'Corrupt file in ZIP'
+                    except NotImplementedError:
+                        # Before RuntimeError, which it derives from
+                        error = 'Unsupported compression in ZIP'
+                    except RuntimeError:
+                        # zipfile's "File is encrypted, password required"
+                        error = 'Encrypted file in ZIP'
+                    else:
+                        # zipfile never inflates a member past its declared size
+                        total += member.file_size
+                        saved.append((filename, original_filename, file_path, content_hash))
+                if error:
+                    skipped.append({'filename': original_filename, 'status': 'failed', 'error': error})
+    except BaseException:
+        # The archive itself is unreadable (or the disk is full): nothing of it is kept
+        for _, _, file_path, _ in saved:
+            if os.path.exists(file_path):
+                os.remove(file_path)
+        raise
+    return saved, skipped, total
+
 @main.route('/')
 def index():
     return jsonify({
@@ -41,7 +120,11 @@ def index():
         'endpoints': {
             'jobs': '/api/jobs',
             'upload_resume': '/api/jobs/<job_id>/upload-resume',
-            'candidates': '/api/jobs/<job_id>/candidates'
+            'upload_resumes': '/api/jobs/<job_id>/upload-resumes',
+            'candidates': '/api/jobs/<job_id>/candidates',
+            'export_candidates': '/api/jobs/<job_id>/candidates/export',
+            'rescore': '/api/jobs/<job_id>/rescore',
+            'task_status': '/api/tasks/<task_id>'
         }
     })
 
@@ -52,19 +135,26 @@ def create_job():
         if not data or 'title' not in data or 'description' not in data:
             return jsonify({'error': 'Title and description are required'}), 400
         
+        engine = data.get('scoring_engine') or DEFAULT_SCORER
+        if engine not in SCORERS:
+            return jsonify({'error': f"Unknown scoring engine '{engine}'"}), 400
+
         job = Job(
             title=data['title'],
-            description=data['description']
+            description=data['description'],
+            scoring_engine=engine
         )
         
         db.session.add(job)
         db.session.commit()
+        job_matcher.invalidate()
         return jsonify({
             'message': 'Job created successfully',
             'job': {
                 'id': job.id,
                 'title': job.title,
                 'description': job.description,
+                'scoring_engine': job.scoring_engine,
                 'created_at': job.created_at.isoformat()
             }
         }), 201
@@ -75,30 +165,96 @@ def create_job():
 @main.route('/api/jobs', methods=['GET'])
 def get_jobs():
     try:
-        jobs = Job.query.all()
+        query = db.session.query(Job.id, Job.title, Job.description, Job.scoring_engine, Job.created_at)
+        jobs, next_cursor = keyset_page(
+            query, (Job.id,), page_size(request.args.get('limit', type=int)),
+            request.args.get('cursor'), descending=False
+        )
         return jsonify({
             'jobs': [{
                 'id': job.id,
                 'title': job.title,
                 'description': job.description,
+                'scoring_engine': job.scoring_engine,
                 'created_at': job.created_at.isoformat() if job.created_at else None
-            } for job in jobs]
+            } for job in jobs],
+            'next_cursor': next_cursor
         })
+    except InvalidCursor as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': f'Failed to fetch jobs: {str(e)}'}), 500
 
+@main.route('/api/jobs/<int:job_id>', methods=['PUT'])
+def update_job(job_id):
+    try:
+        job = Job.query.get_or_404(job_id)
+        data = request.get_json()
+        if not data or not any(field in data for field in ('title', 'description', 'scoring_engine')):
+            return jsonify({'error': 'Title, description or scoring engine is required'}), 400
+        if 'scoring_engine' in data and data['scoring_engine'] not in SCORERS:
+            return jsonify({'error': f"Unknown scoring engine '{data['scoring_engine']}'"}), 400
+
+        description_changed = 'description' in data and data['description'] != job.description
+        engine_changed = 'scoring_engine' in data and data['scoring_engine'] != job.scoring_engine
+        job.title = data.get('title', job.title)
+        job.description = data.get('description', job.description)
+        job.scoring_engine = data.get('scoring_engine', job.scoring_engine)
+        db.session.commit()
+        leaderboard.set_job_title(job.id, job.title)
+        job_matcher.invalidate()
+
+        # Scores depend on the description and the engine, so re-rank every candidate
+        rescored = rescore_job(job) if description_changed or engine_changed else 0
+
+        return jsonify({
+            'message': 'Job updated successfully',
+            'job': {
+                'id': job.id,
+                'title': job.title,
+                'description': job.description,
+                'scoring_engine': job.scoring_engine,
+                'created_at': job.created_at.isoformat() if job.created_at else None
+            },
+            'rescored_candidates': rescored
+        })
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Failed to update job: {str(e)}'}), 500
+
+@main.route('/api/jobs/<int:job_id>/rescore', methods=['POST'])
+def rescore_candidates(job_id):
+    job = Job.query.get_or_404(job_id)
+    try:
+        started = time.perf_counter()
+        rescored = rescore_job(job)
+        return jsonify({
+            'message': 'Candidates rescored',
+            'job_id': job.id,
+            'rescored_candidates': rescored,
+            'elapsed_seconds': round(time.perf_counter() - started, 3)
+        })
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Failed to rescore candidates: {str(e)}'}), 500
+
 @main.route('/api/jobs/<int:job_id>', methods=['DELETE'])
 def delete_job(job_id):
     try:
         job = Job.query.get_or_404(job_id)
         
-        Candidate.query.filter_by(job_id=job_id).delete()
-        db.session.delete(job)
-        db.session.commit()
+        deleted, filenames = delete_job_rows(job, current_app.config['DELETE_CHUNK_SIZE'])
+        model_cache.discard(job_id)
+        leaderboard.discard_job(job_id)
+        search_indexes.discard(job_id)
+        job_matcher.invalidate()
+        # Resume files are removed in the background
+        upload_reaper.discard(filenames)
         
         return jsonify({
             'message': 'Job deleted successfully',
-            'id': job_id
+            'id': job_id,
+            'candidates_deleted': deleted
         })
     except Exception as e:
         db.session.rollback()
@@ -120,161 +276,23 @@ def upload_resume(job_id):
 
         job = Job.query.get_or_404(job_id)
         original_filename = secure_filename(file.filename)
-        filename = f"{uuid.uuid4().hex}_{original_filename}"
-        file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
-        file.save(file_path)
-
-        # Try to extract text, but don't let extraction failures stop the process
-        resume_text = ""
-        try:
-            if filename.lower().endswith('.pdf'):
-                resume_text = extract_text_from_pdf(file_path)
-            else:
-                resume_text = extract_text_from_docx(file_path)
-
-            # Log the first 100 characters of extracted text for debugging
-            current_app.logger.info("Extracted text preview: {}".format(resume_text[:100].replace('\n', ' ') + "..."))
-        except Exception as e:
-            current_app.logger.error(f"Text extraction error but continuing: {str(e)}")
-            resume_text = "Error extracting text from document. Processing with minimal information."
-
-        # Process information - with fallbacks for each extraction
-        try:
-            score = calculate_score(resume_text, job.description)
-        except Exception as e:
-            current_app.logger.error(f"Score calculation error but continuing: {str(e)}")
-            score = 1.0  # Default minimal score
-            
-        try:
-            name = extract_name(resume_text) or request.form.get('name', '')
-        except Exception:
-            name = request.form.get('name', '')
-            
-        try:
-            email = extract_email(resume_text) or request.form.get('email', '')
-        except Exception:
-            email = request.form.get('email', '')
-            
-        try:
-            mobile = extract_phone(resume_text) or request.form.get('mobile', '')
-        except Exception:
-            mobile = request.form.get('mobile', '')
-            
-        try:
-            city = extract_address(resume_text) or request.form.get('city', '')
-        except Exception:
-            city = request.form.get('city', '')
-            
-        try:
-            qualification = extract_highest_qualification(resume_text)
-        except Exception:
-            qualification = ""
-
-        # Log extracted information for debugging
-        current_app.logger.info(f"Extracted info - Name: '{name}', Email: '{email}', Mobile: '{mobile}', City: '{city}'")
-
-        # Validate required fields - only required if both extracted and form values are empty
-        form_email = request.form.get('email', '')
-        form_mobile = request.form.get('mobile', '')
-        form_name = request.form.get('name', '')
-        
-        # Use provided values if extraction failed
-        if not email and form_email:
-            email = form_email
-        if not mobile and form_mobile:
-            mobile = form_mobile
-        if not name and form_name:
-            name = form_name
-        
-        # Generate a name from the filename if no name was found
-        if not name:
-            clean_filename = original_filename.replace('.pdf', '').replace('.docx', '')
-            name = clean_filename.replace('_', ' ').title()
-        
-        # Generate placeholder email if needed
-        if not email and not mobile:
-            import hashlib
-            name_hash = hashlib.md5(name.encode()).hexdigest()[:8]
-            email = f"candidate_{name_hash}@placeholder.com"
-            
-        # ALWAYS ACCEPT THE RESUME - we've generated placeholders as needed
-
-        # Check for existing candidate - but don't let this stop us
-        try:
-            existing = None
-            if email:
-                existing = Candidate.query.filter(
-                    Candidate.email == email,
-                    Candidate.job_id == job_id
-                ).first()
-            
-            if not existing and mobile:
-                existing = Candidate.query.filter(
-                    Candidate.mobile == mobile,
-                    Candidate.job_id == job_id
-                ).first()
-
-            # Log whether we found an existing candidate
-            if existing:
-                current_app.logger.info(f"Found existing candidate with ID {existing.id}, updating")
-                
-                # Update the existing candidate
-                existing.name = name
-                existing.mobile = mobile or existing.mobile
-                existing.email = email or existing.email
-                existing.city = city
-                existing.highest_qualification = qualification
-                existing.resume_path = filename
-                existing.score = score
-                db.session.commit()
-                
-                return jsonify({
-                    'message': 'Candidate updated',
-                    'candidate_id': existing.candidate_id,
-                    'score': score,
-                    'extracted_info': {
-                        'name': name,
-                        'email': email,
-                        'mobile': mobile,
-                        'city': city,
-                        'highest_qualification': qualification
-                    }
-                })
-
-        except Exception as e:
-            current_app.logger.error(f"Error checking for existing candidate: {str(e)}")
-            # Continue with new candidate creation
-
-        # Create new candidate
-        candidate_id = str(uuid.uuid4())
-        candidate = Candidate(
-            candidate_id=candidate_id,
-            name=name,
-            email=email,
-            mobile=mobile,
-            city=city,
-            highest_qualification=qualification,
-            resume_path=filename,
-            score=score,
-            job_id=job_id
-        )
-        
-        db.session.add(candidate)
-        db.session.commit()
+        filename = upload_name(original_filename)
+        file_path = upload_path(current_app.config['UPLOAD_FOLDER'], filename)
+        content_hash = save_upload(file, file_path)
+
+        # Extraction and scoring happen on the worker pool
+        form = {key: request.form.get(key, '') for key in ('name', 'email', 'mobile', 'city')}
+        task = enqueue_resume(job.id, filename, original_filename, form, content_hash)
 
         return jsonify({
-            'message': 'Resume uploaded successfully',
-            'candidate_id': candidate_id,
-            'score': score,
-            'extracted_info': {
-                'name': name,
-                'email': email,
-                'mobile': mobile,
-                'city': city,
-                'highest_qualification': qualification
-            }
-        })
+            'message': 'Resume queued for processing',
+            'task_id': task.id,
+            'status': task.status,
+            'status_url': f'/api/tasks/{task.id}'
+        }), 202
 
+    except RequestEntityTooLarge:
+        return jsonify({'error': 'File too large'}), 413
     except Exception as e:
         if file_path and os.path.exists(file_path):
             try:
@@ -284,73 +302,387 @@ def upload_resume(job_id):
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+@main.route('/api/jobs/<int:job_id>/upload-resumes', methods=['POST'])
+def upload_resumes(job_id):
+    started = time.perf_counter()
+    saved = []
+    try:
+        job = Job.query.get_or_404(job_id)
+        uploads = request.files.getlist('files') + request.files.getlist('file')
+        if not uploads:
+            return jsonify({'error': 'No files provided'}), 400
+
+        upload_folder = current_app.config['UPLOAD_FOLDER']
+        max_files = current_app.config['BULK_MAX_FILES']
+        # Bytes the ZIPs of this upload may still unpack to
+        unzip_budget = current_app.config['BULK_MAX_EXTRACTED_SIZE']
+        results = []
+        for file in uploads:
+            if not file or file.filename == '':
+                continue
+            original_filename = secure_filename(file.filename)
+            if original_filename.lower().endswith('.zip'):
+                try:
+                    members, skipped, unpacked = save_zip_members(
+                        file, upload_folder, max_files - len(saved),
+                        current_app.config['MAX_FILE_SIZE'], unzip_budget
+                    )
+                    saved.extend(members)
+                    results.extend(skipped)
+                    unzip_budget -= unpacked
+                except zipfile.BadZipFile:
+                    results.append({'filename': file.filename, 'status': 'failed', 'error': 'Invalid ZIP file'})
+            elif not allowed_file(original_filename):
+                results.append({'filename': file.filename, 'status': 'failed', 'error': 'Invalid file type'})
+            elif len(saved) >= max_files:
+                results.append({'filename': file.filename, 'status': 'failed',
+                                'error': f'More than {max_files} resumes in upload'})
+            else:
+                filename = upload_name(original_filename)
+                file_path = upload_path(upload_folder, filename)
+                content_hash = save_upload(file, file_path)
+                saved.append((filename, original_filename, file_path, content_hash))
+
+        # Files seen before come from the feature store; the rest are
+        # extracted across the process pool. Everything is then scored
+        # against the job's model.
+        with metrics.stage('feature_store'):
+            analyses = [(feature_store.get(content_hash), content_hash) for _, _, _, content_hash in saved]
+        pool = get_extraction_pool(current_app.config)
+        futures = {
+            index: pool.submit(analyze_resume_timed, saved[index][2])
+            for index, (analysis, _) in enumerate(analyses) if analysis is None
+        }
+        items = []
+        for index, (filename, original_filename, file_path, _) in enumerate(saved):
+            analysis, content_hash = analyses[index]
+            try:
+                if analysis is None:
+                    analysis, features, timings = futures[index].result()
+                    metrics.record_stages(timings)
+                    with metrics.stage('feature_store'):
+                        feature_store.put(content_hash, analysis, features)
+                analysis['content_hash'] = content_hash
+                analysis['score'] = score_analysis(job, analysis)
+                items.append((analysis, filename, original_filename))
+            except BrokenProcessPool:
+                # A process went past its memory or CPU limit; the resumes
+                # it was handling fail and the next upload gets a new pool
+                discard_extraction_pool(pool)
+                results.append({'filename': original_filename, 'status': 'failed',
+                                'error': 'Resume extraction process died (memory or CPU limit exceeded)'})
+                os.remove(file_path)
+            except Exception as e:
+                results.append({'filename': original_filename, 'status': 'failed', 'error': str(e)})
+                os.remove(file_path)
+
+        outcomes = save_candidates_bulk(job.id, items, current_app.config['BULK_COMMIT_SIZE'])
+        for outcome, (_, filename, _) in zip(outcomes, items):
+            if outcome['status'] == 'failed':
+                os.remove(os.path.join(upload_folder, filename))
+        results = outcomes + results
+
+        elapsed = time.perf_counter() - started
+        summary = {'total': len(results)}
+        for status in ('created', 'updated', 'failed'):
+            summary[status] = sum(1 for r in results if r['status'] == status)
+        return jsonify({
+            'message': 'Bulk upload processed',
+            'summary': summary,
+            'results': results,
+            'elapsed_seconds': round(elapsed, 3),
+            'files_per_second': round(len(saved) / elapsed, 2) if elapsed else None
+        })
+
+    except RequestEntityTooLarge:
+        for _, _, file_path, _ in saved:
+            if os.path.exists(file_path):
+                os.remove(file_path)
+        db.session.rollback()
+        return jsonify({'error': 'Upload too large'}), 413
+    except Exception as e:
+        for _, _, file_path, _ in saved:
+            if os.path.exists(file_path):
+                try:
+                    os.remove(file_path)
+                except:
+                    pass
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@main.route('/api/scoring-engines', methods=['GET'])
+def get_scoring_engines():
+    return jsonify({
+        'engines': [{'name': name, 'description': scorer.description} for name, scorer in SCORERS.items()],
+        'default': get_scorer().name
+    })
+
+@main.route('/api/feature-store/stats', methods=['GET'])
+def get_feature_store_stats():
+    return jsonify({'feature_store': feature_store.stats()})
+
+@main.route('/api/extraction/stats', methods=['GET'])
+def get_extraction_stats():
+    return jsonify({'pdf_engine': pdf_engine.stats(), 'docx_engine': docx_engine.stats()})
+
+@main.route('/api/startup', methods=['GET'])
+def get_startup_report():
+    return jsonify({'startup': startup_report.to_dict()})
+
+@main.route('/api/leaderboard/stats', methods=['GET'])
+def get_leaderboard_stats():
+    return jsonify({'leaderboard': leaderboard.stats()})
+
+@main.route('/api/uploads/reaper', methods=['GET'])
+def get_upload_reaper_stats():
+    return jsonify({'reaper': upload_reaper.stats()})
+
+@main.route('/api/db/pool', methods=['GET'])
+def get_pool_stats():
+    return jsonify({'pool': pool_metrics.to_dict()})
+
+@main.route('/metrics', methods=['GET'])
+def get_metrics():
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@main.route('/api/tasks/<task_id>', methods=['GET'])
+def get_task(task_id):
+    task = Task.query.get_or_404(task_id)
+    return jsonify({'task': task_to_dict(task)})
+
 @main.route('/api/resumes/<path:filename>')
 def download_file(filename):
     try:
-        return send_from_directory(
-            current_app.config['UPLOAD_FOLDER'],
-            filename,
-            as_attachment='download' in request.args
-        )
+        content_hash = db.session.query(Candidate.content_hash).filter(
+            Candidate.resume_path == filename, Candidate.content_hash.isnot(None)
+        ).limit(1).scalar()
+        return send_upload(filename, content_hash, as_attachment='download' in request.args)
+    except HTTPException:
+        # 304 and 416 answers from the conditional and range handling
+        raise
     except Exception as e:
         return jsonify({'error': str(e)}), 404
 
 @main.route('/api/jobs/<int:job_id>/candidates', methods=['GET'])
 def get_candidates(job_id):
     try:
-        candidates = Candidate.query.filter_by(job_id=job_id).all()
+        query = db.session.query(*CANDIDATE_FIELDS).filter(Candidate.job_id == job_id)
+        candidates, next_cursor = keyset_page(
+            query, CANDIDATE_ORDER, page_size(request.args.get('limit', type=int)), request.args.get('cursor')
+        )
         return jsonify({
-            'candidates': [{
-                'id': c.id,
-                'candidate_id': c.candidate_id,
-                'name': c.name,
-                'email': c.email,
-                'mobile': c.mobile,
-                'city': c.city,
-                'highest_qualification': c.highest_qualification,
-                'resume_path': c.resume_path,
-                'score': c.score
-            } for c in candidates]
+            'candidates': [c._asdict() for c in candidates],
+            'next_cursor': next_cursor
         })
+    except InvalidCursor as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@main.route('/api/jobs/<int:job_id>/candidates/export', methods=['GET'])
+def export_candidates(job_id):
+    """
+    Every candidate of a job as one JSON document, streamed in batches of
+    EXPORT_BATCH_SIZE rows so memory use does not grow with the job.
+    """
+    Job.query.get_or_404(job_id)
+    query = db.session.query(*CANDIDATE_FIELDS).filter(Candidate.job_id == job_id)
+    batch_size = current_app.config['EXPORT_BATCH_SIZE']
+
+    def generate():
+        yield f'{{"job_id": {job_id}, "candidates": ['
+        separator = ''
+        for candidate in iterate_keyset(query, CANDIDATE_ORDER, batch_size):
+            yield separator + json.dumps(candidate._asdict())
+            separator = ','
+        yield ']}'
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='application/json',
+        headers={'Content-Disposition': f'attachment; filename=job_{job_id}_candidates.json'}
+    )
+
+def match_response(tf, started):
+    limit = page_size(request.args.get('limit', type=int), default=10)
+    scoring_started = time.perf_counter()
+    jobs_scored, matches = job_matcher.match(tf, limit)
+    return jsonify({
+        'matches': [{'job_id': job_id, 'job_title': title, 'score': score} for job_id, title, score in matches],
+        'jobs_scored': jobs_scored,
+        'scoring_ms': round((time.perf_counter() - scoring_started) * 1000, 2),
+        'elapsed_ms': round((time.perf_counter() - started) * 1000, 2)
+    })
+
+@main.route('/api/match-jobs', methods=['POST'])
+def match_resume_to_jobs():
+    """
+    Scores one uploaded resume against every job and returns the best
+    matching jobs. The resume is analyzed (or read from the feature store if
+    seen before) but not added to any job.
+    """
+    started = time.perf_counter()
+    file_path = None
+    try:
+        file = request.files.get('file')
+        if not file or file.filename == '':
+            return jsonify({'error': 'No file provided'}), 400
+        if not allowed_file(file.filename):
+            return jsonify({'error': 'Invalid file type'}), 400
+
+        file_path = os.path.join(
+            current_app.config['UPLOAD_FOLDER'], f"match_{uuid.uuid4().hex}_{secure_filename(file.filename)}"
+        )
+        content_hash = save_upload(file, file_path)
+        analysis, _ = analyze_cached(file_path, content_hash)
+        return match_response(term_frequencies(analysis.get('tokens', '')), started)
+    except RequestEntityTooLarge:
+        return jsonify({'error': 'File too large'}), 413
+    except Exception as e:
+        return jsonify({'error': f'Failed to match resume: {str(e)}'}), 500
+    finally:
+        if file_path and os.path.exists(file_path):
+            os.remove(file_path)
+
+@main.route('/api/candidates/<candidate_id>/matches', methods=['GET'])
+def get_candidate_matches(candidate_id):
+    """The jobs a stored candidate's resume fits best, from its stored term counts."""
+    started = time.perf_counter()
+    candidate = Candidate.query.filter_by(candidate_id=candidate_id).first_or_404()
+    stored = feature_store.get_term_counts([candidate.content_hash]) if candidate.content_hash else {}
+    if candidate.content_hash not in stored:
+        return jsonify({'error': 'No extracted text stored for this candidate'}), 404
+    try:
+        return match_response(decode_term_counts(*stored[candidate.content_hash]), started)
+    except Exception as e:
+        return jsonify({'error': f'Failed to match candidate: {str(e)}'}), 500
+
+@main.route('/api/candidates/<candidate_id>/duplicates', methods=['GET'])
+def get_candidate_duplicates(candidate_id):
+    """Other candidates, in any job, who sent the same or a near-identical resume."""
+    candidate = Candidate.query.filter_by(candidate_id=candidate_id).first_or_404()
+    try:
+        return jsonify({
+            'candidate_id': candidate.candidate_id,
+            'job_id': candidate.job_id,
+            'duplicates': find_duplicates(candidate.content_hash, candidate.candidate_id)
+        })
+    except Exception as e:
+        return jsonify({'error': f'Failed to find duplicates: {str(e)}'}), 500
+
+def candidate_file(candidate):
+    # Path of a candidate's stored resume, or None when the file is gone
+    if not candidate.resume_path:
+        return None
+    file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], candidate.resume_path)
+    return file_path if os.path.isfile(file_path) else None
+
+@main.route('/api/candidates/<candidate_id>/preview', methods=['GET'])
+def get_candidate_preview(candidate_id):
+    """The start of a candidate's resume text, and where to get an image of its first page."""
+    candidate = Candidate.query.filter_by(candidate_id=candidate_id).first_or_404()
+    file_path = candidate_file(candidate)
+    if file_path is None:
+        return jsonify({'error': 'Resume file not found'}), 404
+    try:
+        text, truncated = resume_previews.text(file_path, candidate.content_hash)
+        response = jsonify({
+            'candidate_id': candidate.candidate_id,
+            'name': candidate.name,
+            'text': text,
+            'truncated': truncated,
+            'image_url': f'/api/candidates/{candidate.candidate_id}/preview.png'
+                         if resume_previews.can_render(candidate.resume_path) else None,
+            'resume_url': f'/api/resumes/{candidate.resume_path}'
+        })
+    except Exception as e:
+        return jsonify({'error': f'Failed to build preview: {str(e)}'}), 500
+    response.add_etag()
+    return private_cache(response, current_app.config['RESUME_CACHE_MAX_AGE']).make_conditional(request)
+
+@main.route('/api/candidates/<candidate_id>/preview.png', methods=['GET'])
+def get_candidate_preview_image(candidate_id):
+    candidate = Candidate.query.filter_by(candidate_id=candidate_id).first_or_404()
+    file_path = candidate_file(candidate)
+    if file_path is None or not candidate.content_hash:
+        return jsonify({'error': 'Resume file not found'}), 404
+    image_path = resume_previews.image(file_path, candidate.content_hash)
+    if image_path is None:
+        return jsonify({'error': 'No preview image for this resume'}), 404
+    max_age = current_app.config['RESUME_CACHE_MAX_AGE']
+    response = send_file(
+        image_path, mimetype='image/png', etag=os.path.basename(image_path)[:-len('.png')], max_age=max_age,
+        conditional=True
+    )
+    return private_cache(response, max_age)
+
+@main.route('/api/previews/stats', methods=['GET'])
+def get_preview_stats():
+    return jsonify({'previews': resume_previews.stats()})
+
+@main.route('/api/jobs/<int:job_id>/search', methods=['GET'])
+def search_candidates(job_id):
+    """
+    Candidates of a job whose resumes mention every word of q, best BM25
+    match first; match=any also returns resumes mentioning only some of them.
+    """
+    Job.query.get_or_404(job_id)
+    terms = search_terms(request.args.get('q', ''))
+    if not terms:
+        return jsonify({'error': 'Search query is required'}), 400
+    if len(terms) > MAX_SEARCH_TERMS:
+        return jsonify({'error': f'At most {MAX_SEARCH_TERMS} search terms are allowed'}), 400
+    try:
+        started = time.perf_counter()
+        limit = page_size(request.args.get('limit', type=int), default=20)
+        match_all = request.args.get('match', 'all') != 'any'
+
+        index = search_indexes.get(job_id)
+        total, hits = index.search([term_id(term) for term in terms], limit, match_all)
+
+        rows = db.session.query(*CANDIDATE_FIELDS).filter(Candidate.id.in_([c for c, _ in hits])).all() if hits else []
+        by_id = {row.id: row._asdict() for row in rows}
+        candidates = []
+        for candidate_id, relevance in hits:
+            if candidate_id in by_id:
+                candidates.append(dict(by_id[candidate_id], relevance=round(relevance, 4)))
+
+        return jsonify({
+            'query': terms,
+            'match': 'all' if match_all else 'any',
+            'total': total,
+            'searched_resumes': len(index),
+            'candidates': candidates,
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 2)
+        })
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Search failed: {str(e)}'}), 500
+
 @main.route('/api/top-resumes', methods=['GET'])
 def get_top_resumes():
     try:
-        # Get optional job_id and limit parameters
+        # Get optional job_id, limit and cursor parameters
         job_id = request.args.get('job_id', type=int)
-        limit = request.args.get('limit', default=10, type=int)
-        
-        # Base query
-        query = Candidate.query
-        
-        # Filter by job if specified
-        if job_id:
-            query = query.filter_by(job_id=job_id)
+        limit = page_size(request.args.get('limit', type=int), default=10)
+        cursor = request.args.get('cursor')
         
-        # Get top candidates by score
-        top_candidates = query.order_by(Candidate.score.desc()).limit(limit).all()
+        # Served from memory unless the page lies beyond the cached top candidates
+        page = leaderboard.page(job_id or None, limit, cursor)
+        if page is None:
+            # Job titles come from the same query instead of one lookup per candidate
+            rows, next_cursor = keyset_page(top_resumes_query(job_id or None), CANDIDATE_ORDER, limit, cursor)
+            page = [row._asdict() for row in rows], next_cursor
+        top_candidates, next_cursor = page
         
-        # Get job titles for each candidate
         result = []
-        for candidate in top_candidates:
-            job = Job.query.get(candidate.job_id)
-            result.append({
-                'id': candidate.id,
-                'candidate_id': candidate.candidate_id,
-                'name': candidate.name,
-                'email': candidate.email,
-                'mobile': candidate.mobile,
-                'city': candidate.city,
-                'highest_qualification': candidate.highest_qualification,
-                'resume_path': candidate.resume_path,
-                'score': candidate.score,
-                'job_id': candidate.job_id,
-                'job_title': job.title if job else 'Unknown Job'
-            })
+        for row in top_candidates:
+            row['job_title'] = row['job_title'] or 'Unknown Job'
+            result.append(row)
         
-        return jsonify({'top_resumes': result})
+        return jsonify({'top_resumes': result, 'next_cursor': next_cursor})
+    except InvalidCursor as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         print(f"Error fetching top resumes: {str(e)}")
         return jsonify({'error': f'Failed to fetch top resumes: {str(e)}'}), 500
@@ -0,0 +1,92 @@
+import math
+import multiprocessing
+import signal
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:
+    # Windows: processes run without limits
+    resource = None
+
+# Set in each extraction process by limit_process
+_cpu_seconds = 0
+
+
+class ResourceLimitExceeded(Exception):
+    pass
+
+
+class ExtractionProcess(multiprocessing.context.SpawnProcess):
+    # Named after its class ("ExtractionProcess-3"); a spawned process knows
+    # its name before it re-imports the parent's main module, so code run by
+    # that import can tell where it is
+    pass
+
+
+class ExtractionContext(multiprocessing.context.SpawnContext):
+    """Spawn start method for the extraction pools, creating ExtractionProcesses."""
+    Process = ExtractionProcess
+
+
+def in_extraction_process():
+    """Whether this is an extraction pool process, which must never start app services."""
+    return multiprocessing.current_process().name.startswith(ExtractionProcess.__name__)
+
+
+def _on_cpu_limit(signum, frame):
+    raise ResourceLimitExceeded(f'Extraction exceeded {_cpu_seconds}s of CPU time')
+
+
+def limit_process(memory_limit=0, cpu_seconds=0, max_tasks=None):
+    """
+    Pool initializer confining an extraction process, so one huge or hostile
+    document cannot take the memory or CPU of the whole machine:
+    - its address space is capped at memory_limit bytes, past which
+      allocations fail (MemoryError in Python) instead of growing the process
+    - every task under task_limits() gets cpu_seconds of CPU time; the
+      SIGXCPU sent on overrun raises ResourceLimitExceeded
+    - the kernel kills the process outright once it used cpu_seconds for
+      each of its max_tasks tasks plus one, which stops code that ignores the
+      signal (stuck in a C extension)
+    0 disables a limit.
+    """
+    global _cpu_seconds
+    if resource is None:
+        return
+    if memory_limit:
+        _, hard = resource.getrlimit(resource.RLIMIT_AS)
+        soft = memory_limit if hard == resource.RLIM_INFINITY else min(memory_limit, hard)
+        resource.setrlimit(resource.RLIMIT_AS, (soft, hard))
+    if cpu_seconds:
+        _cpu_seconds = cpu_seconds
+        signal.signal(signal.SIGXCPU, _on_cpu_limit)
+        if max_tasks:
+            budget = math.ceil(_cpu_used()) + cpu_seconds * (max_tasks + 1)
+            resource.setrlimit(resource.RLIMIT_CPU, (budget, budget))
+
+
+def _cpu_used():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+@contextmanager
+def task_limits():
+    """
+    Gives the enclosed task the per-task CPU time of limit_process(); does
+    nothing in processes limit_process() did not set up (the web process).
+    """
+    if resource is None or not _cpu_seconds:
+        yield
+        return
+    previous = resource.getrlimit(resource.RLIMIT_CPU)
+    soft = math.ceil(_cpu_used()) + _cpu_seconds
+    if previous[1] != resource.RLIM_INFINITY:
+        soft = min(soft, previous[1])
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, previous[1]))
+    try:
+        yield
+    finally:
+        resource.setrlimit(resource.RLIMIT_CPU, previous)
+
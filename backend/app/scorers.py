@@ -0,0 +1,323 @@
+import functools
+import math
+import re
+from .extractors import stop_words
+from .feature_store import decode_term_counts, feature_store
+from .scoring import (
+    N_FEATURES, SECTIONS, count_matrix, search_term_frequencies, search_terms, section_term_frequencies, term_id,
+    term_frequencies
+)
+from .search import B, K1
+
+# Registered scoring engines by name; a job picks one with Job.scoring_engine
+SCORERS = {}
+DEFAULT_SCORER = 'tfidf'
+
+
+def register(scorer_class):
+    SCORERS[scorer_class.name] = scorer_class()
+    return scorer_class
+
+
+def get_scorer(name=None):
+    """The registered engine called name, or the default engine for None. Raises ValueError for unknown names."""
+    try:
+        return SCORERS[name or DEFAULT_SCORER]
+    except KeyError:
+        raise ValueError(f"Unknown scoring engine '{name}' (available: {', '.join(sorted(SCORERS))})")
+
+
+class Scorer:
+    """
+    A scoring engine: rates resumes against a job as a percentage.
+
+    Engines only read counts the feature store precomputes for every resume
+    (stored_features), so adding an engine adds no parsing. Corpus statistics
+    (document frequencies, lengths) come from the job's JobScoringModel,
+    which counts every resume of the job whichever engine ranks them.
+
+    score() rates one new resume; score_all() rescores a job's resumes in
+    one vectorized pass and must give the same scores.
+    """
+
+    name = None
+    description = None
+    # Set when the TF-IDF refit done by rescore_job already yields the scores
+    scores_from_fit = False
+
+    def resume_counts(self, analysis):
+        """The counts score_all reads, computed from a freshly analyzed resume."""
+        return term_frequencies(analysis.get('tokens', ''))
+
+    def stored_features(self, content_hashes):
+        """{content hash: (ids blob, counts blob)} of the counts score_all reads."""
+        return feature_store.get_term_counts(content_hashes)
+
+    def stored_counts(self, analysis):
+        """
+        The counts score_all reads for one analyzed resume, as stored with its
+        extraction results; computed from the text only for a resume the
+        feature store does not hold.
+        """
+        content_hash = analysis.get('content_hash')
+        stored = self.stored_features([content_hash]).get(content_hash) if content_hash else None
+        if stored is None:
+            return self.resume_counts(analysis)
+        return decode_term_counts(*stored)
+
+    def score(self, job, model, analysis, tf):
+        """
+        Score of a freshly analyzed resume, given its term counts (tf) and the
+        job's model, which already includes the resume.
+        """
+        raise NotImplementedError
+
+    def score_all(self, job, model, features):
+        """NumPy array of the scores of many resumes, given as stored_features values."""
+        raise NotImplementedError
+
+
+def _rows(matrix):
+    """Row number of every stored value of a CSR matrix."""
+    import numpy as np
+
+    return np.repeat(np.arange(matrix.shape[0]), np.diff(matrix.indptr))
+
+
+def cosine_scores(model, matrix):
+    """
+    TF-IDF cosine similarity (as percentages) between the job of model and
+    each row of a sparse term count matrix; the vectorized form of
+    JobScoringModel.score.
+    """
+    import numpy as np
+
+    weights, job_norm = model.job_vector()
+    if not job_norm or not matrix.nnz:
+        return np.zeros(matrix.shape[0])
+    terms, columns = np.unique(matrix.indices, return_inverse=True)
+    weighted = matrix.data * model.idf_array(terms)[columns]
+    job_weights = np.array([weights.get(term, 0.0) for term in terms.tolist()])[columns]
+
+    rows = _rows(matrix)
+    norms = np.sqrt(np.bincount(rows, weights=weighted * weighted, minlength=matrix.shape[0]))
+    dots = np.bincount(rows, weights=weighted * job_weights, minlength=matrix.shape[0])
+    norms[norms == 0] = 1.0
+    return np.round(dots / (norms * job_norm) * 100, 2)
+
+
+@register
+class TfidfScorer(Scorer):
+    name = 'tfidf'
+    description = 'TF-IDF cosine similarity between the resume and the job description'
+    scores_from_fit = True
+
+    def score(self, job, model, analysis, tf):
+        return model.score(tf)
+
+    def score_all(self, job, model, features):
+        return cosine_scores(model, count_matrix(features))
+
+
+@register
+class BM25Scorer(Scorer):
+    """
+    Okapi BM25 of the resume for the job description's terms as the query,
+    as a percentage of the score a resume saturating every term would get.
+    """
+
+    name = 'bm25'
+    description = 'BM25 relevance of the resume to the terms of the job description'
+
+    @staticmethod
+    def _idf(n_docs, df):
+        return math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+
+    def score(self, job, model, analysis, tf):
+        terms, df, n_docs, average_length = model.query_statistics()
+        idfs = [self._idf(n_docs, frequency) for frequency in df]
+        best = sum(idfs) * (K1 + 1)
+        if not best:
+            return 0.0
+        norm = K1 * (1 - B + B * sum(tf.values()) / (average_length or 1.0))
+        total = sum(idf * tf[term] * (K1 + 1) / (tf[term] + norm) for term, idf in zip(terms, idfs) if tf.get(term))
+        return round(total / best * 100, 2)
+
+    def score_all(self, job, model, features):
+        import numpy as np
+
+        matrix = count_matrix(features)
+        terms, df, n_docs, average_length = model.query_statistics()
+        idfs = np.array([self._idf(n_docs, frequency) for frequency in df])
+        best = idfs.sum() * (K1 + 1)
+        if not best or not matrix.nnz:
+            return np.zeros(matrix.shape[0])
+        terms = np.array(terms, dtype=np.int64)
+
+        rows = _rows(matrix)
+        lengths = np.bincount(rows, weights=matrix.data, minlength=matrix.shape[0])
+        positions = np.minimum(np.searchsorted(terms, matrix.indices), len(terms) - 1)
+        query = terms[positions] == matrix.indices
+        rows, tfs, idfs = rows[query], matrix.data[query], idfs[positions[query]]
+        norms = K1 * (1 - B + B * lengths[rows] / (average_length or 1.0))
+        totals = np.bincount(rows, weights=idfs * tfs * (K1 + 1) / (tfs + norms), minlength=matrix.shape[0])
+        return np.round(totals / best * 100, 2)
+
+
+# Required skills count this many times as much as nice-to-have ones
+REQUIRED_WEIGHT = 2.0
+
+_optional_pattern = re.compile(r'\b(?:nice to have|good to have|preferred|bonus|optional|desirable|a plus)\b', re.I)
+_required_pattern = re.compile(r'\b(?:required|requirements?|must|mandatory|essential|need)\b', re.I)
+_sentence_pattern = re.compile(r'\n|(?<=[A-Za-z)])\.\s+')
+# Words of requirement sentences that are not skills themselves
+_filler_words = stop_words | frozenset((
+    'experience', 'experienced', 'years', 'year', 'knowledge', 'skills', 'skill', 'strong', 'good',
+    'excellent', 'solid', 'ability', 'understanding', 'working', 'work', 'proficiency', 'proficient',
+    'familiarity', 'familiar', 'hands', 'plus', 'nice', 'preferred', 'required', 'requirements',
+    'requirement', 'must', 'mandatory', 'essential', 'need', 'needed', 'bonus', 'optional', 'desirable',
+    'including', 'etc', 'using', 'like', 'similar', 'related', 'tools', 'least', 'minimum', 'also',
+    'someone', 'candidate', 'candidates', 'looking', 'ideal', 'role', 'team', 'hiring', 'degree', 'know'
+))
+
+
+def _keywords(sentence):
+    return {word for word in search_terms(sentence.split(':', 1)[-1])
+            if word not in _filler_words and not word[0].isdigit()}
+
+
+@functools.lru_cache(maxsize=256)
+def parse_skills(description):
+    """
+    (required, optional) skill keywords of a job description, as sorted term
+    ids of search terms (so "go" and "c++" count). Sentences mentioning
+    "required", "must" and the like list required skills, ones mentioning
+    "nice to have", "preferred" and the like optional ones; bulleted or short
+    lines listed under such a heading inherit it. A description with neither
+    treats all of its keywords as required.
+    """
+    required, optional = set(), set()
+    listed = None  # where the items of a list under a requirement heading go
+    for sentence in _sentence_pattern.split(description):
+        stripped = sentence.strip()
+        if _optional_pattern.search(stripped):
+            skills = optional
+        elif _required_pattern.search(stripped):
+            skills = required
+        elif stripped.startswith(('-', '*', '•')) or 0 < len(stripped.split()) <= 3:
+            skills = listed
+        else:
+            # Any other sentence ends the list
+            listed = skills = None
+        if skills is None:
+            continue
+        skills.update(_keywords(stripped))
+        if skills is not listed:
+            listed = skills if stripped.endswith(':') or len(stripped.split()) <= 3 else None
+    if not required and not optional:
+        required = _keywords(description)
+    required_ids = sorted({term_id(word) for word in required})
+    optional_ids = sorted({term_id(word) for word in optional} - set(required_ids))
+    return tuple(required_ids), tuple(optional_ids)
+
+
+@register
+class SkillsScorer(Scorer):
+    """
+    Share of the job's skill keywords found anywhere in the resume, with
+    required skills weighted REQUIRED_WEIGHT times optional ones.
+    """
+
+    name = 'skills'
+    description = 'Weighted share of the required and nice-to-have skills of the job found in the resume'
+
+    def resume_counts(self, analysis):
+        return search_term_frequencies(analysis.get('text', ''))
+
+    def stored_features(self, content_hashes):
+        return feature_store.get_search_term_counts(content_hashes)
+
+    def score(self, job, model, analysis, tf):
+        required, optional = parse_skills(job.description)
+        total = REQUIRED_WEIGHT * len(required) + len(optional)
+        if not total:
+            return 0.0
+        terms = self.stored_counts(analysis)
+        found = REQUIRED_WEIGHT * sum(1 for term in required if term in terms)
+        found += sum(1 for term in optional if term in terms)
+        return round(found / total * 100, 2)
+
+    def score_all(self, job, model, features):
+        import numpy as np
+
+        required, optional = parse_skills(job.description)
+        matrix = count_matrix(features)
+        total = REQUIRED_WEIGHT * len(required) + len(optional)
+        if not total or not matrix.nnz:
+            return np.zeros(matrix.shape[0])
+        terms = np.array(required + optional, dtype=np.int64)
+        weights = np.array([REQUIRED_WEIGHT] * len(required) + [1.0] * len(optional))
+        order = np.argsort(terms)
+        terms, weights = terms[order], weights[order]
+
+        positions = np.minimum(np.searchsorted(terms, matrix.indices), len(terms) - 1)
+        found = terms[positions] == matrix.indices
+        totals = np.bincount(_rows(matrix)[found], weights=weights[positions[found]], minlength=matrix.shape[0])
+        return np.round(totals / total * 100, 2)
+
+
+# Weight of a term by the resume section it appears in: skills used on the
+# job count for more than ones only mentioned under education
+SECTION_WEIGHTS = {
+    'other': 1.0,
+    'summary': 0.8,
+    'experience': 1.5,
+    'education': 0.5,
+    'skills': 1.0,
+    'projects': 1.2,
+    'certifications': 0.8,
+}
+
+
+@register
+class SectionScorer(Scorer):
+    """
+    TF-IDF cosine similarity with each resume term counted by the weight of
+    the section it appears in (SECTION_WEIGHTS). A resume without
+    recognisable headings scores as it does with the tfidf engine.
+    """
+
+    name = 'sections'
+    description = 'TF-IDF cosine similarity weighting experience above education and other sections'
+
+    def __init__(self):
+        self.weights = [SECTION_WEIGHTS[section] for section in SECTIONS]
+
+    def resume_counts(self, analysis):
+        return section_term_frequencies(analysis.get('text', ''))
+
+    def stored_features(self, content_hashes):
+        return feature_store.get_section_term_counts(content_hashes)
+
+    def weighted_counts(self, section_tf):
+        weighted = {}
+        for key, count in section_tf.items():
+            section, term = divmod(key, N_FEATURES)
+            weighted[term] = weighted.get(term, 0.0) + count * self.weights[section]
+        return weighted
+
+    def score(self, job, model, analysis, tf):
+        return model.score(self.weighted_counts(self.stored_counts(analysis)))
+
+    def score_all(self, job, model, features):
+        import numpy as np
+        from scipy import sparse
+
+        matrix = count_matrix(features, len(SECTIONS) * N_FEATURES)
+        sections, terms = np.divmod(matrix.indices, N_FEATURES)
+        weighted = sparse.csr_matrix(
+            (matrix.data * np.array(self.weights)[sections], terms, matrix.indptr), shape=(matrix.shape[0], N_FEATURES)
+        )
+        # A term found in several sections becomes one entry
+        weighted.sum_duplicates()
+        return cosine_scores(model, weighted)
@@ -0,0 +1,641 @@
+import atexit
+import glob
+import hashlib
+import json
+import logging
+import math
+import os
+import re
+import threading
+import zlib
+from array import array
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from .extractors import clean_text
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: models are still saved atomically, but saves from several
+    # processes are not merged
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+# Terms are mapped to one of N_FEATURES columns by a stable hash (the hashing
+# trick), so stored features, job models and score matrices share a single
+# column space without a global vocabulary.
+N_FEATURES = 2 ** 22
+
+
+def term_id(term):
+    return zlib.crc32(term.encode('utf-8')) & (N_FEATURES - 1)
+
+
+def term_frequencies(cleaned_text):
+    """Sparse term counts of cleaned text, keyed by term id."""
+    return Counter(map(term_id, cleaned_text.split()))
+
+
+# Full-text search keeps every word, including short and symbol-suffixed
+# skills ("go", "c++", "c#") that clean_text drops
+_search_token_pattern = re.compile(r'\w[\w+#]*')
+
+
+def search_terms(text):
+    """Lowercased search tokens of raw resume text or of a search query."""
+    return _search_token_pattern.findall(text.lower())
+
+
+def search_term_frequencies(text):
+    """Sparse search term counts of raw text, keyed by term id."""
+    return Counter(map(term_id, search_terms(text)))
+
+
+# Resume sections told apart by section-aware scoring. A resume's section term
+# counts key each term by section * N_FEATURES + term id, so they pack into the
+# same uint32 blobs as plain term counts.
+SECTIONS = ('other', 'summary', 'experience', 'education', 'skills', 'projects', 'certifications')
+
+# Words that start a section when a short line is made only of heading words
+_SECTION_KEYWORDS = {
+    'summary': 'summary', 'profile': 'summary', 'objective': 'summary', 'about': 'summary',
+    'experience': 'experience', 'employment': 'experience', 'career': 'experience', 'work': 'experience',
+    'education': 'education', 'academic': 'education', 'academics': 'education', 'qualifications': 'education',
+    'skills': 'skills', 'technologies': 'skills', 'competencies': 'skills', 'expertise': 'skills',
+    'projects': 'projects', 'project': 'projects',
+    'certifications': 'certifications', 'certificates': 'certifications', 'licenses': 'certifications',
+    'courses': 'certifications',
+}
+_HEADING_WORDS = frozenset(_SECTION_KEYWORDS) | {
+    'professional', 'technical', 'key', 'core', 'relevant', 'personal', 'history', 'and', 'me',
+    'training', 'details', 'background', 'other', 'selected', 'tools'
+}
+_heading_word_pattern = re.compile(r'[a-z]+')
+
+
+def section_heading(line):
+    """Index in SECTIONS of the section a resume line starts, or None if it is not a heading."""
+    if len(line) > 40:
+        return None
+    words = _heading_word_pattern.findall(line.lower())
+    if not 1 <= len(words) <= 4 or not _HEADING_WORDS.issuperset(words):
+        return None
+    for word in words:
+        if word in _SECTION_KEYWORDS and (word != 'work' or len(words) > 1):
+            return SECTIONS.index(_SECTION_KEYWORDS[word])
+    return None
+
+
+def section_term_frequencies(text):
+    """
+    Term counts of raw resume text split by section, keyed by
+    section * N_FEATURES + term id. Text before the first recognised heading
+    belongs to the 'other' section.
+    """
+    lines_by_section = {}
+    section = 0
+    for line in text.splitlines():
+        heading = section_heading(line.strip())
+        if heading is not None:
+            section = heading
+        else:
+            lines_by_section.setdefault(section, []).append(line)
+    tf = Counter()
+    for section, lines in lines_by_section.items():
+        offset = section * N_FEATURES
+        tf.update(offset + term for term in map(term_id, clean_text('\n'.join(lines)).split()))
+    return tf
+
+
+def description_hash(description):
+    return hashlib.sha256(description.encode('utf-8')).hexdigest()
+
+
+class JobScoringModel:
+    """
+    TF-IDF model for one job, fitted over the job description plus every
+    resume received for the job. Document frequencies (keyed by term id) are
+    updated as resumes arrive, and the weighted job description vector is
+    cached until they change. Resumes are counted once per content hash, so
+    uploading the same file again does not skew the document frequencies.
+
+    Weighting matches sklearn's TfidfVectorizer defaults (raw term counts,
+    smoothed idf, l2 normalisation), so a model holding only the description
+    and one resume gives the same score the old two-document fit did.
+    """
+
+    def __init__(self, job_id, description='', n_docs=0, df=None, job_tf=None, desc_hash=None, total_terms=0,
+                 documents=None):
+        self.job_id = job_id
+        self.n_docs = n_docs
+        self.total_terms = total_terms  # summed document lengths, for BM25 length normalisation
+        self.df = Counter({int(term): count for term, count in (df or {}).items()})
+        self.job_tf = Counter({int(term): count for term, count in (job_tf or {}).items()})
+        self.description_hash = desc_hash
+        self.documents = set(documents or ())  # content hashes of the resumes counted
+        self.updates = 0
+        self.pending = []  # (content hash, term counts) of resumes added since the last save
+        self.rewrite = False  # set when a change cannot be journaled
+        # Where the copy on disk was last read or written: the saved model's
+        # file (inode, mtime), its journal's name and how far it was read
+        self.saved_as = None
+        self.journal = None
+        self.journal_offset = 0
+        self.journal_records = 0
+        self._lock = threading.RLock()
+        self._job_vector = None
+        if desc_hash is None:
+            self.set_description(description)
+
+    def set_description(self, description):
+        """Replaces the job description document, e.g. after the job was edited."""
+        with self._lock:
+            if self.description_hash is not None:
+                self.remove_document(self.job_tf)
+            self.job_tf = term_frequencies(clean_text(description))
+            self.description_hash = description_hash(description)
+            self._count(self.job_tf)
+            self.rewrite = True
+
+    def _count(self, tf):
+        self.n_docs += 1
+        self.total_terms += sum(tf.values())
+        self.df.update(tf.keys())
+        self.updates += 1
+        self._job_vector = None
+
+    def add_document(self, tf, content_hash=None):
+        """
+        Counts a resume's term counts in the corpus. Returns False (and counts
+        nothing) if a resume with the same content hash was counted before.
+        """
+        with self._lock:
+            if content_hash is not None:
+                if content_hash in self.documents:
+                    return False
+                self.documents.add(content_hash)
+            self._count(tf)
+            self.pending.append((content_hash, tf))
+            return True
+
+    def remove_document(self, tf):
+        with self._lock:
+            self.n_docs = max(self.n_docs - 1, 0)
+            self.total_terms = max(self.total_terms - sum(tf.values()), 0)
+            self.df.subtract(tf.keys())
+            self.df += Counter()  # drop terms whose count fell to zero
+            self.updates += 1
+            self._job_vector = None
+
+    def absorb(self, saved):
+        """
+        Takes over the state of the same job's model as saved by another
+        process, then counts again the resumes added here since this model
+        was last saved, so neither process's updates are lost.
+        """
+        with self._lock:
+            pending = self.pending
+            self.n_docs = saved.n_docs
+            self.total_terms = saved.total_terms
+            self.df = saved.df
+            self.job_tf = saved.job_tf
+            self.description_hash = saved.description_hash
+            self.documents = saved.documents
+            self.saved_as = saved.saved_as
+            self.journal = saved.journal
+            self.journal_offset = saved.journal_offset
+            self.journal_records = saved.journal_records
+            self.pending = []
+            self._job_vector = None
+            for content_hash, tf in pending:
+                self.add_document(tf, content_hash)
+
+    def idf(self, term):
+        return math.log((1 + self.n_docs) / (1 + self.df.get(term, 0))) + 1
+
+    def idf_array(self, terms):
+        """idf of each term id in a NumPy array of them."""
+        import numpy as np
+
+        with self._lock:
+            df = np.array([self.df.get(term, 0) for term in terms.tolist()], dtype=np.float64)
+            n_docs = self.n_docs
+        return np.log((1 + n_docs) / (1 + df)) + 1
+
+    def query_statistics(self):
+        """
+        (sorted job description term ids, their document frequencies, number
+        of documents, average document length), read consistently for BM25.
+        """
+        with self._lock:
+            terms = sorted(self.job_tf)
+            return (
+                terms,
+                [self.df.get(term, 0) for term in terms],
+                self.n_docs,
+                self.total_terms / self.n_docs if self.n_docs else 0.0
+            )
+
+    def job_vector(self):
+        """Returns the idf-weighted job description vector and its norm."""
+        with self._lock:
+            if self._job_vector is None:
+                weights = {term: count * self.idf(term) for term, count in self.job_tf.items()}
+                norm = math.sqrt(sum(w * w for w in weights.values()))
+                self._job_vector = (weights, norm)
+            return self._job_vector
+
+    def score(self, tf):
+        """Cosine similarity (as a percentage) between a resume's term counts and the job."""
+        weights, job_norm = self.job_vector()
+        if not tf or not job_norm:
+            return 0.0
+        with self._lock:
+            dot = 0.0
+            norm = 0.0
+            for term, count in tf.items():
+                weight = count * self.idf(term)
+                norm += weight * weight
+                if term in weights:
+                    dot += weight * weights[term]
+        if not norm:
+            return 0.0
+        return round(dot / (math.sqrt(norm) * job_norm) * 100, 2)
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                'job_id': self.job_id,
+                'description_hash': self.description_hash,
+                'n_docs': self.n_docs,
+                'total_terms': self.total_terms,
+                'df': dict(self.df),
+                'job_tf': dict(self.job_tf),
+                'documents': sorted(self.documents),
+                'journal': self.journal
+            }
+
+    @classmethod
+    def from_dict(cls, data):
+        model = cls(
+            data['job_id'],
+            n_docs=data['n_docs'],
+            # Models saved without these are refitted (KeyError on load)
+            total_terms=data['total_terms'],
+            documents=data['documents'],
+            df=data['df'],
+            job_tf=data['job_tf'],
+            desc_hash=data['description_hash']
+        )
+        model.journal = data['journal']
+        return model
+
+
+def count_matrix(features, n_features=N_FEATURES):
+    """
+    Sparse (documents x n_features) CSR matrix of packed (term ids, counts)
+    blobs, one row per document, built straight from the blobs' buffers.
+    """
+    import numpy as np
+    from scipy import sparse
+
+    features = list(features)
+    indices = np.frombuffer(b''.join(ids for ids, _ in features), dtype=np.uint32).astype(np.int32)
+    data = np.frombuffer(b''.join(counts for _, counts in features), dtype=np.uint32).astype(np.float64)
+    indptr = np.zeros(len(features) + 1, dtype=np.int64)
+    np.cumsum([len(ids) // 4 for ids, _ in features], out=indptr[1:])
+    return sparse.csr_matrix((data, indices, indptr), shape=(len(features), n_features))
+
+
+def fit_and_score(job_id, description, features, content_hashes=None):
+    """
+    Fits a job's scoring model from scratch over the description plus every
+    resume and scores all resumes at once: one sparse count matrix assembled
+    from the stored (term ids, counts) feature blobs, one idf scaling and one
+    sparse matrix-vector product instead of a Python-level score per resume.
+    Given the resumes' content hashes (aligned with features), each distinct
+    resume is counted once in the document frequencies.
+
+    Returns (model, scores) where scores is a NumPy array aligned with features.
+    """
+    # Only needed for full refits, so kept out of app startup
+    import numpy as np
+
+    job_tf = term_frequencies(clean_text(description))
+    features = list(features)
+    distinct = None
+    if content_hashes is not None:
+        first = {}
+        for index, content_hash in enumerate(content_hashes):
+            first.setdefault(content_hash or index, index)
+        distinct = sorted(first.values())
+    documents = {h for h in content_hashes or () if h}
+    if not job_tf:
+        model = JobScoringModel(job_id, description, n_docs=len(features if distinct is None else distinct),
+                                documents=documents)
+        return model, np.zeros(len(features))
+
+    features.append((array('I', job_tf.keys()).tobytes(), array('I', job_tf.values()).tobytes()))
+    counts = count_matrix(features)
+    corpus = counts if distinct is None else counts[distinct + [len(features) - 1]]
+    n_docs = corpus.shape[0]
+    total_terms = int(corpus.data.sum())
+
+    df = np.bincount(corpus.indices, minlength=N_FEATURES)
+    idf = np.log((1 + n_docs) / (1 + df)) + 1
+
+    counts.data *= idf[counts.indices]
+    norms = np.sqrt(np.asarray(counts.power(2).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    job_vector = counts[len(features) - 1].toarray().ravel()
+    similarities = (counts @ job_vector)[:-1] / (norms[:-1] * norms[-1])
+    scores = np.round(similarities * 100, 2)
+
+    terms = np.flatnonzero(df)
+    model = JobScoringModel(
+        job_id,
+        n_docs=n_docs,
+        df=dict(zip(terms.tolist(), df[terms].tolist())),
+        job_tf=job_tf,
+        desc_hash=description_hash(description),
+        total_terms=total_terms,
+        documents=documents
+    )
+    return model, scores
+
+
+class ScoringModelCache:
+    """
+    In-memory LRU cache of per-job scoring models, persisted under
+    SCORING_MODEL_DIR as a JSON snapshot plus a journal of the resumes added
+    since. The resumes added to a model are appended to its journal after
+    SCORING_MODEL_PERSIST_EVERY updates, when it is evicted and at exit; the
+    snapshot is only rewritten once the journal holds
+    SCORING_MODEL_COMPACT_EVERY resumes. Every process sharing the directory
+    keeps its own copies, so a save first counts in what other processes
+    saved.
+    """
+
+    def __init__(self):
+        self.directory = None
+        self.capacity = 128
+        self.persist_every = 20
+        self.compact_every = 1000
+        self.corpus_loader = None
+        self._models = OrderedDict()
+        self._fitting = {}  # job id -> Event set once the job's model is loaded or fitted
+        self._lock = threading.RLock()
+
+    def init_app(self, app, corpus_loader=None):
+        self.directory = app.config['SCORING_MODEL_DIR']
+        self.capacity = app.config['SCORING_MODEL_CACHE_SIZE']
+        self.persist_every = app.config['SCORING_MODEL_PERSIST_EVERY']
+        self.compact_every = app.config['SCORING_MODEL_COMPACT_EVERY']
+        self.corpus_loader = corpus_loader
+        os.makedirs(self.directory, exist_ok=True)
+        atexit.register(self.flush)
+
+    def _path(self, job_id):
+        return os.path.join(self.directory, f'job_{job_id}.json')
+
+    def _journal_path(self, job_id, journal):
+        return os.path.join(self.directory, f'job_{job_id}.{journal}.journal')
+
+    def _saved_as(self, job_id):
+        try:
+            stat = os.stat(self._path(job_id))
+        except FileNotFoundError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns)
+
+    def get(self, job):
+        """
+        Returns the model for a job, loading or fitting it on first use. The
+        fit runs outside the cache lock, so other jobs' models stay available;
+        other threads asking for the same job wait for it instead of fitting
+        it again.
+        """
+        while True:
+            with self._lock:
+                model = self._models.get(job.id)
+                if model is not None:
+                    self._models.move_to_end(job.id)
+                    break
+                fitting = self._fitting.get(job.id)
+                if fitting is None:
+                    fitting = self._fitting[job.id] = threading.Event()
+                    break
+            fitting.wait()
+
+        if model is None:
+            try:
+                model = self._install(self._load(job) or self._fit(job))
+            finally:
+                with self._lock:
+                    del self._fitting[job.id]
+                fitting.set()
+
+        if model.description_hash != description_hash(job.description):
+            model.set_description(job.description)
+        return model
+
+    def _install(self, model):
+        with self._lock:
+            # A model replace() installed meanwhile is newer than the one loaded
+            model = self._models.setdefault(model.job_id, model)
+            self._models.move_to_end(model.job_id)
+            evicted = self._evict()
+        for old in evicted:
+            self.save(old)
+        return model
+
+    def _evict(self):
+        evicted = []
+        while len(self._models) > self.capacity:
+            evicted.append(self._models.popitem(last=False)[1])
+        return evicted
+
+    def replace(self, model):
+        """Installs a freshly fitted model for a job and persists it."""
+        with self._lock:
+            self._models[model.job_id] = model
+            self._models.move_to_end(model.job_id)
+            evicted = self._evict()
+        for old in evicted:
+            self.save(old)
+        self.save(model, merge=False)
+
+    def add_resume(self, job, tf, content_hash=None):
+        """Adds a resume to the job's corpus and returns its score against the job."""
+        return self.add_document(job, tf, content_hash).score(tf)
+
+    def add_document(self, job, tf, content_hash=None):
+        """
+        Adds a resume's term counts to the job's corpus (unless the same
+        content was added before) and returns the job's model.
+        """
+        model = self.get(job)
+        model.add_document(tf, content_hash)
+        if model.updates >= self.persist_every:
+            self.save(model)
+        return model
+
+    def _load(self, job):
+        if not self.directory or not os.path.exists(self._path(job.id)):
+            return None
+        with self._file_lock(job.id):
+            return self._read(job.id)
+
+    def _read(self, job_id):
+        """Reads a job's saved model and counts in its journal. Needs the file lock."""
+        try:
+            with open(self._path(job_id)) as f:
+                stat = os.fstat(f.fileno())
+                model = JobScoringModel.from_dict(json.load(f))
+            model.saved_as = (stat.st_ino, stat.st_mtime_ns)
+            self._replay(model)
+            model.pending = []
+            model.updates = 0
+            return model
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError) as e:
+            logger.error(f"Could not load scoring model for job {job_id}: {str(e)}")
+            return None
+
+    def _replay(self, model):
+        """
+        Counts the resumes appended to a model's journal since it was last
+        read, leaving its own pending resumes as they were.
+        """
+        try:
+            with open(self._journal_path(model.job_id, model.journal), 'rb') as f:
+                f.seek(model.journal_offset)
+                data = f.read()
+        except FileNotFoundError:
+            return
+        # A line cut short by a crash is never completed, nor read
+        data = data[:data.rfind(b'\n') + 1]
+        pending, model.pending = model.pending, []
+        for line in data.splitlines():
+            content_hash, terms, counts = json.loads(line)
+            model.add_document(Counter(dict(zip(terms, counts))), content_hash)
+            model.journal_records += 1
+        model.pending = pending
+        model.journal_offset += len(data)
+
+    def _append(self, model):
+        """Appends a model's pending resumes to its journal."""
+        lines = ''.join(
+            json.dumps([content_hash, list(tf.keys()), list(tf.values())]) + '\n'
+            for content_hash, tf in model.pending
+        ).encode('utf-8')
+        with open(self._journal_path(model.job_id, model.journal), 'ab') as f:
+            f.write(lines)
+        model.journal_offset += len(lines)
+        model.journal_records += len(model.pending)
+        model.pending = []
+
+    def _write(self, model):
+        """Writes a whole model atomically, starting an empty journal for it."""
+        path = self._path(model.job_id)
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        model.journal = os.urandom(8).hex()
+        with open(tmp_path, 'w') as f:
+            json.dump(model.to_dict(), f)
+        os.replace(tmp_path, path)
+        model.saved_as = self._saved_as(model.job_id)
+        model.journal_offset = 0
+        model.journal_records = 0
+        model.pending = []
+        model.rewrite = False
+        # The snapshot names its journal, so one left behind by a crash here
+        # is never read
+        for journal_path in glob.glob(os.path.join(self.directory, f'job_{model.job_id}.*.journal')):
+            if journal_path != self._journal_path(model.job_id, model.journal):
+                os.remove(journal_path)
+
+    def _fit(self, job):
+        model = JobScoringModel(job.id, job.description)
+        if self.corpus_loader is not None:
+            count = 0
+            for content_hash, tf in self.corpus_loader(job):
+                model.add_document(tf, content_hash)
+                count += 1
+            logger.info(f"Fitted scoring model for job {job.id} over {count} resumes")
+        self.save(model, merge=False)
+        return model
+
+    @contextmanager
+    def _file_lock(self, job_id):
+        # Serialises the read-merge-write of a model between processes
+        if fcntl is None:
+            yield
+            return
+        with open(f'{self._path(job_id)}.lock', 'w') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def save(self, model, merge=True):
+        """
+        Persists the resumes added to a model since its last save. Unless
+        merge is False (a fresh fit, which supersedes anything saved), the
+        resumes other processes saved meanwhile are counted in first, and
+        the new ones are appended to the journal; the whole model is written
+        instead when its description changed, the journal is full or there
+        is no saved copy to append to.
+        """
+        if not self.directory:
+            return
+        try:
+            with self._file_lock(model.job_id):
+                with model._lock:
+                    if merge:
+                        self._merge(model)
+                    if (not merge or model.rewrite or model.saved_as is None
+                            or model.journal_records + len(model.pending) >= self.compact_every):
+                        self._write(model)
+                    elif model.pending:
+                        self._append(model)
+                    model.updates = 0
+        except (OSError, ValueError) as e:
+            logger.error(f"Could not save scoring model for job {model.job_id}: {str(e)}")
+
+    def _merge(self, model):
+        # Needs the file lock
+        if model.saved_as is not None and model.saved_as == self._saved_as(model.job_id):
+            self._replay(model)
+            return
+        # Another process rewrote the model since this copy was read
+        saved = self._read(model.job_id)
+        if saved is not None:
+            model.absorb(saved)
+        else:
+            model.saved_as = None
+
+    def flush(self):
+        """Writes back every cached model with unsaved updates."""
+        with self._lock:
+            models = list(self._models.values())
+        for model in models:
+            if model.updates:
+                self.save(model)
+
+    def discard(self, job_id):
+        """Forgets a job's model, e.g. after the job was deleted."""
+        with self._lock:
+            self._models.pop(job_id, None)
+        if not self.directory:
+            return
+        paths = glob.glob(os.path.join(self.directory, f'job_{job_id}.*.journal'))
+        for path in [self._path(job_id), f'{self._path(job_id)}.lock'] + paths:
+            if os.path.exists(path):
+                os.remove(path)
+
+
+model_cache = ScoringModelCache()
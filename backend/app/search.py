@@ -0,0 +1,223 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from .models import db, Candidate
+from .feature_store import feature_store
+
+# Okapi BM25 parameters
+K1 = 1.2
+B = 0.75
+
+
+class JobSearchIndex:
+    """
+    BM25 inverted index over the resumes of one job, one document per
+    candidate, built from the search term counts in the feature store.
+
+    Postings live in flat NumPy arrays sorted by term id, plus an unsorted
+    tail for documents added since, which is merged in once it grows past an
+    eighth of the sorted part. A query scores every matching resume at once
+    with vectorized operations over the postings of its terms.
+    """
+
+    def __init__(self, job_id):
+        import numpy as np
+
+        self.job_id = job_id
+        self.max_candidate_id = 0
+        self.built_at = time.monotonic()
+        self.documents = {}  # candidate id -> document number
+        self._candidate_ids = np.zeros(0, dtype=np.int64)
+        self._lengths = np.zeros(0)
+        self._alive = np.zeros(0, dtype=bool)  # False once a candidate's resume was replaced
+        # Sorted postings: the documents of term _terms[i] are _docs[_starts[i]:_starts[i + 1]]
+        self._terms = np.zeros(0, dtype=np.uint32)
+        self._starts = np.zeros(1, dtype=np.int64)
+        self._docs = np.zeros(0, dtype=np.int32)
+        self._tfs = np.zeros(0, dtype=np.uint16)
+        # Postings added since the last merge, in arrival order
+        self._tail_terms = np.zeros(0, dtype=np.uint32)
+        self._tail_docs = np.zeros(0, dtype=np.int32)
+        self._tail_tfs = np.zeros(0, dtype=np.uint16)
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return int(self._alive.sum())
+
+    def add(self, documents, max_candidate_id=0):
+        """
+        Adds (candidate id, term ids blob, counts blob) documents; a candidate
+        already in the index has its previous resume replaced. Candidates up
+        to max_candidate_id count as loaded from the database.
+        """
+        import numpy as np
+
+        documents = list(documents)
+        with self._lock:
+            self.max_candidate_id = max(self.max_candidate_id, max_candidate_id)
+            if not documents:
+                return
+            first = len(self._candidate_ids)
+            for offset, (candidate_id, _, _) in enumerate(documents):
+                previous = self.documents.get(candidate_id)
+                if previous is not None:
+                    self._alive[previous] = False
+                self.documents[candidate_id] = first + offset
+
+            sizes = [len(ids) // 4 for _, ids, _ in documents]
+            terms = np.frombuffer(b''.join(ids for _, ids, _ in documents), dtype=np.uint32)
+            tfs = np.minimum(np.frombuffer(b''.join(c for _, _, c in documents), dtype=np.uint32), 65535)
+            docs = np.repeat(np.arange(first, first + len(documents), dtype=np.int32), sizes)
+
+            self._candidate_ids = np.concatenate([self._candidate_ids, [d[0] for d in documents]])
+            self._lengths = np.concatenate([
+                self._lengths,
+                np.bincount(docs - first, weights=tfs, minlength=len(documents))
+            ])
+            self._alive = np.concatenate([self._alive, np.ones(len(documents), dtype=bool)])
+            self._tail_terms = np.concatenate([self._tail_terms, terms])
+            self._tail_docs = np.concatenate([self._tail_docs, docs])
+            self._tail_tfs = np.concatenate([self._tail_tfs, tfs.astype(np.uint16)])
+            if len(self._tail_terms) > max(50000, len(self._docs) // 8):
+                self._merge()
+
+    def _merge(self):
+        import numpy as np
+
+        terms = np.concatenate([np.repeat(self._terms, np.diff(self._starts)), self._tail_terms])
+        docs = np.concatenate([self._docs, self._tail_docs])
+        tfs = np.concatenate([self._tfs, self._tail_tfs])
+        # Postings of replaced resumes are dropped here
+        live = self._alive[docs]
+        terms, docs, tfs = terms[live], docs[live], tfs[live]
+        order = np.argsort(terms, kind='stable')
+        terms = terms[order]
+        self._terms, first = np.unique(terms, return_index=True)
+        self._starts = np.append(first, len(terms)).astype(np.int64)
+        self._docs = docs[order]
+        self._tfs = tfs[order]
+        self._tail_terms = self._tail_terms[:0]
+        self._tail_docs = self._tail_docs[:0]
+        self._tail_tfs = self._tail_tfs[:0]
+
+    def _postings(self, term):
+        import numpy as np
+
+        position = np.searchsorted(self._terms, term)
+        if position < len(self._terms) and self._terms[position] == term:
+            start, end = self._starts[position], self._starts[position + 1]
+            docs, tfs = self._docs[start:end], self._tfs[start:end]
+        else:
+            docs, tfs = self._docs[:0], self._tfs[:0]
+        if len(self._tail_terms):
+            in_tail = self._tail_terms == term
+            docs = np.concatenate([docs, self._tail_docs[in_tail]])
+            tfs = np.concatenate([tfs, self._tail_tfs[in_tail]])
+        live = self._alive[docs]
+        return docs[live], tfs[live].astype(np.float64)
+
+    def search(self, term_ids, limit, match_all=True):
+        """
+        Ranks the resumes containing all (or, with match_all=False, any) of
+        term_ids by BM25. Returns (number of matching resumes, [(candidate id,
+        relevance), ...] for the best limit of them).
+        """
+        import numpy as np
+
+        term_ids = list(dict.fromkeys(term_ids))
+        with self._lock:
+            n_docs = len(self)
+            if not n_docs or not term_ids:
+                return 0, []
+            average_length = float(self._lengths[self._alive].mean()) or 1.0
+            scores = np.zeros(len(self._candidate_ids))
+            matched = np.zeros(len(self._candidate_ids), dtype=np.int16)
+            for term in term_ids:
+                docs, tfs = self._postings(term)
+                if not len(docs):
+                    if match_all:
+                        return 0, []
+                    continue
+                idf = math.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+                norms = K1 * (1 - B + B * self._lengths[docs] / average_length)
+                scores[docs] += idf * tfs * (K1 + 1) / (tfs + norms)
+                matched[docs] += 1
+
+            hits = np.flatnonzero(matched >= (len(term_ids) if match_all else 1))
+            total = len(hits)
+            if total > limit:
+                # Everything scoring at least the limit-th best, so ties are settled below
+                cutoff = np.partition(scores[hits], total - limit)[total - limit]
+                hits = hits[scores[hits] >= cutoff]
+            # Best first; ties go to the earlier candidate
+            hits = hits[np.lexsort((self._candidate_ids[hits], -scores[hits]))][:limit]
+            return total, list(zip(self._candidate_ids[hits].tolist(), scores[hits].tolist()))
+
+
+class SearchIndexCache:
+    """
+    In-memory LRU of per-job search indexes (SEARCH_INDEX_CACHE_SIZE). An
+    index is built on a job's first search; candidates added since, by this or
+    any other process, are picked up before each search, and the whole index
+    is rebuilt after SEARCH_INDEX_TTL seconds.
+    """
+
+    def __init__(self):
+        self.capacity = 8
+        self.ttl = 300.0
+        self._indexes = OrderedDict()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.capacity = app.config['SEARCH_INDEX_CACHE_SIZE']
+        self.ttl = app.config['SEARCH_INDEX_TTL']
+
+    def get(self, job_id):
+        """Returns the up-to-date search index of a job, building it on first use."""
+        with self._lock:
+            index = self._indexes.get(job_id)
+            if index is not None and time.monotonic() - index.built_at > self.ttl:
+                index = None
+            if index is None:
+                index = JobSearchIndex(job_id)
+                self._indexes[job_id] = index
+                while len(self._indexes) > self.capacity:
+                    self._indexes.popitem(last=False)
+            self._indexes.move_to_end(job_id)
+
+        with index._lock:
+            rows = db.session.query(Candidate.id, Candidate.content_hash).filter(
+                Candidate.job_id == job_id,
+                Candidate.id > index.max_candidate_id,
+                Candidate.content_hash.isnot(None)
+            ).all()
+            if rows:
+                terms = feature_store.get_search_term_counts(content_hash for _, content_hash in rows)
+                index.add(
+                    ((candidate_id, *terms[content_hash]) for candidate_id, content_hash in rows
+                     if content_hash in terms),
+                    max_candidate_id=max(candidate_id for candidate_id, _ in rows)
+                )
+        return index
+
+    def update(self, job_id, candidate_id, content_hash):
+        """
+        Indexes the current resume of a new or updated candidate, if the
+        job's index is loaded. Candidates saved by other processes are picked
+        up by the next search.
+        """
+        with self._lock:
+            index = self._indexes.get(job_id)
+        if index is None or not content_hash:
+            return
+        terms = feature_store.get_search_term_counts([content_hash])
+        if content_hash in terms:
+            index.add([(candidate_id, *terms[content_hash])])
+
+    def discard(self, job_id):
+        with self._lock:
+            self._indexes.pop(job_id, None)
+
+
+search_indexes = SearchIndexCache()
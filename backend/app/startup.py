@@ -0,0 +1,50 @@
+import sys
+import time
+
+# Libraries that should only be loaded on first use, never at boot
+HEAVY_MODULES = ('sklearn', 'scipy', 'numpy', 'docx', 'PyPDF2', 'pdfplumber', 'pymupdf', 'pypdfium2')
+
+
+class StartupReport:
+    """
+    Wall-clock time spent booting the app, from the first import of the app
+    package through each step of create_app, plus which heavy libraries were
+    already imported once the app was ready. Served by GET /api/startup.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self._last = self.started
+        self.stages = []
+        self.ready_seconds = None
+        self.loaded_at_ready = []
+
+    def begin(self):
+        """Called at the top of create_app; an app created later is timed on its own."""
+        if self.ready_seconds is not None:
+            self.__init__()
+        self.mark('imports')
+
+    def mark(self, stage):
+        """Records the time since the previous mark under stage."""
+        now = time.perf_counter()
+        self.stages.append((stage, round(now - self._last, 4)))
+        self._last = now
+
+    def ready(self):
+        self.ready_seconds = round(time.perf_counter() - self.started, 4)
+        self.loaded_at_ready = self.loaded_modules()
+
+    def loaded_modules(self):
+        return [name for name in HEAVY_MODULES if name in sys.modules]
+
+    def to_dict(self):
+        return {
+            'boot_seconds': self.ready_seconds,
+            'stages': [{'stage': stage, 'seconds': seconds} for stage, seconds in self.stages],
+            'heavy_modules_at_boot': self.loaded_at_ready,
+            'heavy_modules_now': self.loaded_modules()
+        }
+
+
+startup_report = StartupReport()
@@ -0,0 +1,210 @@
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timedelta
+from flask import current_app
+from .metrics import metrics
+from .models import db, Job, Task
+from .pipeline import analyze_cached, find_duplicates, score_analysis, save_candidate
+from .sandbox import in_extraction_process
+
+# Task states
+QUEUED = 'queued'
+RUNNING = 'running'
+COMPLETED = 'completed'
+FAILED = 'failed'
+
+
+def enqueue_resume(job_id, filename, original_filename, form=None, content_hash=None):
+    """
+    Records a resume-processing task and hands it to the local worker pool.
+    The task row is the source of truth, so tasks queued by one process can be
+    picked up by workers in any other process sharing the database.
+    """
+    task = Task(
+        job_id=job_id,
+        status=QUEUED,
+        filename=filename,
+        original_filename=original_filename,
+        content_hash=content_hash,
+        form_data=json.dumps(form or {})
+    )
+    with metrics.stage('commit'):
+        db.session.add(task)
+        db.session.commit()
+    task_queue.submit(task.id)
+    return task
+
+
+def claim_task(task_id):
+    """Atomically moves a queued task to running. Returns False if another worker got it first."""
+    claimed = Task.query.filter_by(id=task_id, status=QUEUED).update(
+        {'status': RUNNING, 'started_at': datetime.utcnow(), 'attempts': Task.attempts + 1},
+        synchronize_session=False
+    )
+    db.session.commit()
+    return claimed == 1
+
+
+def requeue_stale_tasks(timeout, max_attempts):
+    """
+    Queues tasks again that have been running for more than timeout seconds:
+    the worker that claimed them crashed or was restarted. Tasks already
+    tried max_attempts times fail instead. Their upload is left for the
+    upload reaper, since a worker that is only slow may still be reading it.
+    Returns (number requeued, number failed).
+    """
+    now = datetime.utcnow()
+    cutoff = now - timedelta(seconds=timeout)
+    stale = db.session.query(Task.id, Task.attempts).filter(
+        Task.status == RUNNING, Task.started_at < cutoff).all()
+    requeued = failed = 0
+    for task_id, attempts in stale:
+        # Only if no other worker requeued or finished it meanwhile
+        query = Task.query.filter(Task.id == task_id, Task.status == RUNNING, Task.started_at < cutoff)
+        if attempts >= max_attempts:
+            if query.update({'status': FAILED, 'finished_at': now,
+                             'error': f'Abandoned after {attempts} attempts that did not finish'},
+                            synchronize_session=False):
+                failed += 1
+        elif query.update({'status': QUEUED, 'started_at': None}, synchronize_session=False):
+            requeued += 1
+    db.session.commit()
+    if requeued or failed:
+        current_app.logger.warning(f"Requeued {requeued} and failed {failed} tasks left running by lost workers")
+    return requeued, failed
+
+
+def claim_next_task():
+    """
+    Claims the oldest queued task, returning its id or None when the queue is
+    empty. Tasks stuck running past TASK_TIMEOUT are queued again first.
+    """
+    requeue_stale_tasks(current_app.config['TASK_TIMEOUT'], current_app.config['TASK_MAX_ATTEMPTS'])
+    while True:
+        task = Task.query.filter_by(status=QUEUED).order_by(Task.created_at).first()
+        if task is None:
+            return None
+        task_id = task.id
+        if claim_task(task_id):
+            return task_id
+
+
+def run_task(task_id):
+    """Processes a claimed task: extraction, scoring, field extraction and the candidate upsert."""
+    task = db.session.get(Task, task_id)
+    if task is None:
+        return
+
+    started = time.perf_counter()
+    with metrics.sampled_profile('task'):
+        status = _process_task(task_id, task)
+    metrics.tasks.observe(time.perf_counter() - started, status)
+
+
+def _process_task(task_id, task):
+    file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], task.filename)
+    try:
+        job = db.session.get(Job, task.job_id)
+        if job is None:
+            raise ValueError(f'Job {task.job_id} no longer exists')
+
+        analysis, content_hash = analyze_cached(file_path, task.content_hash)
+        analysis['content_hash'] = content_hash
+        analysis['score'] = score_analysis(job, analysis)
+        form = json.loads(task.form_data) if task.form_data else {}
+        result, _ = save_candidate(job.id, analysis, task.filename, task.original_filename, form)
+        # The same or a near-identical resume already received for any job
+        result['duplicates'] = find_duplicates(analysis['content_hash'], result['candidate_id'])
+
+        task.status = COMPLETED
+        task.result = json.dumps(result)
+    except Exception as e:
+        current_app.logger.error(f"Task {task_id} failed: {str(e)}")
+        db.session.rollback()
+        task = db.session.get(Task, task_id)
+        task.status = FAILED
+        task.error = str(e)
+        if os.path.exists(file_path):
+            try:
+                os.remove(file_path)
+            except OSError:
+                pass
+    task.finished_at = datetime.utcnow()
+    with metrics.stage('commit'):
+        db.session.commit()
+    return task.status
+
+
+def task_to_dict(task):
+    return {
+        'id': task.id,
+        'job_id': task.job_id,
+        'status': task.status,
+        'filename': task.filename,
+        'result': json.loads(task.result) if task.result else None,
+        'error': task.error,
+        'created_at': task.created_at.isoformat() if task.created_at else None,
+        'started_at': task.started_at.isoformat() if task.started_at else None,
+        'finished_at': task.finished_at.isoformat() if task.finished_at else None,
+        'attempts': task.attempts
+    }
+
+
+class TaskQueue:
+    """
+    Pool of worker threads processing resume tasks for one app process.
+
+    Newly submitted task ids are handed over through an in-memory queue; when
+    idle, workers poll the database so tasks left behind by a restarted
+    process (or queued by a web process running with no workers) still run.
+    Tasks a crashed worker left running are retried after TASK_TIMEOUT, at
+    most TASK_MAX_ATTEMPTS times.
+
+    The threads start once per process and only where BACKGROUND_THREADS is
+    set: an app created again (tests, factory reuse) is served by the
+    workers already running.
+    """
+
+    def __init__(self):
+        self.app = None
+        self._queue = queue.Queue()
+        self._threads = []
+
+    def init_app(self, app):
+        self.app = app
+        if self._threads or in_extraction_process() or not app.config['BACKGROUND_THREADS']:
+            return
+        for i in range(app.config.get('TASK_WORKERS', 0)):
+            thread = threading.Thread(target=self._work, name=f'resume-worker-{i}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, task_id):
+        if self._threads:
+            self._queue.put(task_id)
+
+    def _work(self):
+        poll_interval = self.app.config.get('TASK_POLL_INTERVAL', 5.0)
+        while True:
+            try:
+                task_id = self._queue.get(timeout=poll_interval)
+            except queue.Empty:
+                task_id = None
+
+            with self.app.app_context():
+                try:
+                    if task_id is None:
+                        task_id = claim_next_task()
+                    elif not claim_task(task_id):
+                        task_id = None
+                    if task_id is not None:
+                        run_task(task_id)
+                except Exception as e:
+                    self.app.logger.error(f"Resume worker error: {str(e)}")
+                    db.session.rollback()
+
+
+task_queue = TaskQueue()
@@ -0,0 +1,194 @@
+import hashlib
+import mimetypes
+import os
+import tempfile
+import uuid
+from urllib.parse import quote
+from flask import Request, Response, current_app, request, send_file
+from werkzeug.exceptions import NotFound, RequestEntityTooLarge
+from werkzeug.security import safe_join
+from .metrics import metrics
+
+COPY_CHUNK_SIZE = 64 * 1024
+
+# Uploads are spread over subdirectories named after the first characters of
+# their random name, so no directory grows past a few thousand files
+SHARD_CHARS = 2
+
+
+def upload_name(original_filename):
+    """A new unique name for an upload, relative to the upload folder: "<shard>/<random hex>_<name>"."""
+    token = uuid.uuid4().hex
+    return f"{token[:SHARD_CHARS]}/{token}_{original_filename}"
+
+
+def upload_path(upload_folder, filename):
+    """Absolute path of an upload named by upload_name, creating its shard directory."""
+    file_path = os.path.join(upload_folder, *filename.split('/'))
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    return file_path
+
+
+class UploadFile:
+    """
+    Writable stream the multipart parser writes one uploaded file into.
+
+    Bytes go straight to a temporary file inside the upload folder while being
+    hashed and size-checked, so a finished upload is moved into place with a
+    rename instead of being copied, and its content hash is known without
+    reading the file back.
+    """
+
+    def __init__(self, directory, max_size=None):
+        fd, self.path = tempfile.mkstemp(dir=directory, prefix='.upload-', suffix='.part')
+        self._file = os.fdopen(fd, 'w+b')
+        self._hash = hashlib.sha256()
+        self.max_size = max_size
+        self.size = 0
+        self.committed = False
+
+    def write(self, data):
+        self.size += len(data)
+        if self.max_size and self.size > self.max_size:
+            # The parser gives up on the request, so nothing else will close us
+            self.close()
+            raise RequestEntityTooLarge(f'File exceeds {self.max_size} bytes')
+        self._hash.update(data)
+        return self._file.write(data)
+
+    @property
+    def content_hash(self):
+        return self._hash.hexdigest()
+
+    def commit(self, file_path):
+        """Moves the uploaded bytes to their final path."""
+        self._file.close()
+        os.replace(self.path, file_path)
+        self.committed = True
+
+    def close(self):
+        self._file.close()
+        if not self.committed and os.path.exists(self.path):
+            os.remove(self.path)
+
+    def __getattr__(self, name):
+        return getattr(self._file, name)
+
+
+class UploadRequest(Request):
+    """
+    Request class that streams uploaded files through UploadFile and applies
+    the larger BULK_MAX_CONTENT_LENGTH to bulk uploads. Each resume is capped
+    at MAX_FILE_SIZE; ZIP archives sent to the bulk endpoint are only bounded
+    by the request size (their members are capped when unpacked).
+    """
+
+    def _load_form_data(self):
+        # Parsing the form is what streams uploaded files to disk
+        with metrics.stage('save'):
+            super()._load_form_data()
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        max_size = current_app.config['MAX_FILE_SIZE']
+        if self.endpoint == 'main.upload_resumes' and filename and filename.lower().endswith('.zip'):
+            max_size = current_app.config['BULK_MAX_CONTENT_LENGTH']
+        return UploadFile(current_app.config['UPLOAD_FOLDER'], max_size)
+
+    @property
+    def max_content_length(self):
+        if not current_app:
+            return None
+        if self.endpoint == 'main.upload_resumes':
+            return current_app.config['BULK_MAX_CONTENT_LENGTH']
+        return current_app.config['MAX_CONTENT_LENGTH']
+
+
+def save_upload(file, file_path):
+    """
+    Stores an uploaded FileStorage at file_path and returns its SHA-256.
+    Streamed uploads are renamed into place; anything else is copied while
+    hashing.
+    """
+    with metrics.stage('save'):
+        if isinstance(file.stream, UploadFile):
+            file.stream.commit(file_path)
+            return file.stream.content_hash
+        with open(file_path, 'wb') as target:
+            return copy_with_hash(file.stream, target)
+
+
+def copy_with_hash(source, target, max_size=None):
+    """
+    Copies a stream in chunks, returning the SHA-256 of the bytes copied.
+    Raises RequestEntityTooLarge once more than max_size bytes were read,
+    whatever size the source claimed to have.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    for chunk in iter(lambda: source.read(COPY_CHUNK_SIZE), b''):
+        size += len(chunk)
+        if max_size and size > max_size:
+            raise RequestEntityTooLarge(f'File exceeds {max_size} bytes')
+        digest.update(chunk)
+        target.write(chunk)
+    return digest.hexdigest()
+
+
+def private_cache(response, max_age):
+    """
+    Lets the browser (but no shared cache: resumes are personal data) keep a
+    response for max_age seconds. Uploads never change once stored, so they
+    are also marked immutable.
+    """
+    response.cache_control.public = False
+    response.cache_control.no_cache = None
+    response.cache_control.private = True
+    response.cache_control.max_age = max_age
+    if max_age:
+        response.cache_control.immutable = True
+    return response
+
+
+def send_upload(filename, content_hash=None, as_attachment=False):
+    """
+    Serves an uploaded file for download or viewing. The ETag is the file's
+    content hash when known, so a revalidating browser gets a 304 instead of
+    the file, and byte ranges let PDF viewers fetch pages on demand.
+
+    With FILE_OFFLOAD set the body is left to the fronting proxy: an
+    X-Sendfile header (Apache, lighttpd) with the file's path, or an
+    X-Accel-Redirect (nginx) to ACCEL_REDIRECT_PREFIX plus the file name,
+    which must map to an internal location serving the upload folder.
+    """
+    config = current_app.config
+    file_path = safe_join(config['UPLOAD_FOLDER'], filename)
+    if file_path is None or not os.path.isfile(file_path):
+        raise NotFound()
+    max_age = config['RESUME_CACHE_MAX_AGE']
+
+    if not config['FILE_OFFLOAD']:
+        response = send_file(
+            file_path, as_attachment=as_attachment, etag=content_hash or True, max_age=max_age, conditional=True
+        )
+        # Werkzeug only announces ranges on range responses, but PDF viewers
+        # look for it on the first, full one before fetching pages lazily
+        response.accept_ranges = 'bytes'
+        return private_cache(response, max_age)
+
+    # The proxy sends the body and handles ranges; conditional requests are
+    # answered here so a 304 never reaches it
+    response = Response(mimetype=mimetypes.guess_type(filename)[0] or 'application/octet-stream')
+    if as_attachment:
+        response.headers.set('Content-Disposition', 'attachment', filename=os.path.basename(file_path))
+    if content_hash:
+        response.set_etag(content_hash)
+    else:
+        stat = os.stat(file_path)
+        response.set_etag(f'{stat.st_mtime_ns}-{stat.st_size}')
+    response = private_cache(response, max_age).make_conditional(request)
+    if response.status_code == 200:
+        if config['FILE_OFFLOAD'] == 'x-accel-redirect':
+            response.headers['X-Accel-Redirect'] = config['ACCEL_REDIRECT_PREFIX'].rstrip('/') + '/' + quote(filename)
+        else:
+            response.headers['X-Sendfile'] = os.path.abspath(file_path)
+    return response
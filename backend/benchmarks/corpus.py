@@ -0,0 +1,109 @@
+"""
+Synthetic resume documents for the benchmarks in this directory.
+
+PDFs are written by hand (one Helvetica text stream per page) and DOCX files
+with python-docx, so benchmarks need nothing beyond the app's own
+requirements to build a corpus.
+"""
+import io
+import random
+
+FIRST_NAMES = ['John', 'Priya', 'Maria', 'Wei', 'Ahmed', 'Olga', 'Carlos', 'Aisha', 'Kenji', 'Emma']
+LAST_NAMES = ['Smith', 'Sharma', 'Garcia', 'Chen', 'Khan', 'Ivanova', 'Lopez', 'Okafor', 'Tanaka', 'Brown']
+CITIES = ['Boston', 'Mumbai', 'Berlin', 'Toronto', 'Austin', 'Delhi', 'Seattle', 'London']
+SKILLS = [
+    'Python', 'Flask', 'Django', 'SQL', 'PostgreSQL', 'React', 'JavaScript', 'Docker', 'Kubernetes',
+    'AWS', 'machine learning', 'data analysis', 'REST APIs', 'Go', 'Java', 'Spring', 'Linux', 'Git',
+    'project management', 'communication', 'leadership', 'pandas', 'NumPy', 'TensorFlow'
+]
+QUALIFICATIONS = [
+    "Bachelor's in Computer Science", "Master's in Data Science", 'PhD in Physics',
+    'B.Tech in Electronics', 'MBA in Finance', 'Diploma in Web Development'
+]
+
+
+def resume_lines(rng, pages=1, lines_per_page=45):
+    """Plausible resume text: contact details up front, then experience bullets."""
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    lines = [
+        f'{first} {last}',
+        f'{first.lower()}.{last.lower()}{rng.randint(1, 999)}@example.com',
+        f'+1 555-{rng.randint(100, 999)}-{rng.randint(1000, 9999)}',
+        f'Based in {rng.choice(CITIES)}',
+        f'Education: {rng.choice(QUALIFICATIONS)}',
+    ]
+    while len(lines) < pages * lines_per_page:
+        skills = ', '.join(rng.sample(SKILLS, 4))
+        lines.append(f'Worked {rng.randint(1, 9)} years with {skills} delivering production systems')
+    return lines
+
+
+def _escape(line):
+    return line.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def make_pdf(lines, lines_per_page=45):
+    """Builds a minimal multi-page PDF with one line of text per entry in lines."""
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)] or [[]]
+    font_id = 3
+    objects = {
+        1: '<< /Type /Catalog /Pages 2 0 R >>',
+        font_id: '<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>',
+    }
+    kids = []
+    for index, page_lines in enumerate(pages):
+        page_id, content_id = 4 + 2 * index, 5 + 2 * index
+        content = 'BT /F1 11 Tf 50 760 Td 15 TL ' + ' '.join(f"({_escape(line)}) '" for line in page_lines) + ' ET'
+        objects[page_id] = (
+            f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents {content_id} 0 R '
+            f'/Resources << /Font << /F1 {font_id} 0 R >> >> >>'
+        )
+        objects[content_id] = f'<< /Length {len(content)} >>\nstream\n{content}\nendstream'
+        kids.append(f'{page_id} 0 R')
+    objects[2] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(pages)} >>"
+
+    out = bytearray(b'%PDF-1.4\n')
+    offsets = []
+    for object_id in range(1, max(objects) + 1):
+        offsets.append(len(out))
+        out += f'{object_id} 0 obj\n{objects[object_id]}\nendobj\n'.encode('latin-1')
+    xref = len(out)
+    out += f'xref\n0 {len(offsets) + 1}\n0000000000 65535 f \n'.encode()
+    for offset in offsets:
+        out += f'{offset:010d} 00000 n \n'.encode()
+    out += f'trailer\n<< /Size {len(offsets) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n'.encode()
+    return bytes(out)
+
+
+def make_pdf_corpus(count, pages=(1, 3), seed=42):
+    """Returns count synthetic resume PDFs (bytes) of between pages[0] and pages[1] pages."""
+    rng = random.Random(seed)
+    return [make_pdf(resume_lines(rng, rng.randint(*pages))) for _ in range(count)]
+
+
+def make_docx(lines):
+    """Builds a DOCX with one paragraph per entry in lines."""
+    from docx import Document
+
+    document = Document()
+    for line in lines:
+        document.add_paragraph(line)
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def make_corpus(count, pages=(1, 2, 5), kinds=('pdf', 'docx'), seed=42):
+    """
+    Returns count synthetic resumes as (kind, pages, bytes) tuples, cycling
+    through every combination of kind and page count so each is equally
+    represented.
+    """
+    rng = random.Random(seed)
+    combinations = [(kind, page_count) for kind in kinds for page_count in pages]
+    corpus = []
+    for index in range(count):
+        kind, page_count = combinations[index % len(combinations)]
+        lines = resume_lines(rng, page_count)
+        corpus.append((kind, page_count, make_pdf(lines) if kind == 'pdf' else make_docx(lines)))
+    return corpus
@@ -0,0 +1,87 @@
+"""
+Near-duplicate resume lookup (MinHash + LSH in the feature store): latency as
+the store grows, and accuracy against exact Jaccard similarity.
+
+    python benchmarks/duplicates.py --resumes 20000 --variants 500
+
+Each variant is a copy of a stored resume with a share of its lines rewritten,
+like a resume re-exported or lightly edited before being sent to another job.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.corpus import resume_lines
+from app.extractors import clean_text
+from app.feature_store import FeatureStore
+from app.fingerprints import shingles
+
+THRESHOLD = 0.8
+
+
+def jaccard(first, second):
+    a, b = shingles(first), shingles(second)
+    return len(a & b) / len(a | b) if a or b else 0.0
+
+
+def edit(rng, lines, share):
+    lines = list(lines)
+    for index in rng.sample(range(5, len(lines)), int((len(lines) - 5) * share)):
+        lines[index] = resume_lines(rng, 1, 6)[-1]
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark near-duplicate resume lookup')
+    parser.add_argument('--resumes', type=int, default=20000)
+    parser.add_argument('--variants', type=int, default=500)
+    args = parser.parse_args()
+
+    rng = random.Random(11)
+    originals = [resume_lines(rng, 1, rng.randint(15, 45)) for _ in range(args.resumes)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = FeatureStore()
+        store.open(os.path.join(directory, 'features.sqlite3'))
+
+        started = time.perf_counter()
+        checkpoints = {args.resumes // 10, args.resumes // 2, args.resumes}
+        tokens = []
+        for number, lines in enumerate(originals, 1):
+            text = '\n'.join(lines)
+            tokens.append(clean_text(text))
+            store.put(f'original-{number}', {'text': text, 'tokens': tokens[-1]})
+            if number in checkpoints:
+                timings = []
+                for probe in rng.sample(range(1, number + 1), min(200, number)):
+                    t = time.perf_counter()
+                    store.similar(f'original-{probe}', THRESHOLD)
+                    timings.append((time.perf_counter() - t) * 1000)
+                print(f"{number:>8} resumes stored: lookup p50 {statistics.median(timings):.2f} ms, "
+                      f"max {max(timings):.2f} ms")
+        print(f"Stored {args.resumes} resumes in {time.perf_counter() - started:.1f}s")
+
+        found = missed = false_matches = 0
+        for number in range(args.variants):
+            original = rng.randrange(args.resumes)
+            variant = clean_text('\n'.join(edit(rng, originals[original], rng.choice([0.0, 0.05, 0.1, 0.3, 0.6]))))
+            store.put(f'variant-{number}', {'text': '', 'tokens': variant})
+            matches = {h for h, _ in store.similar(f'variant-{number}', THRESHOLD) if h.startswith('original-')}
+            expected = jaccard(variant, tokens[original]) >= THRESHOLD
+            if f'original-{original + 1}' in matches:
+                found += expected
+                false_matches += not expected
+            else:
+                missed += expected
+        print(f"Variants at or above {THRESHOLD} Jaccard: {found} found, {missed} missed; "
+              f"{false_matches} below it reported as duplicates")
+
+
+if __name__ == '__main__':
+    main()
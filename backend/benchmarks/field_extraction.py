@@ -0,0 +1,131 @@
+"""
+Per-resume cost of contact-field extraction, before and after FieldExtractor.
+
+    python benchmarks/field_extraction.py --docs 500 --pages 10
+
+The legacy functions below are the implementations FieldExtractor replaced,
+kept here so results can be compared on the same texts and checked for
+identical output.
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.corpus import resume_lines
+from app.extractors import field_extractor
+
+
+def legacy_extract_email(text):
+    email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
+    match = re.search(email_pattern, text, re.IGNORECASE)
+    if match:
+        return match.group(0)
+    return ''
+
+
+def legacy_extract_phone(text):
+    phone_patterns = [
+        r'(?:\+?\d{1,3}[-.\s]?)?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}',
+        r'\b\d{10}\b',
+    ]
+    for pattern in phone_patterns:
+        match = re.search(pattern, text)
+        if match:
+            phone = re.sub(r'[^\d+]', '', match.group(0))
+            return phone[:15]
+    return ''
+
+
+def legacy_extract_name(text):
+    lines = text.split('\n')
+    for line in lines[:10]:
+        line = line.strip()
+        if line and 2 <= len(line.split()) <= 4:
+            words = line.split()
+            if all(word[0].isupper() for word in words if word) and not any(char.isdigit() for char in line):
+                return line
+    return ''
+
+
+def legacy_extract_address(text):
+    city_pattern = r'(?:located|based|live|living|residing|from|in)\s+(?:in|at|near)?\s+([A-Z][a-zA-Z\s]+)'
+    match = re.search(city_pattern, text, re.IGNORECASE)
+    if match:
+        return match.group(1).strip()
+    return ''
+
+
+def legacy_extract_highest_qualification(text):
+    qualifications = {
+        'PhD': r'\b(ph\.?d|doctorate)\b',
+        'Masters': r'\b(m\.?sc|master\'s|m\.?a|m\.?ed|msc|ma|ms)\b',
+        'Bachelors': r'\b(b\.?sc|bachelor\'s|b\.?a|b\.?ed|bsc|ba)\b',
+        'Diploma': r'\b(diploma|certificate)\b',
+        'High School': r'\b(h\.s|high school|secondary school)\b'
+    }
+    for level, pattern in qualifications.items():
+        if re.search(pattern, text, re.IGNORECASE):
+            return level
+    return ''
+
+
+def legacy_extract(text):
+    return {
+        'name': legacy_extract_name(text),
+        'email': legacy_extract_email(text),
+        'mobile': legacy_extract_phone(text),
+        'city': legacy_extract_address(text),
+        'highest_qualification': legacy_extract_highest_qualification(text)
+    }
+
+
+def make_texts(count, pages, seed=7):
+    """Long resumes; some put the contact details or degree only at the end."""
+    rng = random.Random(seed)
+    texts = []
+    for i in range(count):
+        lines = resume_lines(rng, pages)
+        if i % 3 == 0:
+            # Contact block and education at the bottom of the document
+            lines = lines[5:] + lines[:5]
+        elif i % 3 == 1:
+            lines = [line for line in lines if not line.startswith('Education')]
+        texts.append('\n'.join(lines))
+    return texts
+
+
+def time_per_doc(extract, texts, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for text in texts:
+            extract(text)
+        best = min(best, time.perf_counter() - started)
+    return best / len(texts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark resume field extraction')
+    parser.add_argument('--docs', type=int, default=300)
+    parser.add_argument('--pages', type=int, default=10, help='Pages of text per resume')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    texts = make_texts(args.docs, args.pages)
+    mismatches = sum(legacy_extract(text) != field_extractor.extract(text) for text in texts)
+    print(f"{len(texts)} resumes, {sum(map(len, texts)) / len(texts) / 1024:.1f} KiB of text each")
+    print(f"Outputs differing from the legacy extractors: {mismatches}")
+
+    legacy = time_per_doc(legacy_extract, texts, args.repeat)
+    current = time_per_doc(field_extractor.extract, texts, args.repeat)
+    print(f"legacy          {legacy * 1e6:10.1f} us/resume")
+    print(f"FieldExtractor  {current * 1e6:10.1f} us/resume  ({legacy / current:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""
+Latency of scoring one resume against every job (app/matching.py).
+
+    python benchmarks/job_matching.py --jobs 5000
+
+Builds the job matrix from synthetic job descriptions, times matching
+resumes against all of them, and checks the ranking against a job-by-job
+cosine similarity computed in plain Python with the same term weights.
+"""
+import argparse
+import math
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.corpus import QUALIFICATIONS, SKILLS, resume_lines
+from app.extractors import clean_text
+from app.matching import JobMatrix
+from app.scoring import term_frequencies
+
+# Job-specific wording (product and team names), so the job vocabulary grows with the number of jobs
+_SYLLABLES = ['ka', 'lo', 'mi', 'ra', 'tu', 'ven', 'zor', 'pix', 'del', 'qua', 'nim', 'bex']
+PRODUCTS = sorted({''.join(random.Random(number).sample(_SYLLABLES, 3)) for number in range(3000)})
+
+
+def job_description(rng):
+    skills = ', '.join(rng.sample(SKILLS, rng.randint(3, 8)))
+    products = ' '.join(rng.sample(PRODUCTS, 5))
+    return (f'We are hiring an engineer to work on {products}. Required skills: {skills}. '
+            f'Preferred: {rng.choice(QUALIFICATIONS)} and {rng.randint(1, 9)}+ years of experience.')
+
+
+def reference_scores(matrix, jobs, tf, limit):
+    """Cosine similarity computed job by job with the matrix's idf, as a correctness check."""
+    columns = {int(term): column for column, term in enumerate(matrix.terms)}
+
+    def weight(term, count):
+        return count * (matrix.idf[columns[term]] if term in columns else matrix.unseen_idf)
+
+    resume = {term: weight(term, count) for term, count in tf.items()}
+    resume_norm = math.sqrt(sum(value * value for value in resume.values()))
+    scores = []
+    for job_id, _, job_tf in jobs:
+        job = {term: weight(term, count) for term, count in job_tf.items()}
+        job_norm = math.sqrt(sum(value * value for value in job.values()))
+        dot = sum(value * resume.get(term, 0.0) for term, value in job.items())
+        if dot > 0:
+            scores.append((job_id, dot / (job_norm * resume_norm)))
+    scores.sort(key=lambda item: (-item[1], item[0]))
+    return scores[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark matching a resume against every job')
+    parser.add_argument('--jobs', type=int, default=5000)
+    parser.add_argument('--resumes', type=int, default=200, help='Resumes to match')
+    parser.add_argument('--limit', type=int, default=10)
+    args = parser.parse_args()
+
+    rng = random.Random(5)
+    resume_words = [word for word in PRODUCTS if rng.random() < 0.2]
+    jobs = [(job_id, f'Job {job_id}', term_frequencies(clean_text(job_description(rng))))
+            for job_id in range(1, args.jobs + 1)]
+    resumes = [
+        term_frequencies(clean_text(' '.join(resume_lines(rng, 1, rng.randint(10, 40)) + rng.sample(resume_words, 10))))
+        for _ in range(args.resumes)
+    ]
+
+    started = time.perf_counter()
+    matrix = JobMatrix(jobs)
+    print(f"Built matrix of {len(matrix)} jobs x {len(matrix.terms)} terms "
+          f"in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    timings = []
+    for tf in resumes:
+        t = time.perf_counter()
+        matrix.score(tf, args.limit)
+        timings.append((time.perf_counter() - t) * 1000)
+    timings.sort()
+    print(f"Matrix scoring:   p50 {statistics.median(timings):.2f} ms, "
+          f"p99 {timings[min(len(timings) - 1, int(len(timings) * 0.99))]:.2f} ms per resume")
+
+    sample = resumes[:20]
+    started = time.perf_counter()
+    expected = [reference_scores(matrix, jobs, tf, args.limit) for tf in sample]
+    print(f"Job-by-job loop:  {(time.perf_counter() - started) * 1000 / len(sample):.2f} ms per resume")
+
+    mismatches = 0
+    for tf, reference in zip(sample, expected):
+        results = matrix.score(tf, args.limit)
+        same = [job_id for job_id, _, _ in results] == [job_id for job_id, _ in reference] and all(
+            abs(score - round(value * 100, 2)) < 0.011 for (_, _, score), (_, value) in zip(results, reference)
+        )
+        mismatches += not same
+    if mismatches:
+        sys.exit(f"❌ {mismatches} of {len(sample)} resumes ranked jobs differently from the job-by-job loop")
+    print(f"✅ Rankings match the job-by-job cosine similarity on {len(sample)} resumes")
+
+
+if __name__ == '__main__':
+    main()
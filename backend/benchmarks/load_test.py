@@ -0,0 +1,139 @@
+"""
+Load test for a running backend: concurrent clients upload resumes and page
+through the listing routes, then per-route latency and the server's
+connection pool metrics are reported.
+
+    python run.py &   # or gunicorn, with e.g. DB_POOL_SIZE=2 DB_MAX_OVERFLOW=0
+    python benchmarks/load_test.py --url http://localhost:5000 --clients 32 --duration 30
+
+Uses only the standard library so it can run from any machine.
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.corpus import make_pdf, resume_lines
+
+
+def request(url, data=None, headers=None, method=None):
+    req = urllib.request.Request(url, data=data, headers=headers or {}, method=method)
+    with urllib.request.urlopen(req, timeout=60) as response:
+        return response.status, json.loads(response.read() or b'null')
+
+
+def multipart(fields, files):
+    """Encodes form fields and (name, filename, bytes) files as multipart/form-data."""
+    boundary = uuid.uuid4().hex
+    body = bytearray()
+    for name, value in fields.items():
+        body += f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode()
+    for name, filename, content in files:
+        body += (
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+            f'Content-Type: application/pdf\r\n\r\n'
+        ).encode()
+        body += content + b'\r\n'
+    body += f'--{boundary}--\r\n'.encode()
+    return bytes(body), {'Content-Type': f'multipart/form-data; boundary={boundary}'}
+
+
+class Client(threading.Thread):
+    """One simulated user mixing uploads (upload_ratio of requests) with listing reads."""
+
+    def __init__(self, base_url, job_id, deadline, upload_ratio, seed, results):
+        super().__init__(daemon=True)
+        self.base_url = base_url
+        self.job_id = job_id
+        self.deadline = deadline
+        self.upload_ratio = upload_ratio
+        self.rng = random.Random(seed)
+        self.results = results
+
+    def timed(self, route, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            status, body = request(*args, **kwargs)
+        except urllib.error.HTTPError as e:
+            status, body = e.code, None
+        except Exception:
+            status, body = 'error', None
+        self.results.append((route, status, time.perf_counter() - started))
+        return body
+
+    def run(self):
+        while time.time() < self.deadline:
+            if self.rng.random() < self.upload_ratio:
+                data, headers = multipart({}, [('file', f'load_{uuid.uuid4().hex}.pdf', make_pdf(resume_lines(self.rng)))])
+                self.timed('upload', f'{self.base_url}/api/jobs/{self.job_id}/upload-resume', data, headers)
+            else:
+                route = self.rng.choice(['jobs', 'candidates', 'top-resumes'])
+                if route == 'jobs':
+                    self.timed(route, f'{self.base_url}/api/jobs')
+                elif route == 'candidates':
+                    body = self.timed(route, f'{self.base_url}/api/jobs/{self.job_id}/candidates?limit=50')
+                    if body and body.get('next_cursor'):
+                        self.timed('candidates (next page)',
+                                   f"{self.base_url}/api/jobs/{self.job_id}/candidates?limit=50&cursor={body['next_cursor']}")
+                else:
+                    self.timed(route, f'{self.base_url}/api/top-resumes?limit=20')
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the upload and listing routes')
+    parser.add_argument('--url', default='http://localhost:5000')
+    parser.add_argument('--clients', type=int, default=16, help='Concurrent clients')
+    parser.add_argument('--duration', type=float, default=20, help='Seconds to run')
+    parser.add_argument('--upload-ratio', type=float, default=0.2, help='Share of requests that upload a resume')
+    parser.add_argument('--job-id', type=int, help='Job to use (default: create one)')
+    args = parser.parse_args()
+
+    base_url = args.url.rstrip('/')
+    job_id = args.job_id
+    if job_id is None:
+        payload = json.dumps({'title': 'Load test', 'description': 'Python developer with Flask, SQL and Docker'})
+        _, body = request(f'{base_url}/api/jobs', payload.encode(), {'Content-Type': 'application/json'})
+        job_id = body['job']['id']
+    print(f"Load testing {base_url} (job {job_id}) with {args.clients} clients for {args.duration:.0f}s")
+
+    results = []
+    deadline = time.time() + args.duration
+    clients = [Client(base_url, job_id, deadline, args.upload_ratio, seed, results) for seed in range(args.clients)]
+    started = time.perf_counter()
+    for client in clients:
+        client.start()
+    for client in clients:
+        client.join()
+    elapsed = time.perf_counter() - started
+
+    print(f"\n{len(results)} requests in {elapsed:.1f}s ({len(results) / elapsed:.1f} req/s)")
+    print(f"{'route':<24}{'count':>7}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for route in sorted({r for r, _, _ in results}):
+        timings = sorted(seconds * 1000 for r, _, seconds in results if r == route)
+        errors = sum(1 for r, status, _ in results if r == route and not (isinstance(status, int) and status < 400))
+        print(f"{route:<24}{len(timings):>7}{errors:>8}{statistics.median(timings):>10.1f}"
+              f"{percentile(timings, 0.95):>10.1f}{percentile(timings, 0.99):>10.1f}")
+
+    try:
+        _, body = request(f'{base_url}/api/db/pool')
+        print("\nServer connection pool:")
+        print(json.dumps(body['pool'], indent=2))
+    except Exception as e:
+        print(f"\nCould not read pool metrics: {str(e)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""
+Compares the installed PDF text extraction backends on a synthetic corpus.
+
+    python benchmarks/pdf_backends.py --docs 200 --max-pages 5
+
+Each document is parsed from memory, as the app does with memory-mapped
+uploads, by every backend alone and by the engine with its fallback order.
+"""
+import argparse
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.corpus import make_pdf_corpus
+from app.pdf_engine import BACKENDS, PdfExtractionEngine
+
+
+def run(engine, documents):
+    started = time.perf_counter()
+    chars = 0
+    for document in documents:
+        chars += len(engine.extract(io.BytesIO(document)))
+    return time.perf_counter() - started, chars
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark PDF extraction backends')
+    parser.add_argument('--docs', type=int, default=100, help='Number of synthetic resumes')
+    parser.add_argument('--min-pages', type=int, default=1)
+    parser.add_argument('--max-doc-pages', type=int, default=8, help='Longest synthetic resume')
+    parser.add_argument('--max-pages', type=int, default=5, help='Engine page limit')
+    args = parser.parse_args()
+
+    documents = make_pdf_corpus(args.docs, pages=(args.min_pages, args.max_doc_pages))
+    print(f"Corpus: {len(documents)} PDFs, {sum(map(len, documents)) / 1024:.0f} KiB")
+
+    names = [name for name, backend in BACKENDS.items() if backend.available()]
+    for name in names + ['engine']:
+        order = ','.join(names) if name == 'engine' else name
+        engine = PdfExtractionEngine(backend_order=order, max_pages=args.max_pages, timeout=0)
+        elapsed, chars = run(engine, documents)
+        print(f"{name:<12} {elapsed:8.3f}s  {len(documents) / elapsed:8.1f} docs/s  {chars:>10} chars")
+
+    for name in BACKENDS:
+        if name not in names:
+            print(f"{name:<12} not installed")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""
+Throughput of each scoring engine (app/scorers.py) on a synthetic corpus.
+
+    python benchmarks/scorers.py --resumes 50000
+
+Resumes get section headings so section-aware scoring has something to
+weigh. Their counts are computed once, as the feature store does on upload;
+each engine then scores the whole corpus in one vectorized pass (as a rescore
+does) and resumes one at a time (as uploads do), and the two must agree.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.corpus import SKILLS, resume_lines
+from app.extractors import clean_text
+from app.feature_store import encode_term_counts
+from app.scorers import SCORERS
+from app.scoring import fit_and_score, search_term_frequencies, section_term_frequencies, term_frequencies
+
+
+class Job:
+    # Stands in for the Job model; engines only read its id and description
+    def __init__(self, description):
+        self.id = 1
+        self.description = description
+
+
+def job_description(rng):
+    required = ', '.join(rng.sample(SKILLS, 4))
+    optional = ', '.join(rng.sample(SKILLS, 3))
+    return (f'Senior engineer for our data platform.\nRequirements:\n- {required}\n'
+            f'- 3+ years of production experience\nNice to have: {optional}.')
+
+
+def resume_text(rng):
+    lines = resume_lines(rng, 1, rng.randint(12, 40))
+    split = rng.randint(6, len(lines) - 2)
+    return '\n'.join(lines[:5] + ['Professional Experience'] + lines[5:split] + ['Education'] + lines[split:])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the scoring engines')
+    parser.add_argument('--resumes', type=int, default=50000)
+    parser.add_argument('--single', type=int, default=2000, help='Resumes scored one at a time per engine')
+    args = parser.parse_args()
+
+    rng = random.Random(3)
+    job = Job(job_description(rng))
+    texts = [resume_text(rng) for _ in range(args.resumes)]
+
+    print(f"Counts computed once per resume (feature store), {args.resumes} resumes:")
+    analyses = []
+    features = {'terms': [], 'search terms': [], 'section terms': []}
+    timings = dict.fromkeys(features, 0.0)
+    for text in texts:
+        started = time.perf_counter()
+        tokens = clean_text(text)
+        tf = term_frequencies(tokens)
+        features['terms'].append(encode_term_counts(tf))
+        timings['terms'] += time.perf_counter() - started
+        started = time.perf_counter()
+        features['search terms'].append(encode_term_counts(search_term_frequencies(text)))
+        timings['search terms'] += time.perf_counter() - started
+        started = time.perf_counter()
+        features['section terms'].append(encode_term_counts(section_term_frequencies(text)))
+        timings['section terms'] += time.perf_counter() - started
+        analyses.append(({'text': text, 'tokens': tokens}, tf))
+    for kind, seconds in timings.items():
+        print(f"  {kind:<14}{seconds * 1e6 / args.resumes:>8.1f} us per resume")
+
+    model, _ = fit_and_score(job.id, job.description, features['terms'])
+    stored = {
+        'tfidf': features['terms'], 'bm25': features['terms'],
+        'skills': features['search terms'], 'sections': features['section terms']
+    }
+
+    print(f"\n{'engine':<10}{'batch resumes/s':>17}{'single resumes/s':>18}")
+    mismatches = 0
+    for name, scorer in SCORERS.items():
+        started = time.perf_counter()
+        scores = scorer.score_all(job, model, stored[name])
+        batch = args.resumes / (time.perf_counter() - started)
+
+        sample = analyses[:args.single]
+        started = time.perf_counter()
+        single = [scorer.score(job, model, analysis, tf) for analysis, tf in sample]
+        one_by_one = len(sample) / (time.perf_counter() - started)
+        print(f"{name:<10}{batch:>17,.0f}{one_by_one:>18,.0f}")
+        mismatches += sum(1 for a, b in zip(single, scores) if abs(a - b) > 0.011)
+
+    if mismatches:
+        sys.exit(f"❌ {mismatches} resumes scored differently one at a time than in the batch")
+    print("✅ Batch and one-at-a-time scores agree for every engine")
+
+
+if __name__ == '__main__':
+    main()
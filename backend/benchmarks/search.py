@@ -0,0 +1,124 @@
+"""
+Latency of full-text candidate search (app/search.py) over a large job.
+
+    python benchmarks/search.py --resumes 100000
+
+Builds a job's BM25 index from synthetic resume text the way the app does
+(search term counts as stored in the feature store), times queries, and
+checks the ranking against a straightforward per-resume BM25 on a sample.
+"""
+import argparse
+import math
+import os
+import random
+import statistics
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.corpus import resume_lines
+from app.feature_store import encode_term_counts
+from app.scoring import search_term_frequencies, search_terms, term_id
+from app.search import B, K1, JobSearchIndex
+
+QUERIES = [
+    'kubernetes go',
+    'python',
+    'tensorflow kubernetes aws',
+    'phd physics',
+    'c++ linux',
+    'machine learning pandas numpy',
+]
+
+
+def make_documents(count, seed=7):
+    rng = random.Random(seed)
+    documents = []
+    for candidate_id in range(1, count + 1):
+        lines = resume_lines(rng, 1, rng.randint(8, 30))
+        if rng.random() < 0.05:
+            lines.append('Systems programming in C++ on embedded Linux')
+        documents.append((candidate_id, '\n'.join(lines)))
+    return documents
+
+
+def reference_search(texts, query, limit, match_all=True):
+    """BM25 computed term by term for every resume, as a correctness check."""
+    terms = list(dict.fromkeys(search_terms(query)))
+    counts = {candidate_id: Counter(search_terms(text)) for candidate_id, text in texts}
+    average_length = sum(sum(c.values()) for c in counts.values()) / len(counts)
+    df = {term: sum(1 for c in counts.values() if term in c) for term in terms}
+    scores = {}
+    for candidate_id, c in counts.items():
+        present = [term for term in terms if term in c]
+        if not present or (match_all and len(present) < len(terms)):
+            continue
+        length = sum(c.values())
+        score = 0.0
+        for term in present:
+            idf = math.log(1 + (len(counts) - df[term] + 0.5) / (df[term] + 0.5))
+            score += idf * c[term] * (K1 + 1) / (c[term] + K1 * (1 - B + B * length / average_length))
+        scores[candidate_id] = score
+    ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+    return len(ranked), ranked[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark BM25 candidate search')
+    parser.add_argument('--resumes', type=int, default=100000)
+    parser.add_argument('--limit', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=50, help='Executions per query')
+    parser.add_argument('--check', type=int, default=3000, help='Resumes in the correctness sample')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    documents = make_documents(args.resumes)
+    blobs = [(candidate_id, *encode_term_counts(search_term_frequencies(text))) for candidate_id, text in documents]
+    print(f"Generated {len(documents)} resumes in {time.perf_counter() - started:.1f}s")
+
+    started = time.perf_counter()
+    index = JobSearchIndex(job_id=1)
+    index.add(blobs)
+    postings = len(index._docs) + len(index._tail_docs)
+    print(f"Built index in {time.perf_counter() - started:.2f}s ({postings} postings)")
+
+    print(f"\n{'query':<34}{'matches':>9}{'p50 ms':>10}{'p99 ms':>10}")
+    for query in QUERIES:
+        term_ids = [term_id(term) for term in search_terms(query)]
+        timings = []
+        for _ in range(args.repeat):
+            t = time.perf_counter()
+            total, _ = index.search(term_ids, args.limit)
+            timings.append((time.perf_counter() - t) * 1000)
+        timings.sort()
+        print(f"{query:<34}{total:>9}{statistics.median(timings):>10.2f}"
+              f"{timings[min(len(timings) - 1, int(len(timings) * 0.99))]:>10.2f}")
+
+    # Incremental adds land in the unsorted tail until it is merged
+    extra = [(args.resumes + candidate_id, *encode_term_counts(search_term_frequencies(text)))
+             for candidate_id, text in make_documents(1000, seed=8)]
+    started = time.perf_counter()
+    index.add(extra)
+    print(f"\nAdded 1000 resumes in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    sample = documents[:args.check]
+    sample_index = JobSearchIndex(job_id=2)
+    sample_index.add(blobs[:args.check])
+    mismatches = 0
+    for query in QUERIES:
+        for match_all in (True, False):
+            total, hits = sample_index.search([term_id(t) for t in search_terms(query)], args.limit, match_all)
+            expected_total, expected = reference_search(sample, query, args.limit, match_all)
+            same = total == expected_total and [c for c, _ in hits] == [c for c, _ in expected] and all(
+                abs(score - reference) < 1e-3 * max(1.0, reference) for (_, score), (_, reference) in zip(hits, expected)
+            )
+            mismatches += not same
+    if mismatches:
+        sys.exit(f"❌ {mismatches} queries ranked differently from the reference BM25")
+    print(f"✅ Rankings match the reference BM25 on {len(sample)} resumes")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,199 @@
+"""
+Compares gunicorn worker classes at a fixed number of worker processes:
+slow clients trickle resume uploads in while other clients hammer the cheap
+read routes (GET /api/jobs and /api/top-resumes), and the read throughput
+and latency of each serving mode are reported.
+
+    DATABASE_URL=postgresql://... python benchmarks/serving_modes.py --workers 2 --slow-uploads 4
+
+Each mode gets its own gunicorn started with gunicorn.conf.py. With sync
+workers every slow upload occupies a whole worker, so reads wait behind
+them; gthread (and gevent, when installed) keep serving reads meanwhile.
+"""
+import argparse
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.corpus import make_pdf, resume_lines
+from benchmarks.load_test import multipart, percentile, request
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def start_server(mode, args):
+    env = dict(
+        os.environ,
+        GUNICORN_WORKER_CLASS=mode,
+        WEB_CONCURRENCY=str(args.workers),
+        GUNICORN_THREADS=str(args.threads),
+        GUNICORN_BIND=f'127.0.0.1:{args.port}',
+    )
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'run:app'],
+        cwd=BACKEND, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f'gunicorn ({mode}) exited with status {server.returncode}')
+        try:
+            request(f'http://127.0.0.1:{args.port}/api/jobs')
+            return server
+        except (urllib.error.URLError, ConnectionError):
+            time.sleep(0.5)
+    server.terminate()
+    raise RuntimeError(f'gunicorn ({mode}) did not start within 60s')
+
+
+class SlowUploader(threading.Thread):
+    """A client on a slow link: each upload body takes upload_seconds to send."""
+
+    def __init__(self, port, job_id, deadline, upload_seconds, seed):
+        super().__init__(daemon=True)
+        self.port = port
+        self.job_id = job_id
+        self.deadline = deadline
+        self.upload_seconds = upload_seconds
+        self.seed = seed
+        self.completed = 0
+        self.failed = 0
+
+    def upload(self, body, headers):
+        head = (
+            f'POST /api/jobs/{self.job_id}/upload-resume HTTP/1.1\r\nHost: 127.0.0.1\r\n'
+            f"Content-Type: {headers['Content-Type']}\r\nContent-Length: {len(body)}\r\nConnection: close\r\n\r\n"
+        )
+        chunks = 20
+        size = -(-len(body) // chunks)
+        with socket.create_connection(('127.0.0.1', self.port), timeout=120) as conn:
+            conn.sendall(head.encode())
+            for start in range(0, len(body), size):
+                conn.sendall(body[start:start + size])
+                time.sleep(self.upload_seconds / chunks)
+            status_line = conn.makefile('rb').readline()
+        return int(status_line.split()[1])
+
+    def run(self):
+        rng = random.Random(self.seed)
+        while time.time() < self.deadline:
+            body, headers = multipart({}, [('file', f'slow_{self.seed}.pdf', make_pdf(resume_lines(rng, 1, 60)))])
+            try:
+                status = self.upload(body, headers)
+                if status < 400:
+                    self.completed += 1
+                else:
+                    self.failed += 1
+            except OSError:
+                self.failed += 1
+
+
+class Reader(threading.Thread):
+    def __init__(self, base_url, deadline, results):
+        super().__init__(daemon=True)
+        self.base_url = base_url
+        self.deadline = deadline
+        self.results = results
+
+    def run(self):
+        routes = ('/api/jobs', '/api/top-resumes?limit=20')
+        index = 0
+        while time.time() < self.deadline:
+            started = time.perf_counter()
+            try:
+                request(self.base_url + routes[index % len(routes)])
+                ok = True
+            except Exception:
+                ok = False
+            self.results.append((ok, time.perf_counter() - started))
+            index += 1
+
+
+def run_mode(mode, args):
+    server = start_server(mode, args)
+    try:
+        base_url = f'http://127.0.0.1:{args.port}'
+        payload = json.dumps({'title': f'Serving mode {mode}', 'description': 'Python developer with Flask and SQL'})
+        _, body = request(f'{base_url}/api/jobs', payload.encode(), {'Content-Type': 'application/json'})
+        job_id = body['job']['id']
+
+        deadline = time.time() + args.duration
+        uploaders = [SlowUploader(args.port, job_id, deadline, args.upload_seconds, seed)
+                     for seed in range(args.slow_uploads)]
+        results = []
+        readers = [Reader(base_url, deadline, results) for _ in range(args.readers)]
+        started = time.perf_counter()
+        for thread in uploaders + readers:
+            thread.start()
+        for thread in readers:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        for thread in uploaders:
+            thread.join(timeout=args.upload_seconds * 3)
+
+        timings = sorted(seconds * 1000 for ok, seconds in results if ok)
+        return {
+            'reads_per_second': len(timings) / elapsed,
+            'p50_ms': statistics.median(timings) if timings else None,
+            'p99_ms': percentile(timings, 0.99) if timings else None,
+            'read_errors': sum(1 for ok, _ in results if not ok),
+            'uploads': sum(thread.completed for thread in uploaders),
+            'upload_errors': sum(thread.failed for thread in uploaders),
+        }
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare gunicorn serving modes under slow uploads')
+    parser.add_argument('--modes', default='sync,gthread,gevent', help='Worker classes to compare')
+    parser.add_argument('--workers', type=int, default=2, help='Worker processes (the same for every mode)')
+    parser.add_argument('--threads', type=int, default=8, help='Threads per gthread worker')
+    parser.add_argument('--slow-uploads', type=int, default=4, help='Clients uploading over a slow link')
+    parser.add_argument('--upload-seconds', type=float, default=2.0, help='Time each upload body takes to send')
+    parser.add_argument('--readers', type=int, default=16, help='Clients calling the read routes')
+    parser.add_argument('--duration', type=float, default=15, help='Seconds per mode')
+    parser.add_argument('--port', type=int, default=5077)
+    args = parser.parse_args()
+
+    outcomes = {}
+    for mode in args.modes.split(','):
+        if mode == 'gevent':
+            try:
+                import gevent  # noqa: F401
+            except ImportError:
+                print("Skipping gevent: not installed (pip install gevent psycogreen)")
+                continue
+        print(f"Running {mode} with {args.workers} workers, {args.slow_uploads} slow uploads "
+              f"and {args.readers} readers for {args.duration:.0f}s...")
+        outcomes[mode] = run_mode(mode, args)
+
+    print(f"\n{'mode':<10}{'reads/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'read errors':>13}{'uploads':>9}")
+    for mode, outcome in outcomes.items():
+        p50 = f"{outcome['p50_ms']:.1f}" if outcome['p50_ms'] is not None else '-'
+        p99 = f"{outcome['p99_ms']:.1f}" if outcome['p99_ms'] is not None else '-'
+        print(f"{mode:<10}{outcome['reads_per_second']:>10.1f}{p50:>10}{p99:>10}"
+              f"{outcome['read_errors']:>13}{outcome['uploads']:>9}")
+
+    if 'sync' in outcomes and len(outcomes) > 1:
+        best = max((m for m in outcomes if m != 'sync'), key=lambda m: outcomes[m]['reads_per_second'])
+        gain = outcomes[best]['reads_per_second'] / max(outcomes['sync']['reads_per_second'], 1e-9)
+        if gain > 1:
+            print(f"✅ {best} served {gain:.1f}x the reads per second of sync workers")
+        else:
+            print(f"❌ {best} did not serve more reads per second than sync workers ({gain:.2f}x)")
+
+
+if __name__ == '__main__':
+    main()
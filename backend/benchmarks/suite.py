@@ -0,0 +1,291 @@
+"""
+Benchmark suite for the resume hot paths, with a baseline to catch regressions.
+
+    python benchmarks/suite.py                  # run, then compare with benchmarks/baseline.json
+    python benchmarks/suite.py --save-baseline  # record this run as the new baseline
+    python benchmarks/suite.py --filter fields  # only benchmarks whose name contains "fields"
+
+A corpus of synthetic PDF and DOCX resumes of 1, 2 and 5 pages is generated
+from a fixed seed (benchmarks/corpus.py). Each hot path is then timed on its
+own:
+- text extraction per format and length
+- cleaning
+- the legacy calculate_score and the incremental score_analysis
+- every field extractor
+- a full upload through the Flask test client against a throwaway SQLite
+  database: the upload_resume request, then the queued task that parses,
+  scores and stores the resume
+
+Each benchmark reports throughput, p50/p99 latency and the peak memory
+allocated by one call. Memory is traced with tracemalloc in a separate pass,
+so tracing does not slow the timed one. A benchmark regresses when its p50
+or peak memory exceeds the baseline by more than --tolerance. Timings only
+compare with a baseline recorded on the same machine.
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.corpus import make_corpus
+from benchmarks.load_test import percentile
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+JOB_DESCRIPTION = (
+    'Senior Python engineer for our data platform.\nRequirements:\n- Python, Flask and SQL\n'
+    '- Docker and Kubernetes in production\nNice to have: AWS, pandas or machine learning.'
+)
+
+# Differences below these are noise, whatever the tolerance
+MIN_P50_DELTA_MS = 0.01
+MIN_PEAK_DELTA_KB = 16
+
+
+def measure(function, inputs, memory_inputs, warmup=None, rounds=1):
+    """
+    Times function over inputs, then traces its peak allocation over
+    memory_inputs. One call on warmup (default: the first input) first loads
+    lazy imports and caches. With several rounds the fastest one is
+    reported, which damps noise from the rest of the machine.
+    """
+    function(inputs[0] if warmup is None else warmup)
+    best = None
+    for _ in range(rounds):
+        latencies = []
+        started = time.perf_counter()
+        for item in inputs:
+            call_started = time.perf_counter()
+            function(item)
+            latencies.append(time.perf_counter() - call_started)
+        elapsed = time.perf_counter() - started
+        if best is None or elapsed < best[1]:
+            best = (latencies, elapsed)
+    latencies, elapsed = best
+
+    peak = 0
+    tracemalloc.start()
+    try:
+        for item in memory_inputs:
+            current = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            function(item)
+            peak = max(peak, tracemalloc.get_traced_memory()[1] - current)
+    finally:
+        tracemalloc.stop()
+
+    latencies.sort()
+    return {
+        'calls': len(inputs),
+        'per_second': round(len(inputs) / elapsed, 1),
+        'p50_ms': round(statistics.median(latencies) * 1000, 4),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 4),
+        'peak_kb': round(peak / 1024, 1),
+    }
+
+
+def function_benchmarks(corpus, memory_samples):
+    """(name, function, inputs, memory inputs) of the hot paths that need no application, and the resume texts."""
+    from app.extractors import calculate_score, clean_text, extract_text_from_docx, extract_text_from_pdf, field_extractor
+
+    extractors = {'pdf': extract_text_from_pdf, 'docx': extract_text_from_docx}
+    benchmarks = []
+    texts = []
+    for kind, extract in extractors.items():
+        for page_count in sorted({p for k, p, _ in corpus if k == kind}):
+            documents = [data for k, p, data in corpus if k == kind and p == page_count]
+            benchmarks.append((
+                f'extract_text_from_{kind}[{page_count}p]', lambda data, extract=extract: extract(io.BytesIO(data)),
+                documents, documents[:memory_samples]
+            ))
+            texts.extend(extract(io.BytesIO(data)) for data in documents)
+
+    benchmarks.append(('clean_text', clean_text, texts, texts[:memory_samples]))
+    benchmarks.append(('calculate_score', lambda text: calculate_score(text, JOB_DESCRIPTION),
+                       texts, texts[:memory_samples]))
+    for field, extractor in (
+        ('name', field_extractor.name),
+        ('email', field_extractor.email),
+        ('mobile', field_extractor.phone),
+        ('city', field_extractor.city),
+        ('highest_qualification', field_extractor.highest_qualification)
+    ):
+        benchmarks.append((f'fields.{field}', extractor, texts, texts[:memory_samples]))
+    return benchmarks, texts
+
+
+def app_benchmarks(directory, uploads, memory_uploads, warmup, texts, memory_samples, rounds):
+    """
+    Runs the benchmarks that go through the application, against a fresh
+    SQLite database, feature store and upload folder inside directory.
+    Uploads and tasks change the database, so they run a single round.
+    """
+    os.environ.update(
+        DATABASE_URL=f"sqlite:///{os.path.join(directory, 'bench.db')}",
+        FEATURE_STORE_PATH=os.path.join(directory, 'features.sqlite3'),
+        SCORING_MODEL_DIR=os.path.join(directory, 'scoring_models'),
+        TASK_WORKERS='0',
+        UPLOAD_REAP_INTERVAL='0',
+    )
+    from app import create_app, db
+    from app.extractors import clean_text
+    from app.models import Job
+    from app.pipeline import score_analysis
+    from app.scoring import model_cache
+    from app.tasks import run_task
+
+    app = create_app()
+    app.config['UPLOAD_FOLDER'] = os.path.join(directory, 'uploads')
+    os.makedirs(app.config['UPLOAD_FOLDER'])
+    client = app.test_client()
+    job_id = client.post('/api/jobs', json={'title': 'Benchmark', 'description': JOB_DESCRIPTION}).json['job']['id']
+
+    task_ids = []
+
+    def upload(item):
+        kind, _, data = item
+        response = client.post(
+            f'/api/jobs/{job_id}/upload-resume', data={'file': (io.BytesIO(data), f'resume.{kind}')},
+            content_type='multipart/form-data'
+        )
+        if response.status_code != 202:
+            raise RuntimeError(f'Upload failed with {response.status_code}: {response.get_data(as_text=True)}')
+        task_ids.append(response.json['task_id'])
+
+    def process(task_id):
+        with app.app_context():
+            run_task(task_id)
+
+    results = {'upload_resume': measure(upload, uploads, memory_uploads, warmup)}
+    # Every upload above queued a task, in order
+    warmup_task, timed, traced = task_ids[0], task_ids[1:len(uploads) + 1], task_ids[len(uploads) + 1:]
+    results['run_task'] = measure(process, timed, traced, warmup_task)
+
+    analyses = [{'text': text, 'tokens': clean_text(text)} for text in texts]
+    with app.app_context():
+        job = db.session.get(Job, job_id)
+        results['score_analysis'] = measure(lambda analysis: score_analysis(job, analysis),
+                                            analyses, analyses[:memory_samples], rounds=rounds)
+    # Write pending models now rather than at exit, when directory is gone
+    model_cache.flush()
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Lines describing every benchmark slower or hungrier than the baseline."""
+    regressions = []
+    for name, result in results.items():
+        base = baseline['results'].get(name)
+        if not base:
+            continue
+        for key, min_delta in (('p50_ms', MIN_P50_DELTA_MS), ('peak_kb', MIN_PEAK_DELTA_KB)):
+            if result[key] > base[key] * (1 + tolerance) and result[key] - base[key] > min_delta:
+                regressions.append(f"{name}: {key} {base[key]} -> {result[key]} (+{result[key] / base[key] - 1:.0%})"
+                                   if base[key] else f"{name}: {key} {base[key]} -> {result[key]}")
+    return regressions
+
+
+def environment():
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the resume processing hot paths')
+    parser.add_argument('--docs', type=int, default=60, help='Synthetic resumes per run (split across formats and lengths)')
+    parser.add_argument('--uploads', type=int, default=30, help='Resumes sent through the upload request')
+    parser.add_argument('--rounds', type=int, default=5, help='Timed passes per benchmark; the fastest is kept')
+    parser.add_argument('--memory-samples', type=int, default=10, help='Calls traced for peak memory per benchmark')
+    parser.add_argument('--filter', default='', help='Only run benchmarks whose name contains this')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true', help='Write the results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.5, help='Allowed slowdown or memory growth (0.5 = 50%%)')
+    parser.add_argument('--output', help='Also write the results as JSON here')
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.docs)
+    # Uploads get resumes of their own, so none is already in the feature store
+    extra = make_corpus(args.uploads + args.memory_samples + 1, seed=7)
+    warmup, uploads, memory_uploads = extra[0], extra[1:args.uploads + 1], extra[args.uploads + 1:]
+    print(f"Corpus: {len(corpus)} resumes ({', '.join(sorted({f'{k} {p}p' for k, p, _ in corpus}))})")
+
+    results = {}
+    benchmarks, texts = function_benchmarks(corpus, args.memory_samples)
+    for name, function, inputs, memory_inputs in benchmarks:
+        if args.filter in name:
+            results[name] = measure(function, inputs, memory_inputs, rounds=args.rounds)
+            print(f"  {name}")
+
+    if any(args.filter in name for name in ('upload_resume', 'run_task', 'score_analysis')):
+        directory = tempfile.mkdtemp(prefix='resume-bench-')
+        try:
+            app_results = app_benchmarks(
+                directory, uploads, memory_uploads, warmup, texts, args.memory_samples, args.rounds
+            )
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+        for name, result in app_results.items():
+            if args.filter in name:
+                results[name] = result
+                print(f"  {name}")
+
+    baseline = None
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    print(f"\n{'benchmark':<34}{'calls':>6}{'per sec':>11}{'p50 ms':>10}{'p99 ms':>10}{'peak KB':>10}{'p50 vs base':>13}")
+    for name, result in results.items():
+        base = baseline['results'].get(name) if baseline else None
+        ratio = f"{result['p50_ms'] / base['p50_ms']:.2f}x" if base and base['p50_ms'] else '-'
+        print(f"{name:<34}{result['calls']:>6}{result['per_second']:>11,.1f}{result['p50_ms']:>10.3f}"
+              f"{result['p99_ms']:>10.3f}{result['peak_kb']:>10.1f}{ratio:>13}")
+
+    report = {
+        'recorded_at': datetime.utcnow().isoformat(timespec='seconds'),
+        'environment': environment(),
+        'docs': args.docs,
+        'uploads': args.uploads,
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+            f.write('\n')
+        print(f"\n✅ Baseline written to {args.baseline}")
+        return
+    if baseline is None:
+        print(f"\nNo baseline at {args.baseline}; record one with --save-baseline")
+        return
+
+    if baseline['environment'] != environment():
+        print(f"\nNote: the baseline was recorded on {baseline['environment']['platform']} "
+              f"({baseline['environment']['cpu_count']} CPUs); timings may not compare")
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"\n❌ {len(regressions)} regressions beyond {args.tolerance:.0%} of the baseline:")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
+    print(f"\n✅ No benchmark regressed beyond {args.tolerance:.0%} of the baseline")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+"""
+Checks clean_text against the NLTK-based clean_text it replaced, and
+measures both. The legacy code is reproduced as it was: word_tokenize for
+the tokens and calculate_score's two-document TfidfVectorizer fit for the
+scores, which the app's incremental JobScoringModel must match for a job
+holding the description and one resume. Needs nltk and scikit-learn.
+
+    python benchmarks/tokenizer.py --docs 1000 --tolerance 0.01
+
+Exits with status 1 if any token stream differs from the legacy one, or any
+resume's score against any job differs from the legacy score by more than
+the tolerance (in score points).
+
+word_tokenize splits "cannot", "gimme", "gonna", "gotta", "lemme" and
+"wanna" in two ("gon" "na"), and the legacy stopword and length filter then
+left only "gim", "gon", "got", "lem" and "wan" ("can" and "not" are both
+stopwords). clean_text maps these words the same way; EDGE_CASES covers
+them. No other word_tokenize rule applies to the letters-only text left
+after cleaning.
+"""
+import argparse
+import random
+import re
+import string
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.corpus import resume_lines, SKILLS
+from app.extractors import clean_text, clean_texts, stop_words
+from app.scoring import JobScoringModel, term_frequencies
+
+try:
+    from nltk.tokenize import word_tokenize
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.metrics.pairwise import cosine_similarity
+except ImportError as e:
+    sys.exit(f"The legacy tokenizer and scorer need nltk and scikit-learn: {e}")
+
+JOB_DESCRIPTIONS = [
+    'Senior Python developer with Flask, SQL and REST APIs. 5+ years, AWS & Docker a plus.',
+    'Data scientist: machine learning, pandas, NumPy, TensorFlow; PhD or Master\'s preferred.',
+    'Frontend engineer (React/JavaScript) - see https://example.com/jobs/42 for details.',
+    'Project manager with leadership & communication skills, Agile/Scrum certified.',
+]
+
+# Punctuation, digits, URLs and non-ASCII text the tokenizer must handle the same way
+EDGE_CASES = [
+    'Visit http://example.com/a?b=1 or https://x.io for more',
+    "Don't forget: e-mail, co-operate, C++ & C#, node.js, python3.11",
+    'Résumé of José Muñoz – naïve café owner, 10+ yrs',
+    'Master’s degree; Bachelor\'s in CS; Ph.D. candidate',
+    'TAB\tseparated non\xa0breaking\u2009spaces\nand\r\nnewlines',
+    'I cannot wait, Gonna learn Go; gotta ship. Wanna help? Lemme know, gimme a call (wanna)',
+    '',
+]
+
+
+def legacy_clean_text(text):
+    """clean_text before it replaced NLTK."""
+    text = re.sub(r'http\S+', '', text)
+    text = re.sub(r'[^a-zA-Z0-9\s.,;:!?\-&]', '', text)
+    text = text.translate(str.maketrans('', '', string.punctuation))
+    text = re.sub(r'\d+', '', text)
+    # The legacy call split sentences first (needing the punkt models); with
+    # all punctuation gone the text is a single sentence, so tokenizing it as
+    # one line gives the same tokens
+    words = word_tokenize(text.lower(), preserve_line=True)
+    filtered_words = [word for word in words if word not in stop_words and len(word) > 2]
+    return ' '.join(filtered_words)
+
+
+def legacy_calculate_score(resume_text, job_description):
+    """calculate_score before the scoring models: a TF-IDF fit over the resume and the description."""
+    if not resume_text or not job_description:
+        return 0.0
+    texts = [legacy_clean_text(resume_text), legacy_clean_text(job_description)]
+    try:
+        tfidf_matrix = TfidfVectorizer().fit_transform(texts)
+    except ValueError:
+        # Empty vocabulary; the legacy code logged it and scored 0
+        return 0.0
+    return round(cosine_similarity(tfidf_matrix[0:1], tfidf_matrix[1:2])[0][0] * 100, 2)
+
+
+def make_texts(count, seed=11):
+    rng = random.Random(seed)
+    texts = list(EDGE_CASES)
+    while len(texts) < count:
+        lines = resume_lines(rng, rng.randint(1, 3))
+        lines.append(f"Portfolio: https://github.com/{rng.choice(SKILLS).replace(' ', '')}-{rng.randint(1, 99)}")
+        texts.append('\n'.join(lines))
+    return texts
+
+
+def score(resume_text, job_description):
+    """The app's score for a job holding the description and this one resume."""
+    if not resume_text or not job_description:
+        return 0.0
+    model = JobScoringModel(0, job_description)
+    tf = term_frequencies(clean_text(resume_text))
+    model.add_document(tf)
+    return model.score(tf)
+
+
+def timed(function, *args):
+    started = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Tokenizer parity check and benchmark')
+    parser.add_argument('--docs', type=int, default=1000)
+    parser.add_argument('--score-docs', type=int, default=200,
+                        help='Documents scored against each job (a TF-IDF fit per pair)')
+    parser.add_argument('--tolerance', type=float, default=0.01, help='Maximum score difference')
+    args = parser.parse_args()
+
+    texts = make_texts(args.docs)
+    legacy, legacy_seconds = timed(lambda: [legacy_clean_text(text) for text in texts])
+    current, current_seconds = timed(lambda: [clean_text(text) for text in texts])
+    batch, batch_seconds = timed(clean_texts, texts)
+
+    print(f"{len(texts)} documents, {sum(map(len, texts)) / 1024:.0f} KiB of text")
+    print(f"legacy clean_text  {legacy_seconds * 1000:8.1f} ms")
+    print(f"clean_text         {current_seconds * 1000:8.1f} ms  ({legacy_seconds / current_seconds:.1f}x)")
+    print(f"clean_texts        {batch_seconds * 1000:8.1f} ms  ({legacy_seconds / batch_seconds:.1f}x)")
+
+    differing = sum(a != b for a, b in zip(legacy, current))
+    batch_differing = sum(a != b for a, b in zip(current, batch))
+    print(f"Token streams differing from legacy: {differing}, batch vs single: {batch_differing}")
+
+    worst = 0.0
+    for description in JOB_DESCRIPTIONS:
+        for text in texts[:args.score_docs]:
+            worst = max(worst, abs(legacy_calculate_score(text, description) - score(text, description)))
+    print(f"Largest score difference over {len(JOB_DESCRIPTIONS)} jobs: {worst:.4f}")
+
+    if differing or batch_differing:
+        print("❌ Token streams differ from the legacy tokenizer")
+        sys.exit(1)
+    if worst > args.tolerance:
+        print(f"❌ Scores differ by more than {args.tolerance}")
+        sys.exit(1)
+    print(f"✅ Same tokens as the legacy tokenizer, scores within {args.tolerance}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+# Gunicorn settings, read automatically by `gunicorn run:app` from this
+# directory. Every value can be overridden on the command line.
+#
+# The default gthread workers serve each request on a thread of their own, so
+# a slow upload or a long bulk extraction no longer ties up a whole worker
+# while cheap reads (GET /api/jobs, /api/top-resumes) queue behind it.
+# GUNICORN_WORKER_CLASS=gevent (pip install gevent psycogreen) swaps threads
+# for greenlets and handles thousands of mostly idle connections; the
+# classic one-request-per-worker mode is GUNICORN_WORKER_CLASS=sync.
+import os
+
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+
+# Worker processes; WEB_CONCURRENCY is the variable hosting platforms set
+workers = int(os.environ.get('WEB_CONCURRENCY', '2'))
+
+# Requests handled concurrently by one gthread worker. Keep
+# DB_POOL_SIZE + DB_MAX_OVERFLOW at least threads + TASK_WORKERS. (Gunicorn
+# turns sync workers with more than one thread into gthread ones.)
+threads = int(os.environ.get('GUNICORN_THREADS', '8')) if worker_class == 'gthread' else 1
+
+# Open connections per gevent worker
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', '1000'))
+
+if os.environ.get('GUNICORN_BIND'):
+    bind = os.environ['GUNICORN_BIND']
+
+# Uploads of large batches can take a while to receive and extract
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '120'))
+keepalive = 5
+
+# Requests share their worker with others, so CPU-bound resume parsing runs
+# on the extraction process pool instead of the threads serving requests
+if worker_class != 'sync':
+    os.environ.setdefault('EXTRACTION_OFFLOAD', '1')
+
+
+def post_fork(server, worker):
+    if worker_class == 'gevent':
+        # psycopg2 blocks the whole worker on queries unless told to yield
+        try:
+            from psycogreen.gevent import patch_psycopg
+            patch_psycopg()
+        except ImportError:
+            server.log.warning("psycogreen is not installed: database queries block other requests")
@@ -0,0 +1,47 @@
+import argparse
+import os
+
+# Migrations are applied explicitly below; a one-off command starts no
+# background threads
+os.environ.setdefault('BACKGROUND_THREADS', '0')
+os.environ['AUTO_MIGRATE'] = '0'
+
+from app import create_app, db
+from app.migrations import status, upgrade
+
+
+def main():
+    """
+    Applies pending schema migrations, or lists them with --status. Run it
+    once per deploy and start the web processes with AUTO_MIGRATE=0.
+    """
+    parser = argparse.ArgumentParser(description='Database schema migrations')
+    parser.add_argument('--status', action='store_true', help='show the schema version and pending migrations')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        version, pending = status(db.engine)
+        if args.status:
+            print(f"Schema version: {version}")
+            for number, description in pending:
+                print(f"  pending {number}: {description}")
+            if not pending:
+                print("✅ No pending migrations")
+            return True
+
+        try:
+            applied = upgrade(db.engine)
+        except Exception as e:
+            print(f"❌ Migration failed: {str(e)}")
+            return False
+        for number, description in pending:
+            if number in applied:
+                print(f"✅ Applied {number}: {description}")
+        if not applied:
+            print(f"✅ Schema already at version {version}")
+    return True
+
+
+if __name__ == "__main__":
+    main()
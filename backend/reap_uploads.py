@@ -0,0 +1,32 @@
+import argparse
+import os
+
+# A one-off command should not start the task workers or the upload reaper
+os.environ.setdefault('BACKGROUND_THREADS', '0')
+
+from app import create_app
+from app.cleanup import upload_reaper
+
+
+def main():
+    """
+    Removes uploaded resumes no candidate or task refers to any more, e.g.
+    after jobs were deleted directly in the database. The web processes do
+    the same every UPLOAD_REAP_INTERVAL seconds.
+    """
+    parser = argparse.ArgumentParser(description='Remove orphaned files from the upload folder')
+    parser.add_argument('--min-age', type=float, default=None,
+                        help='only remove files older than this many seconds (default: UPLOAD_ORPHAN_AGE)')
+    parser.add_argument('--dry-run', action='store_true', help='report what would be removed without removing it')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        result = upload_reaper.sweep(args.min_age, args.dry_run)
+    action = 'Would remove' if args.dry_run else 'Removed'
+    print(f"✅ {action} {result['files']} orphaned files, {result['bytes'] / 1e6:.1f} MB, in {result['seconds']:.2f}s")
+    return True
+
+
+if __name__ == "__main__":
+    main()
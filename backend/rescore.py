@@ -0,0 +1,38 @@
+import argparse
+import os
+import time
+
+# A one-off command should not start the task workers or the upload reaper
+os.environ.setdefault('BACKGROUND_THREADS', '0')
+
+from app import create_app
+from app.models import Job
+from app.pipeline import rescore_job
+
+
+def main():
+    """
+    Re-ranks the candidates of one or all jobs against their current job
+    descriptions, e.g. after descriptions were edited directly in the database.
+    """
+    parser = argparse.ArgumentParser(description='Re-score candidates against their job descriptions')
+    parser.add_argument('job_ids', nargs='*', type=int, help='jobs to re-score (default: all jobs)')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        jobs = Job.query.filter(Job.id.in_(args.job_ids)).all() if args.job_ids else Job.query.all()
+        if args.job_ids and len(jobs) != len(set(args.job_ids)):
+            found = {job.id for job in jobs}
+            print(f"❌ Unknown job id(s): {', '.join(str(i) for i in args.job_ids if i not in found)}")
+            return False
+
+        for job in jobs:
+            started = time.perf_counter()
+            count = rescore_job(job)
+            print(f"✅ Job {job.id} ({job.title}): rescored {count} candidates in {time.perf_counter() - started:.2f}s")
+    return True
+
+
+if __name__ == "__main__":
+    main()
@@ -5,8 +5,10 @@ from app import create_app
 if not os.environ.get('FLASK_ENV'):
     os.environ['FLASK_ENV'] = 'development'
 
-# Create the app
-app = create_app()
+# Create the app, except when a spawned extraction process re-imports this
+# file as __mp_main__: gunicorn imports it as "run", python runs it as __main__
+if __name__ != '__mp_main__':
+    app = create_app()
 
 if __name__ == '__main__':
     app.run(debug=True, port=5000) 
\ No newline at end of file
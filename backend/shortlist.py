@@ -0,0 +1,411 @@
+import argparse
+import base64
+import csv
+import json
+import os
+import shutil
+import sys
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+
+# A one-off command should not start the task workers or the upload reaper
+os.environ.setdefault('BACKGROUND_THREADS', '0')
+
+from werkzeug.utils import secure_filename
+from app.feature_store import encode_term_counts, feature_store, file_hash, resume_features
+from app.models import Job
+from app.pipeline import RecyclingProcessPool, analyze_resume
+from app.sandbox import limit_process, task_limits
+from app.scorers import DEFAULT_SCORER, SCORERS, get_scorer
+from app.scoring import fit_and_score, term_frequencies
+
+RESUME_EXTENSIONS = ('.pdf', '.docx')
+FIELDS = ('name', 'email', 'mobile', 'city', 'highest_qualification')
+OUTPUT_COLUMNS = ('rank', 'score', *FIELDS, 'file', 'content_hash')
+CHECKPOINT_VERSION = 1
+
+# Resumes a pool process handles before it is replaced
+MAX_TASKS_PER_CHILD = 500
+
+# Files handed to each pool process at a time; a process that dies takes
+# only these with it
+IN_FLIGHT_PER_PROCESS = 4
+
+LOST_ERROR = 'Extraction process died (memory or CPU limit exceeded)'
+
+# Set in each pool process by init_worker
+_scorer = None
+_use_feature_store = False
+
+
+def find_resumes(directory):
+    """Paths of every PDF and DOCX file under directory, relative to it, in a stable order."""
+    paths = []
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for name in sorted(files):
+            if name.lower().endswith(RESUME_EXTENSIONS) and not name.startswith('.'):
+                paths.append(os.path.relpath(os.path.join(root, name), directory))
+    return paths
+
+
+def file_key(directory, path):
+    """Identifies one version of a file, so files changed since the checkpoint are processed again."""
+    stat = os.stat(os.path.join(directory, path))
+    return [path, stat.st_size, stat.st_mtime_ns]
+
+
+def _pack(tf):
+    return [base64.b64encode(blob).decode('ascii') for blob in encode_term_counts(tf)]
+
+
+def _unpack(packed):
+    return tuple(base64.b64decode(blob) for blob in packed)
+
+
+def init_worker(engine, feature_store_path, memory_limit, cpu_limit, max_tasks):
+    global _scorer, _use_feature_store
+    limit_process(memory_limit * 1024 * 1024, cpu_limit, max_tasks)
+    _scorer = get_scorer(engine)
+    if feature_store_path:
+        feature_store.open(feature_store_path)
+        _use_feature_store = True
+
+
+def process_resume(task):
+    """
+    Extracts one resume in a pool process and returns its checkpoint record:
+    contact fields plus the packed term counts for the model fit and for the
+    scoring engine, or the error that stopped it.
+    """
+    directory, key = task
+    file_path = os.path.join(directory, key[0])
+    try:
+        content_hash = file_hash(file_path)
+        analysis = feature_store.get(content_hash) if _use_feature_store else None
+        if analysis is None:
+            with task_limits():
+                analysis = analyze_resume(file_path)
+                features = resume_features(analysis) if _use_feature_store else None
+            if _use_feature_store:
+                feature_store.put(content_hash, analysis, features)
+        return {
+            'key': key,
+            'content_hash': content_hash,
+            'fields': {field: analysis.get(field, '') for field in FIELDS},
+            'terms': _pack(term_frequencies(analysis.get('tokens', ''))),
+            'engine_counts': _pack(_scorer.resume_counts(analysis))
+        }
+    except Exception as e:
+        return {'key': key, 'error': str(e)}
+
+
+def load_checkpoint(path, engine):
+    """Records of a previous run with the same engine, by file path; a torn last line is ignored."""
+    if not path or not os.path.exists(path):
+        return {}
+    records = {}
+    with open(path, encoding='utf-8') as f:
+        header = None
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if header is None:
+                header = record
+                if header != {'checkpoint': CHECKPOINT_VERSION, 'engine': engine}:
+                    print(f"Ignoring checkpoint {path}: written for another engine or version")
+                    return {}
+            else:
+                records[record['key'][0]] = record
+    return records
+
+
+class Progress:
+    """One progress line: rewritten in place on a terminal, printed every few seconds otherwise."""
+
+    def __init__(self, total, interval=5.0):
+        self.total = total
+        self.done = 0
+        self.failed = 0
+        self.started = time.perf_counter()
+        self.interval = 0.2 if sys.stdout.isatty() else interval
+        self._printed = 0.0
+
+    def update(self, failed=False, final=False):
+        self.done += not final
+        self.failed += failed
+        now = time.perf_counter()
+        if not final and now - self._printed < self.interval:
+            return
+        self._printed = now
+        rate = self.done / max(now - self.started, 1e-9)
+        eta = (self.total - self.done) / rate if rate else 0
+        line = (f"  {self.done}/{self.total} files ({self.done * 100 // max(self.total, 1)}%), "
+                f"{rate:.1f} files/s, {self.failed} failed, ETA {eta:.0f}s")
+        if sys.stdout.isatty():
+            print(f"\r{line}", end='\n' if final else '', flush=True)
+        else:
+            print(line, flush=True)
+
+
+def _ends_with_newline(path):
+    with open(path, 'rb') as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b'\n'
+
+
+def extract_all(directory, keys, records, checkpoint_path, engine, processes, feature_store_path,
+                memory_limit=0, cpu_limit=0, worker=process_resume):
+    """
+    Extracts every file not already in records on a process pool (running
+    worker on each), appending each result to the checkpoint as it arrives.
+    Returns (seconds spent, number of files extracted).
+
+    A pool process killed past its limits breaks the pool and every file in
+    flight on it. Those files are tried again on a new pool one at a time, so
+    a file that kills its process again is the one recorded as failed.
+    """
+    # Files that failed are tried again
+    pending = [key for key in keys if records.get(key[0], {}).get('key') != key or 'error' in records[key[0]]]
+    if not pending:
+        return 0.0, 0
+    print(f"Extracting {len(pending)} files with {processes} processes "
+          f"({len(keys) - len(pending)} already done)")
+
+    new_checkpoint = not os.path.exists(checkpoint_path) or not records
+    progress = Progress(len(pending))
+    # Spawned rather than forked, like the app's extraction pool; each process is
+    # limited like the app's and replaced after a while so leaks in the PDF
+    # libraries cannot build up
+    initargs = (engine, feature_store_path, memory_limit, cpu_limit,
+                # One process may get every task of its generation
+                processes * MAX_TASKS_PER_CHILD)
+
+    def start_pool():
+        return RecyclingProcessPool(processes, MAX_TASKS_PER_CHILD, init_worker, initargs)
+
+    queue = deque((directory, key) for key in pending)
+    retries = deque()
+    running = {}  # future -> (task, pool it was submitted to)
+    retried = set()
+    pool = start_pool()
+    try:
+        with open(checkpoint_path, 'w' if new_checkpoint else 'a', encoding='utf-8') as checkpoint:
+            if new_checkpoint:
+                checkpoint.write(json.dumps({'checkpoint': CHECKPOINT_VERSION, 'engine': engine}) + '\n')
+            elif checkpoint.tell() and not _ends_with_newline(checkpoint_path):
+                # The previous run stopped mid-line
+                checkpoint.write('\n')
+            while queue or retries or running:
+                if retries:
+                    # Alone on the pool once what is in flight has finished
+                    if not running:
+                        task = retries.popleft()
+                        running[pool.submit(worker, task)] = (task, pool)
+                else:
+                    while queue and len(running) < processes * IN_FLIGHT_PER_PROCESS:
+                        task = queue.popleft()
+                        running[pool.submit(worker, task)] = (task, pool)
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    task, submitted_to = running.pop(future)
+                    key = task[1]
+                    try:
+                        record = future.result()
+                    except BrokenProcessPool:
+                        if submitted_to is pool:
+                            pool.shutdown(wait=False)
+                            pool = start_pool()
+                        if key[0] not in retried:
+                            # Maybe it only shared the pool with the file that broke it
+                            retried.add(key[0])
+                            retries.append(task)
+                            continue
+                        record = {'key': key, 'error': LOST_ERROR}
+                    except Exception as e:
+                        record = {'key': key, 'error': str(e)}
+                    records[key[0]] = record
+                    checkpoint.write(json.dumps(record) + '\n')
+                    checkpoint.flush()
+                    progress.update(failed='error' in record)
+    finally:
+        pool.shutdown(wait=not running, cancel_futures=bool(running))
+    progress.update(final=True)
+    return time.perf_counter() - progress.started, len(pending)
+
+
+def rank(records, job, engine):
+    """Scores extracted resumes against the job with the engine, best first."""
+    scorer = get_scorer(engine)
+    model, scores = fit_and_score(job.id, job.description, [_unpack(r['terms']) for r in records],
+                                  [r['content_hash'] for r in records])
+    if not scorer.scores_from_fit:
+        scores = scorer.score_all(job, model, [_unpack(r['engine_counts']) for r in records])
+    ranked = sorted(zip(records, scores.tolist()), key=lambda item: (-item[1], item[0]['key'][0]))
+    return [
+        {
+            'rank': position,
+            'score': round(score, 2),
+            **record['fields'],
+            'file': record['key'][0],
+            'content_hash': record['content_hash']
+        }
+        for position, (record, score) in enumerate(ranked, 1)
+    ]
+
+
+def write_output(rows, path, output_format):
+    if output_format == 'parquet':
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit('❌ Parquet output needs pyarrow (pip install pyarrow); use a .csv output instead')
+        pq.write_table(pa.table({column: [row[column] for row in rows] for column in OUTPUT_COLUMNS}), path)
+    else:
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=OUTPUT_COLUMNS)
+            writer.writeheader()
+            writer.writerows(rows)
+
+
+def save_to_job(app, job, rows, directory):
+    """
+    Adds the ranked resumes to a job as candidates: files are copied into the
+    upload folder, rows go through the bulk insert used by bulk uploads, and
+    the job's candidates are then re-ranked together.
+    """
+    from app import db
+    from app.pipeline import rescore_job, save_candidates_bulk
+    from app.uploads import upload_name, upload_path
+
+    if job.id is None:
+        db.session.add(job)
+        db.session.commit()
+    upload_folder = app.config['UPLOAD_FOLDER']
+    items = []
+    for row in rows:
+        original_filename = secure_filename(os.path.basename(row['file']))
+        filename = upload_name(original_filename)
+        shutil.copyfile(os.path.join(directory, row['file']), upload_path(upload_folder, filename))
+        analysis = {field: row[field] for field in FIELDS}
+        analysis.update(content_hash=row['content_hash'], score=row['score'])
+        items.append((analysis, filename, original_filename))
+
+    outcomes = save_candidates_bulk(job.id, items, app.config['BULK_COMMIT_SIZE'])
+    for outcome, (_, filename, _) in zip(outcomes, items):
+        if outcome['status'] == 'failed':
+            os.remove(os.path.join(upload_folder, filename))
+    rescored = rescore_job(job)
+    summary = {status: sum(1 for o in outcomes if o['status'] == status) for status in ('created', 'updated', 'failed')}
+    print(f"✅ Job {job.id} ({job.title}): {summary['created']} candidates created, {summary['updated']} updated, "
+          f"{summary['failed']} failed; {rescored} candidates re-ranked")
+
+
+def main():
+    """
+    Shortlists a directory of resumes against a job description without the
+    web server: resumes are extracted on a process pool, scored with one of
+    the scoring engines and written out ranked, optionally also as candidates
+    of a job in the database.
+    """
+    parser = argparse.ArgumentParser(description='Rank a directory of PDF/DOCX resumes against a job description')
+    parser.add_argument('directory', help='directory searched recursively for .pdf and .docx resumes')
+    parser.add_argument('job_description', nargs='?',
+                        help='text file holding the job description (not used with --job-id)')
+    parser.add_argument('-o', '--output', default='shortlist.csv', help='ranked output, .csv or .parquet')
+    parser.add_argument('--format', choices=('csv', 'parquet'), help='output format (default: from the extension)')
+    parser.add_argument('--engine', choices=sorted(SCORERS),
+                        help=f'scoring engine (default: the job\'s engine with --job-id, else {DEFAULT_SCORER})')
+    parser.add_argument('--processes', type=int, default=os.cpu_count(), help='extraction processes (default: CPU count)')
+    parser.add_argument('--memory-limit', type=int, default=1024,
+                        help='address space per extraction process in MB (default: 1024, 0 = no limit)')
+    parser.add_argument('--cpu-limit', type=int, default=30,
+                        help='CPU seconds per resume (default: 30, 0 = no limit)')
+    parser.add_argument('--top', type=int, help='only write the best N resumes')
+    parser.add_argument('--checkpoint', help='progress file to resume from (default: OUTPUT.checkpoint)')
+    parser.add_argument('--restart', action='store_true', help='ignore an existing checkpoint')
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument('--job-id', type=int,
+                        help='rank against this job and add the written resumes to it in the database')
+    target.add_argument('--new-job', metavar='TITLE',
+                        help='also add the written resumes to a new job with this title')
+    args = parser.parse_args()
+    if args.job_id and (args.job_description or args.engine):
+        parser.error('--job-id ranks with the job\'s own description and scoring engine')
+    if not args.job_id and not args.job_description:
+        parser.error('a job description file is required without --job-id')
+
+    if not os.path.isdir(args.directory):
+        print(f"❌ Not a directory: {args.directory}")
+        return False
+    description = ''
+    if args.job_description:
+        with open(args.job_description, encoding='utf-8') as f:
+            description = f.read().strip()
+        if not description:
+            print(f"❌ Job description {args.job_description} is empty")
+            return False
+    output_format = args.format or ('parquet' if args.output.lower().endswith('.parquet') else 'csv')
+    checkpoint_path = args.checkpoint or f'{args.output}.checkpoint'
+
+    app = None
+    feature_store_path = None
+    job = None
+    if args.job_id or args.new_job:
+        from app import create_app, db
+        app = create_app()
+        app.app_context().push()
+        feature_store_path = app.config['FEATURE_STORE_PATH']
+        if args.job_id:
+            job = db.session.get(Job, args.job_id)
+            if job is None:
+                print(f"❌ Unknown job id: {args.job_id}")
+                return False
+    if job is None:
+        job = Job(
+            title=args.new_job or os.path.splitext(os.path.basename(args.job_description))[0],
+            description=description,
+            scoring_engine=args.engine or DEFAULT_SCORER
+        )
+    engine = job.scoring_engine
+
+    keys = [file_key(args.directory, path) for path in find_resumes(args.directory)]
+    print(f"Found {len(keys)} resumes in {args.directory}")
+    records = {} if args.restart else load_checkpoint(checkpoint_path, engine)
+    if args.restart and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    elapsed, extracted = extract_all(
+        args.directory, keys, records, checkpoint_path, engine, max(1, args.processes), feature_store_path,
+        args.memory_limit, args.cpu_limit
+    )
+
+    current = {key[0] for key in keys}
+    done = [r for path, r in records.items() if path in current and 'error' not in r]
+    failed = [r for path, r in records.items() if path in current and 'error' in r]
+    for record in failed[:10]:
+        print(f"  ❌ {record['key'][0]}: {record['error']}")
+    if len(failed) > 10:
+        print(f"  ... and {len(failed) - 10} more failed")
+
+    started = time.perf_counter()
+    rows = rank(done, job, engine) if done else []
+    if args.top:
+        rows = rows[:args.top]
+    write_output(rows, args.output, output_format)
+    if extracted:
+        print(f"Extracted {extracted} files in {elapsed:.1f}s ({extracted / max(elapsed, 1e-9):.1f} files/s)")
+    print(f"✅ Ranked {len(done)} resumes with {engine} in {time.perf_counter() - started:.2f}s; "
+          f"wrote {len(rows)} rows to {args.output} ({len(failed)} files failed)")
+
+    if app is not None and rows:
+        save_to_job(app, job, rows, args.directory)
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,70 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+# Imports everything create_app loads, without connecting to the database
+BOOT_CODE = 'import app, app.routes, app.tasks'
+
+
+def measure_imports():
+    """Runs a fresh interpreter with -X importtime and parses its per-module timings."""
+    env = dict(os.environ, TASK_WORKERS='0')
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', BOOT_CODE],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=env,
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        modules.append({
+            'module': name.strip(),
+            'self_ms': int(self_us) / 1000,
+            'cumulative_ms': int(cumulative_us) / 1000,
+            'depth': (len(name) - len(name.lstrip())) // 2
+        })
+    return modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Report import time of the backend per module')
+    parser.add_argument('--top', type=int, default=15, help='Number of modules and packages to list')
+    parser.add_argument('--json', action='store_true', help='Print the full report as JSON')
+    args = parser.parse_args()
+
+    try:
+        modules = measure_imports()
+    except RuntimeError as e:
+        print(f"❌ Importing the app failed: {str(e)}")
+        sys.exit(1)
+
+    packages = defaultdict(float)
+    for module in modules:
+        packages[module['module'].split('.')[0]] += module['self_ms']
+    total_ms = sum(packages.values())
+
+    if args.json:
+        print(json.dumps({'total_ms': round(total_ms, 1), 'packages': packages, 'modules': modules}, indent=2))
+        return
+
+    print(f"✅ App imports took {total_ms:.1f} ms")
+    print("\nSlowest top-level packages (self time summed):")
+    for name, ms in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"  {ms:9.1f} ms  {name}")
+    print("\nSlowest modules (cumulative):")
+    for module in sorted(modules, key=lambda m: m['cumulative_ms'], reverse=True)[:args.top]:
+        print(f"  {module['cumulative_ms']:9.1f} ms  {module['module']}")
+
+
+if __name__ == '__main__':
+    main()
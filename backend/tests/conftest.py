@@ -0,0 +1,78 @@
+import io
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Settings are read at import time by some modules (the PDF engine) and by
+# spawned extraction processes, so they go into the environment before the
+# app is imported. Everything lives in one throwaway directory.
+_directory = tempfile.mkdtemp(prefix='resume-tests-')
+os.environ.update(
+    DATABASE_URL=f"sqlite:///{os.path.join(_directory, 'test.db')}",
+    FEATURE_STORE_PATH=os.path.join(_directory, 'features.sqlite3'),
+    SCORING_MODEL_DIR=os.path.join(_directory, 'scoring_models'),
+    PREVIEW_DIR=os.path.join(_directory, 'previews'),
+    PROFILE_DIR=os.path.join(_directory, 'profiles'),
+    TASK_WORKERS='0',
+    BACKGROUND_THREADS='0',
+    UPLOAD_REAP_INTERVAL='0',
+    EXTRACTION_PROCESSES='2',
+)
+
+from benchmarks.corpus import make_docx, make_pdf  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def app():
+    from app import create_app
+    from app.scoring import model_cache
+
+    app = create_app()
+    app.config['UPLOAD_FOLDER'] = os.path.join(_directory, 'uploads')
+    os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+    yield app
+    model_cache.flush()
+    shutil.rmtree(_directory, ignore_errors=True)
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def job_id(client):
+    response = client.post('/api/jobs', json={
+        'title': 'Python developer',
+        'description': 'Python developer with Flask, SQL and Docker experience'
+    })
+    return response.json['job']['id']
+
+
+def resume_pdf(name='Jane Doe', email='jane.doe@example.com', skills='Python Flask SQL Docker',
+               mobile='+1 555 123 4567'):
+    return make_pdf([name, email, mobile, 'Boston', 'Skills', skills, 'Education', 'Bachelor of Science'])
+
+
+def resume_docx(name='John Roe', email='john.roe@example.com', skills='Python Flask SQL'):
+    return make_docx([name, email, 'Skills', skills])
+
+
+def upload(client, job_id, data, filename='resume.pdf'):
+    """Posts one resume; returns the response (202 with a task id on success)."""
+    return client.post(f'/api/jobs/{job_id}/upload-resume', data={'file': (io.BytesIO(data), filename)},
+                       content_type='multipart/form-data')
+
+
+def process(app, task_id):
+    """Runs a queued task the way a worker does."""
+    from app.tasks import claim_task, run_task
+
+    with app.app_context():
+        assert claim_task(task_id)
+        run_task(task_id)
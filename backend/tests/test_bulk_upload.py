@@ -0,0 +1,142 @@
+import io
+import os
+import struct
+import zipfile
+
+import pytest
+
+from conftest import resume_docx, resume_pdf
+
+ENCRYPTED = 0x1
+
+
+def _patch_headers(raw, name, offset, local_field, central_field, value):
+    # A field of a member's local header and of its central directory entry
+    raw[offset + local_field:offset + local_field + 2] = struct.pack('<H', value)
+    central = raw.find(b'PK\x01\x02')
+    while central != -1:
+        length = struct.unpack('<H', raw[central + 28:central + 30])[0]
+        if raw[central + 46:central + 46 + length] == name.encode():
+            raw[central + central_field:central + central_field + 2] = struct.pack('<H', value)
+        central = raw.find(b'PK\x01\x02', central + 4)
+
+
+def make_zip(members):
+    """A ZIP of (name, data, options) members; options damage a member after it is written."""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        for name, data, _ in members:
+            archive.writestr(name, data)
+    raw = bytearray(buffer.getvalue())
+    with zipfile.ZipFile(io.BytesIO(bytes(raw))) as archive:
+        infos = {info.filename: info for info in archive.infolist()}
+    for name, _, options in members:
+        offset = infos[name].header_offset
+        if options.get('corrupt'):
+            # Flip a byte of the stored data so its CRC no longer matches
+            name_length, extra_length = struct.unpack('<HH', raw[offset + 26:offset + 30])
+            raw[offset + 30 + name_length + extra_length] ^= 0xFF
+        if options.get('encrypted'):
+            _patch_headers(raw, name, offset, 6, 8, ENCRYPTED)
+        if options.get('method'):
+            _patch_headers(raw, name, offset, 8, 10, options['method'])
+    return bytes(raw)
+
+
+def stored_files(app):
+    paths = set()
+    for root, _, files in os.walk(app.config['UPLOAD_FOLDER']):
+        paths.update(os.path.join(root, name) for name in files)
+    return paths
+
+
+def post_bulk(client, job_id, files):
+    return client.post(f'/api/jobs/{job_id}/upload-resumes',
+                       data={'files': [(io.BytesIO(data), name) for name, data in files]},
+                       content_type='multipart/form-data')
+
+
+def by_name(response):
+    return {result['filename']: result for result in response.json['results']}
+
+
+def test_bulk_upload_of_files_and_zip(client, job_id):
+    archive = make_zip([
+        ('one.pdf', resume_pdf('Ann Lee', 'ann.lee@example.com'), {}),
+        ('two.docx', resume_docx('Bob Ray', 'bob.ray@example.com'), {}),
+        ('notes.txt', b'ignored', {}),
+    ])
+    response = post_bulk(client, job_id, [('three.pdf', resume_pdf('Cy Tan', 'cy.tan@example.com',
+                                                                   mobile='+1 555 987 6543')),
+                                          ('resumes.zip', archive)])
+    assert response.status_code == 200
+    assert response.json['summary'] == {'total': 3, 'created': 3, 'updated': 0, 'failed': 0}
+
+
+def test_bad_zip_members_fail_alone(app, client, job_id):
+    before = stored_files(app)
+    archive = make_zip([
+        ('good.pdf', resume_pdf('Dee Fox', 'dee.fox@example.com'), {}),
+        ('corrupt.pdf', resume_pdf('Eve Gil', 'eve.gil@example.com'), {'corrupt': True}),
+        ('locked.pdf', resume_pdf('Fay Hu', 'fay.hu@example.com'), {'encrypted': True}),
+        ('odd.pdf', resume_pdf('Gus Ivy', 'gus.ivy@example.com'), {'method': 99}),
+    ])
+    response = post_bulk(client, job_id, [('resumes.zip', archive)])
+
+    assert response.status_code == 200
+    results = by_name(response)
+    assert results['good.pdf']['status'] == 'created'
+    assert results['corrupt.pdf']['error'] == 'Corrupt file in ZIP'
+    assert results['locked.pdf']['error'] == 'Encrypted file in ZIP'
+    assert results['odd.pdf']['error'] == 'Unsupported compression in ZIP'
+    # Only the good resume is stored; no partial output is left behind
+    added = stored_files(app) - before
+    assert len(added) == 1
+    assert not any(path.endswith('.part') for path in added)
+
+
+def test_zip_contents_limited_in_total(app, client, job_id):
+    first = resume_pdf('Hal Jo', 'hal.jo@example.com')
+    second = resume_pdf('Ida Kay', 'ida.kay@example.com', mobile='+1 555 987 6543')
+    archive = make_zip([('first.pdf', first, {}), ('second.pdf', second, {})])
+    limit = app.config['BULK_MAX_EXTRACTED_SIZE']
+    app.config['BULK_MAX_EXTRACTED_SIZE'] = len(first) + len(second) - 1
+    try:
+        response = post_bulk(client, job_id, [('resumes.zip', archive)])
+    finally:
+        app.config['BULK_MAX_EXTRACTED_SIZE'] = limit
+
+    results = by_name(response)
+    assert results['first.pdf']['status'] == 'created'
+    assert results['second.pdf']['status'] == 'failed'
+    assert 'exceed' in results['second.pdf']['error']
+
+
+def test_invalid_zip_is_reported(client, job_id):
+    response = post_bulk(client, job_id, [('resumes.zip', b'not a zip at all')])
+    assert response.status_code == 200
+    assert by_name(response)['resumes.zip']['error'] == 'Invalid ZIP file'
+
+
+@pytest.mark.parametrize('name', ['resume.txt', 'resume.exe'])
+def test_unsupported_files_are_rejected(client, job_id, name):
+    response = post_bulk(client, job_id, [(name, b'hello')])
+    assert by_name(response)[name]['error'] == 'Invalid file type'
+
+
+def test_zip_may_exceed_resume_size_limit(app, client, job_id):
+    resume = resume_pdf('Jay Lim', 'jay.lim@example.com', mobile='+1 555 222 3333')
+    padding = os.urandom(4 * len(resume))
+    archive = make_zip([('resume.pdf', resume, {}), ('padding.txt', padding, {})])
+    limit = app.config['MAX_FILE_SIZE']
+    app.config['MAX_FILE_SIZE'] = 2 * len(resume)
+    try:
+        response = post_bulk(client, job_id, [('resumes.zip', archive)])
+        too_large = post_bulk(client, job_id, [('big.pdf', resume + padding)])
+    finally:
+        app.config['MAX_FILE_SIZE'] = limit
+
+    assert response.status_code == 200
+    assert by_name(response)['resume.pdf']['status'] == 'created'
+    # Resumes themselves keep the per-file limit
+    assert too_large.status_code == 413
@@ -0,0 +1,28 @@
+import pytest
+
+from app.extractors import clean_text, clean_texts
+
+# Outputs of the NLTK-based clean_text that clean_text replaced
+# (benchmarks/tokenizer.py runs the legacy code itself)
+LEGACY_OUTPUTS = [
+    ('Visit http://example.com/a?b=1 or https://x.io for more', 'visit'),
+    ("Don't forget: e-mail, co-operate, C++ & C#, node.js, python3.11",
+     'dont forget email cooperate nodejs python'),
+    ('Résumé of José Muñoz – naïve café owner, 10+ yrs', 'rsum jos muoz nave caf owner yrs'),
+    ('Master’s degree; Bachelor\'s in CS; Ph.D. candidate', 'masters degree bachelors phd candidate'),
+    ('TAB\tseparated non\xa0breaking spaces\nand\r\nnewlines', 'tab separated non breaking spaces newlines'),
+    # word_tokenize split these contractions in two
+    ('I cannot wait, Gonna learn Go; gotta ship. Wanna help? Lemme know, gimme a call (wanna)',
+     'wait gon learn got ship wan help lem know gim call wan'),
+    ('', ''),
+]
+
+
+@pytest.mark.parametrize('text, expected', LEGACY_OUTPUTS)
+def test_clean_text_matches_legacy_tokenizer(text, expected):
+    assert clean_text(text) == expected
+
+
+def test_clean_texts_matches_clean_text():
+    texts = [text for text, _ in LEGACY_OUTPUTS] * 2
+    assert clean_texts(texts) == [clean_text(text) for text in texts]
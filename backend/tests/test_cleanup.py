@@ -0,0 +1,110 @@
+import os
+import time
+
+from app.cleanup import UploadReaper, upload_reaper
+from app.models import db, Candidate, Job, Task
+from app.tasks import FAILED
+from app.uploads import SHARD_CHARS, upload_name, upload_path
+from conftest import process, resume_pdf, upload
+
+
+def candidate_files(app, job_id):
+    with app.app_context():
+        return [path for path, in db.session.query(Candidate.resume_path).filter(Candidate.job_id == job_id)]
+
+
+def make_file(app, name, age=0):
+    path = upload_path(app.config['UPLOAD_FOLDER'], name)
+    with open(path, 'wb') as f:
+        f.write(b'resume')
+    if age:
+        then = time.time() - age
+        os.utime(path, (then, then))
+    return path
+
+
+def test_uploads_are_sharded_by_name(app, client, job_id):
+    name = upload_name('cv.pdf')
+    shard, rest = name.split('/')
+    assert len(shard) == SHARD_CHARS and rest.startswith(shard) and rest.endswith('_cv.pdf')
+    assert os.path.isdir(os.path.dirname(upload_path(app.config['UPLOAD_FOLDER'], name)))
+
+    process(app, upload(client, job_id, resume_pdf(mobile='+1 555 800 0001')).json['task_id'])
+    [resume_path] = candidate_files(app, job_id)
+    assert resume_path.split('/')[0] == resume_path.split('/')[1][:SHARD_CHARS]
+    assert os.path.exists(os.path.join(app.config['UPLOAD_FOLDER'], *resume_path.split('/')))
+
+
+def test_job_is_deleted_in_chunks_with_its_files(app, client, job_id, monkeypatch):
+    for i in range(3):
+        resume = resume_pdf(f'Del Ete{i}', f'delete{i}@example.com', mobile=f'+1 555 800 010{i}')
+        process(app, upload(client, job_id, resume).json['task_id'])
+    files = [os.path.join(app.config['UPLOAD_FOLDER'], *path.split('/')) for path in candidate_files(app, job_id)]
+    assert len(files) == 3 and all(os.path.exists(path) for path in files)
+    monkeypatch.setitem(app.config, 'DELETE_CHUNK_SIZE', 1)
+
+    response = client.delete(f'/api/jobs/{job_id}')
+    assert response.status_code == 200
+    assert response.json['candidates_deleted'] == 3
+    with app.app_context():
+        assert db.session.get(Job, job_id) is None
+        assert Candidate.query.filter_by(job_id=job_id).count() == 0
+        assert Task.query.filter_by(job_id=job_id).count() == 0
+    # Without a reaper thread the files go right away
+    assert not any(os.path.exists(path) for path in files)
+
+
+def test_no_candidate_is_added_to_a_job_being_deleted(app, client, job_id):
+    task_id = upload(client, job_id, resume_pdf(mobile='+1 555 800 0201')).json['task_id']
+    with app.app_context():
+        # What delete_job_rows does before its first chunk
+        db.session.query(Job).filter(Job.id == job_id).update({'deleting': True})
+        db.session.commit()
+
+    process(app, task_id)
+    task = client.get(f'/api/tasks/{task_id}').json['task']
+    assert task['status'] == FAILED
+    assert 'being deleted' in task['error']
+    assert candidate_files(app, job_id) == []
+    assert client.delete(f'/api/jobs/{job_id}').status_code == 200
+
+
+def test_sweep_removes_old_unreferenced_files_only(app, client, job_id):
+    process(app, upload(client, job_id, resume_pdf(mobile='+1 555 800 0301')).json['task_id'])
+    [referenced] = candidate_files(app, job_id)
+    os.utime(os.path.join(app.config['UPLOAD_FOLDER'], *referenced.split('/')), (0, 0))
+    queued = upload(client, job_id, resume_pdf('Que Ued', 'queued@example.com', mobile='+1 555 800 0302'))
+    with app.app_context():
+        queued_name = db.session.get(Task, queued.json['task_id']).filename
+        abandoned = Task(job_id=job_id, status=FAILED, filename=upload_name('abandoned.pdf'), original_filename='a.pdf')
+        db.session.add(abandoned)
+        db.session.commit()
+        abandoned_name = abandoned.filename
+    os.utime(os.path.join(app.config['UPLOAD_FOLDER'], *queued_name.split('/')), (0, 0))
+
+    old_orphans = [make_file(app, upload_name('orphan.pdf'), age=7200), make_file(app, abandoned_name, age=7200),
+                   make_file(app, '.upload-1234.part', age=7200)]
+    kept = [make_file(app, upload_name('recent.pdf')), os.path.join(app.config['UPLOAD_FOLDER'], *referenced.split('/')),
+            os.path.join(app.config['UPLOAD_FOLDER'], *queued_name.split('/'))]
+
+    with app.app_context():
+        assert upload_reaper.sweep(min_age=3600, dry_run=True)['files'] >= 3
+        assert all(os.path.exists(path) for path in old_orphans)
+        result = upload_reaper.sweep(min_age=3600)
+    assert result['files'] >= 3
+    assert not any(os.path.exists(path) for path in old_orphans)
+    assert all(os.path.exists(path) for path in kept)
+
+
+def test_reaper_thread_starts_once_and_only_when_enabled(app, monkeypatch):
+    monkeypatch.setitem(app.config, 'UPLOAD_REAP_INTERVAL', 0)
+    monkeypatch.setitem(app.config, 'BACKGROUND_THREADS', False)
+    reaper = UploadReaper()
+    reaper.init_app(app)
+    assert reaper._thread is None
+
+    monkeypatch.setitem(app.config, 'BACKGROUND_THREADS', True)
+    reaper.init_app(app)
+    thread = reaper._thread
+    reaper.init_app(app)
+    assert thread.is_alive() and reaper._thread is thread
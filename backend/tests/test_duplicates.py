@@ -0,0 +1,75 @@
+import random
+
+import pytest
+
+from app.feature_store import FeatureStore
+from app.fingerprints import BANDS, band_buckets, shingles, signature, similarity
+from conftest import process, resume_pdf, upload
+
+
+def random_words(rng, count):
+    return [f'word{rng.randrange(2000)}' for _ in range(count)]
+
+
+def edited(words, rng, changes):
+    words = list(words)
+    for position in rng.sample(range(len(words)), changes):
+        words[position] = f'edit{rng.randrange(10 ** 6)}'
+    return words
+
+
+def jaccard(first, second):
+    first, second = shingles(first), shingles(second)
+    return len(first & second) / len(first | second)
+
+
+@pytest.mark.parametrize('changes', [0, 5, 40, 150])
+def test_signatures_estimate_jaccard_similarity(changes):
+    rng = random.Random(changes)
+    words = random_words(rng, 300)
+    first, second = ' '.join(words), ' '.join(edited(words, rng, changes))
+    assert similarity(signature(first), signature(second)) == pytest.approx(jaccard(first, second), abs=0.15)
+
+
+def test_empty_text_has_no_signature():
+    assert signature('') == b''
+    assert band_buckets(b'') == []
+    assert similarity(b'', signature('some words here')) == 0.0
+    assert len(band_buckets(signature('some words here'))) == BANDS
+
+
+def test_store_finds_near_duplicates_only(tmp_path):
+    store = FeatureStore()
+    store.open(str(tmp_path / 'features.db'))
+    rng = random.Random(1)
+    words = random_words(rng, 400)
+    texts = {
+        'base': ' '.join(words),
+        'near': ' '.join(edited(words, rng, 4)),
+        'rewritten': ' '.join(edited(words, rng, 250)),
+        'other': ' '.join(random_words(rng, 400)),
+    }
+    for name, tokens in texts.items():
+        store.put(name, {'text': tokens, 'tokens': tokens})
+
+    matches = dict(store.similar('base', threshold=0.8))
+    assert set(matches) == {'near'}
+    assert matches['near'] == pytest.approx(jaccard(texts['base'], texts['near']), abs=0.1)
+    assert store.similar('missing') == []
+
+
+def test_duplicates_across_jobs(app, client, job_id):
+    other_job = client.post('/api/jobs', json={'title': 'Backend engineer', 'description': 'Python and SQL'}).json['job']['id']
+    resume = resume_pdf('Lee Park', 'lee.park@example.com', 'Python Flask Kubernetes', mobile='+1 555 444 0001')
+
+    process(app, upload(client, job_id, resume).json['task_id'])
+    task_id = upload(client, other_job, resume).json['task_id']
+    process(app, task_id)
+
+    result = client.get(f'/api/tasks/{task_id}').json['task']['result']
+    duplicates = result['duplicates']
+    assert [(d['job_id'], d['exact'], d['similarity']) for d in duplicates] == [(job_id, True, 1.0)]
+
+    response = client.get(f"/api/candidates/{duplicates[0]['candidate_id']}/duplicates")
+    assert response.status_code == 200
+    assert [d['candidate_id'] for d in response.json['duplicates']] == [result['candidate_id']]
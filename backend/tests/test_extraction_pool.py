@@ -0,0 +1,119 @@
+import os
+import runpy
+import time
+
+import pytest
+
+from app import sandbox
+from app.feature_store import FeatureStore, resume_features
+from app.pipeline import RecyclingProcessPool, analyze_resume, analyze_resume_timed
+from app.sandbox import ResourceLimitExceeded, in_extraction_process, limit_process, task_limits
+from conftest import resume_pdf
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _create_app_in_pool():
+    # What an unguarded main module would do in every extraction process
+    os.environ.update(BACKGROUND_THREADS='1', TASK_WORKERS='2', UPLOAD_REAP_INTERVAL='60')
+    from app import create_app
+    from app.cleanup import upload_reaper
+    from app.tasks import task_queue
+
+    create_app()
+    return len(task_queue._threads), upload_reaper._thread is None
+
+
+def test_pool_processes_know_they_are_extraction_processes():
+    assert not in_extraction_process()
+    pool = RecyclingProcessPool(1)
+    try:
+        assert pool.submit(in_extraction_process).result(timeout=60)
+    finally:
+        pool.shutdown()
+
+
+def test_app_created_in_pool_starts_no_background_threads():
+    pool = RecyclingProcessPool(1)
+    try:
+        workers, no_reaper = pool.submit(_create_app_in_pool).result(timeout=120)
+    finally:
+        pool.shutdown()
+    assert workers == 0
+    assert no_reaper
+
+
+def test_run_module_creates_no_app_when_reimported_by_a_pool_process():
+    namespace = runpy.run_path(os.path.join(BACKEND, 'run.py'), run_name='__mp_main__')
+    assert 'app' not in namespace
+
+
+def test_pool_replaces_processes_without_deadlocking():
+    pool = RecyclingProcessPool(2, max_tasks_per_child=2)
+    try:
+        futures = [pool.submit(os.getpid) for _ in range(12)]
+        pids = {future.result(timeout=60) for future in futures}
+    finally:
+        pool.shutdown()
+    # 12 tasks at 2 per process need at least 3 generations of processes
+    assert len(pids) > 2
+
+
+def _allocate(size):
+    return len(bytearray(size))
+
+
+def _spin(seconds):
+    x = 0
+    deadline = time.monotonic() + seconds
+    with task_limits():
+        while time.monotonic() < deadline:
+            x += 1
+    return x
+
+
+def limited_pool(memory_limit=0, cpu_seconds=0):
+    return RecyclingProcessPool(1, initializer=limit_process, initargs=(memory_limit, cpu_seconds, None))
+
+
+@pytest.mark.skipif(sandbox.resource is None, reason='no resource limits on this platform')
+def test_memory_limit_fails_allocations_instead_of_growing_the_process():
+    pool = limited_pool(memory_limit=2 * 1024 ** 3)
+    try:
+        with pytest.raises(MemoryError):
+            pool.submit(_allocate, 4 * 1024 ** 3).result(timeout=60)
+        # The process survives and smaller allocations still work
+        assert pool.submit(_allocate, 1024 ** 2).result(timeout=60) == 1024 ** 2
+    finally:
+        pool.shutdown()
+
+
+@pytest.mark.skipif(sandbox.resource is None, reason='no resource limits on this platform')
+def test_cpu_limit_stops_the_task_only():
+    pool = limited_pool(cpu_seconds=1)
+    try:
+        with pytest.raises(ResourceLimitExceeded):
+            pool.submit(_spin, 30).result(timeout=60)
+        # Every task gets its own CPU time
+        assert pool.submit(_spin, 0.2).result(timeout=60) > 0
+    finally:
+        pool.shutdown()
+
+
+def test_features_computed_on_the_pool_are_stored_as_is(tmp_path):
+    path = tmp_path / 'resume.pdf'
+    path.write_bytes(resume_pdf('Wes Yoon', 'wes.yoon@example.com'))
+    pool = RecyclingProcessPool(1)
+    try:
+        analysis, features, _ = pool.submit(analyze_resume_timed, str(path)).result(timeout=60)
+    finally:
+        pool.shutdown()
+    assert features == resume_features(analyze_resume(str(path)))
+
+    precomputed, computed = FeatureStore(), FeatureStore()
+    precomputed.open(str(tmp_path / 'precomputed.db'))
+    computed.open(str(tmp_path / 'computed.db'))
+    precomputed.put('resume', analysis, features)
+    computed.put('resume', analysis)
+    for method in ('get_term_counts', 'get_search_term_counts', 'get_section_term_counts'):
+        assert getattr(precomputed, method)(['resume']) == getattr(computed, method)(['resume'])
@@ -0,0 +1,40 @@
+from app.feature_store import FeatureStore, decode_term_counts
+from app.scoring import term_frequencies
+from conftest import process, resume_pdf, upload
+
+
+def test_analyses_are_stored_by_content_hash(tmp_path):
+    store = FeatureStore()
+    store.open(str(tmp_path / 'features.db'))
+    analysis = {'text': 'Python and Flask', 'tokens': 'python flask python', 'email': 'a@example.com'}
+    store.put('resume', analysis)
+
+    assert store.get('resume') == analysis
+    assert store.get('missing') is None
+    assert (store.hits, store.misses) == (1, 1)
+    counts = store.get_term_counts(['resume', 'missing'])
+    assert list(counts) == ['resume']
+    assert decode_term_counts(*counts['resume']) == term_frequencies('python flask python')
+
+
+def test_reopened_store_uses_the_new_file(tmp_path):
+    store = FeatureStore()
+    store.open(str(tmp_path / 'first.db'))
+    store.put('resume', {'text': 'python flask', 'tokens': 'python flask'})
+    store.open(str(tmp_path / 'second.db'))
+    assert store.get('resume') is None
+    store.put('other', {'text': 'java', 'tokens': 'java'})
+    store.open(str(tmp_path / 'first.db'))
+    assert store.get('resume')['tokens'] == 'python flask'
+    assert store.get('other') is None
+
+
+def test_same_file_for_two_jobs_is_extracted_once(app, client, job_id):
+    from app.feature_store import feature_store
+
+    other_job = client.post('/api/jobs', json={'title': 'Data engineer', 'description': 'Python SQL'}).json['job']['id']
+    resume = resume_pdf('Xia Zhu', 'xia.zhu@example.com', mobile='+1 555 900 0001')
+    process(app, upload(client, job_id, resume).json['task_id'])
+    hits = feature_store.hits
+    process(app, upload(client, other_job, resume).json['task_id'])
+    assert feature_store.hits == hits + 1
@@ -0,0 +1,36 @@
+import pytest
+
+from app.extractors import field_extractor
+from benchmarks.field_extraction import legacy_extract, make_texts
+
+EDGE_CASES = [
+    '',
+    'no contact details at all',
+    'Jane Doe\njane@example',
+    '  Mary Ann Smith  \nContact: MARY.SMITH+cv@Mail.Example.co.uk or mary@example.com',
+    'Ravi Kumar 2\nRavi Kumar\nphone: (617) 555-0100, alt 6175550199',
+    'Call +91 98765 43210 or 9876543210\nPh: +1.617.555.0100',
+    'reference 12345678901234567890 then 555 123 4567',
+    'Living in New York City\nEducation: B.Sc in Physics, M.Sc in Maths',
+    'I am from\nBerlin and studied at high school',
+    'Doctorate (Ph.D) and an MBA; also a diploma',
+    'ms office, ba degree, h.s graduate',
+    'first line\nsecond line\nthird\nfourth\nfifth\nsixth\nseventh\neighth\nninth\ntenth\nJohn Late Name',
+    'Emails: a@b.io, then @handle and x@y.museum',
+]
+
+
+@pytest.mark.parametrize('text', EDGE_CASES)
+def test_fields_match_the_legacy_extractors(text):
+    assert field_extractor.extract(text) == legacy_extract(text)
+
+
+def test_long_resumes_match_the_legacy_extractors():
+    # Contact details and degrees at the top, at the bottom or missing
+    for text in make_texts(60, pages=3):
+        assert field_extractor.extract(text) == legacy_extract(text)
+
+
+def test_typographic_apostrophes_are_recognised():
+    assert field_extractor.highest_qualification('Master’s in Data Science') == 'Masters'
+    assert field_extractor.highest_qualification('Bachelor’s in Arts') == 'Bachelors'
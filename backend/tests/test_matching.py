@@ -0,0 +1,85 @@
+import io
+import math
+
+import pytest
+
+from app.matching import JobMatrix
+from app.scoring import term_frequencies
+from conftest import process, resume_pdf, upload
+
+DESCRIPTIONS = {
+    101: 'haskell ocaml erlang functional programming',
+    102: 'java spring hibernate backend services',
+    103: 'python flask sql backend services',
+    104: 'figma sketch illustrator design',
+}
+
+
+def reference_scores(descriptions, resume):
+    # Cosine similarity of smoothed-idf weighted counts, one job at a time
+    tfs = {job_id: term_frequencies(text) for job_id, text in descriptions.items()}
+    n_jobs = len(tfs)
+
+    def idf(term):
+        df = sum(term in tf for tf in tfs.values())
+        return math.log((1 + n_jobs) / (1 + df)) + 1
+
+    def vector(tf):
+        return {term: count * idf(term) for term, count in tf.items()}
+
+    resume_vector = vector(term_frequencies(resume))
+    resume_norm = math.sqrt(sum(w * w for w in resume_vector.values()))
+    scores = {}
+    for job_id, tf in tfs.items():
+        job_vector = vector(tf)
+        dot = sum(w * resume_vector.get(term, 0.0) for term, w in job_vector.items())
+        scores[job_id] = round(dot / (math.sqrt(sum(w * w for w in job_vector.values())) * resume_norm) * 100, 2)
+    return scores
+
+
+def test_matrix_scores_match_scoring_each_job():
+    matrix = JobMatrix([(job_id, f'Job {job_id}', term_frequencies(text)) for job_id, text in DESCRIPTIONS.items()])
+    resume = 'python flask backend services and some cobol cobol'
+    expected = reference_scores(DESCRIPTIONS, resume)
+
+    matches = matrix.score(term_frequencies(resume), limit=10)
+    assert [job_id for job_id, _, _ in matches] == [103, 102]
+    assert {job_id: score for job_id, _, score in matches} == pytest.approx(
+        {job_id: score for job_id, score in expected.items() if score > 0}, abs=0.01)
+    assert matrix.score(term_frequencies(resume), limit=1) == matches[:1]
+    assert matrix.score(term_frequencies('cobol fortran'), limit=10) == []
+
+
+def match(client, data, filename='resume.pdf', **params):
+    return client.post('/api/match-jobs', query_string=params, data={'file': (io.BytesIO(data), filename)},
+                       content_type='multipart/form-data')
+
+
+def test_resume_is_matched_against_every_job(app, client, job_id):
+    haskell = client.post('/api/jobs', json={
+        'title': 'Functional programmer', 'description': 'Haskell, OCaml and Erlang engineer'
+    }).json['job']['id']
+    resume = resume_pdf('Hal Curry', 'hal.curry@example.com', 'Haskell OCaml Erlang Python', mobile='+1 555 900 0001')
+
+    response = match(client, resume, limit=2)
+    assert response.status_code == 200
+    assert response.json['jobs_scored'] >= 2
+    matches = response.json['matches']
+    assert len(matches) == 2
+    assert matches[0] == {'job_id': haskell, 'job_title': 'Functional programmer', 'score': matches[0]['score']}
+    assert matches[0]['score'] > matches[1]['score']
+
+    # Edited jobs are scored with their new description
+    client.put(f'/api/jobs/{haskell}', json={'description': 'Payroll clerk'})
+    assert haskell not in [m['job_id'] for m in match(client, resume).json['matches']]
+
+    # The same ranking for a stored candidate, which stays out of the jobs it is matched to
+    process(app, upload(client, job_id, resume).json['task_id'])
+    [candidate] = client.get(f'/api/jobs/{job_id}/candidates').json['candidates']
+    stored = client.get(f"/api/candidates/{candidate['candidate_id']}/matches").json['matches']
+    assert stored == match(client, resume).json['matches']
+
+
+def test_match_needs_a_resume_file(client):
+    assert client.post('/api/match-jobs', data={}, content_type='multipart/form-data').status_code == 400
+    assert match(client, b'plain text', filename='resume.txt').status_code == 400
@@ -0,0 +1,64 @@
+import os
+import re
+
+from app.metrics import Histogram, metrics
+from conftest import process, resume_pdf, upload
+
+SAMPLE = re.compile(r'^[a-z_]+(\{[a-z_]+="(?:[^"\\]|\\.)*"(,[a-z_]+="(?:[^"\\]|\\.)*")*\})? [0-9.e+-]+$')
+
+
+def samples(text):
+    """{sample name with labels: value} of a Prometheus text exposition."""
+    values = {}
+    for line in text.splitlines():
+        if line.startswith('#'):
+            continue
+        assert SAMPLE.match(line), line
+        name, value = line.rsplit(' ', 1)
+        values[name] = float(value)
+    return values
+
+
+def test_histogram_exposition():
+    histogram = Histogram('demo_seconds', 'Demo.', ('stage',), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.7, 3.0):
+        histogram.observe(value, 'parse "pdf"')
+
+    lines = histogram.render()
+    assert lines[:2] == ['# HELP demo_seconds Demo.', '# TYPE demo_seconds histogram']
+    assert samples('\n'.join(lines)) == {
+        'demo_seconds_bucket{stage="parse \\"pdf\\"",le="0.1"}': 1,
+        'demo_seconds_bucket{stage="parse \\"pdf\\"",le="1.0"}': 3,
+        'demo_seconds_bucket{stage="parse \\"pdf\\"",le="+Inf"}': 4,
+        'demo_seconds_sum{stage="parse \\"pdf\\""}': 4.25,
+        'demo_seconds_count{stage="parse \\"pdf\\""}': 4,
+    }
+
+
+def test_metrics_cover_requests_tasks_and_stages(app, client, job_id):
+    response = upload(client, job_id, resume_pdf('Mel Trace', 'mel.trace@example.com', mobile='+1 555 950 0001'))
+    assert 'save;dur=' in response.headers['Server-Timing']
+    process(app, response.json['task_id'])
+
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    values = samples(response.get_data(as_text=True))
+    upload_count = 'http_request_duration_seconds_count{method="POST",endpoint="/api/jobs/<int:job_id>/upload-resume",status="202"}'
+    assert values[upload_count] >= 1
+    assert values['resume_task_duration_seconds_count{status="completed"}'] >= 1
+    for stage in ('save', 'extract', 'clean', 'score', 'fields.email', 'commit'):
+        assert values[f'resume_stage_duration_seconds_count{{stage="{stage}"}}'] >= 1, stage
+    assert 'db_pool_checkouts_total' in values
+
+
+def test_requests_are_profiled_on_demand(app, client, monkeypatch):
+    monkeypatch.setattr(metrics, 'profile_token', 'secret')
+    monkeypatch.setattr(metrics, 'profile_max_files', 1)
+
+    assert 'X-Profile-File' not in client.get('/api/jobs', headers={'X-Profile': 'guess'}).headers
+    first = client.get('/api/jobs', headers={'X-Profile': 'secret'}).headers['X-Profile-File']
+    second = client.get('/api/jobs', headers={'X-Profile': 'secret'}).headers['X-Profile-File']
+    assert first != second and second.endswith('.prof') and 'get_jobs' in second
+    # Only the newest PROFILE_MAX_FILES profiles are kept
+    assert [name for name in os.listdir(metrics.profile_dir) if name.endswith('.prof')] == [second]
@@ -0,0 +1,47 @@
+from sqlalchemy import create_engine, event, inspect, text
+
+from app import db
+from app.migrations import MIGRATIONS, add_candidate_indexes, add_task_indexes, status, upgrade
+from app.models import Candidate, Task
+
+
+def index_names(engine, table):
+    return {index['name'] for index in inspect(engine).get_indexes(table)}
+
+
+def old_database(path):
+    """A database made by the old db.create_all(), before any index but the task status one."""
+    engine = create_engine(f"sqlite:///{path}")
+    db.metadata.create_all(engine)
+    with engine.begin() as conn:
+        for table in ('candidate', 'task'):
+            for name in index_names(engine, table) - {'ix_task_status'}:
+                conn.execute(text(f'DROP INDEX {name}'))
+    return engine
+
+
+def test_upgrade_creates_each_index_once(tmp_path):
+    engine = old_database(tmp_path / 'old.db')
+
+    created = []
+    event.listen(engine, 'before_cursor_execute',
+                 lambda conn, cursor, statement, *args: created.append(statement.split()[2])
+                 if statement.startswith('CREATE INDEX') else None)
+    assert upgrade(engine) == sorted(version for version, _, _ in MIGRATIONS)
+
+    assert sorted(created) == sorted(set(created))
+    assert index_names(engine, 'candidate') == {index.name for index in Candidate.__table__.indexes}
+    assert index_names(engine, 'task') == {index.name for index in Task.__table__.indexes}
+    assert status(engine)[1] == []
+    # Applied migrations are not run again
+    assert upgrade(engine) == []
+
+
+def test_index_migrations_do_not_overlap(tmp_path):
+    engine = old_database(tmp_path / 'old.db')
+    with engine.begin() as conn:
+        add_candidate_indexes(conn)
+    assert index_names(engine, 'task') == {'ix_task_status'}
+    with engine.begin() as conn:
+        add_task_indexes(conn)
+    assert index_names(engine, 'task') == {'ix_task_status', 'ix_task_job_id', 'ix_task_filename'}
@@ -0,0 +1,115 @@
+import pytest
+
+from app.leaderboard import leaderboard
+from app.models import db, Candidate
+from app.pagination import encode_cursor
+
+BAD_CURSORS = [
+    'not-a-cursor', encode_cursor([1]), encode_cursor({'score': 1}), encode_cursor(['a', 'b']),
+    encode_cursor([10.0, 1.5]), encode_cursor([True, 1]), encode_cursor([10.0, None])
+]
+
+
+@pytest.fixture
+def ranked_ids(app, job_id):
+    """25 candidates of the job with tied scores; returns their ids best first."""
+    with app.app_context():
+        candidates = [
+            Candidate(name=f'Candidate {i}', email=f'candidate{i}@example.com', score=float(i % 5 * 10),
+                      resume_path=f'ranked/{job_id}_{i}.pdf', job_id=job_id)
+            for i in range(25)
+        ]
+        db.session.add_all(candidates)
+        db.session.commit()
+        ranked = sorted(candidates, key=lambda c: (-c.score, -c.id))
+        leaderboard.invalidate(job_id)
+        return [candidate.id for candidate in ranked]
+
+
+def walk(client, url, key, limit, **params):
+    ids = []
+    cursor = None
+    while True:
+        response = client.get(url, query_string={'limit': limit, **params, **({'cursor': cursor} if cursor else {})})
+        assert response.status_code == 200
+        page = response.json[key]
+        assert len(page) <= limit
+        ids.extend(row['id'] for row in page)
+        cursor = response.json['next_cursor']
+        if cursor is None:
+            return ids
+
+
+@pytest.mark.parametrize('limit', [1, 7, 25, 100])
+def test_candidate_pages_cover_every_candidate_once(client, job_id, ranked_ids, limit):
+    assert walk(client, f'/api/jobs/{job_id}/candidates', 'candidates', limit) == ranked_ids
+
+
+def test_top_resumes_pages_follow_the_same_order(client, job_id, ranked_ids):
+    assert walk(client, '/api/top-resumes', 'top_resumes', 6, job_id=job_id) == ranked_ids
+
+
+@pytest.mark.parametrize('cursor', BAD_CURSORS)
+@pytest.mark.parametrize('capacity', [None, 0])
+def test_invalid_cursors_are_rejected_by_top_resumes(client, job_id, ranked_ids, cursor, capacity, monkeypatch):
+    if capacity is not None:
+        # Straight from the database rather than the leaderboard
+        monkeypatch.setattr(leaderboard, 'capacity', capacity)
+    assert client.get('/api/top-resumes', query_string={'job_id': job_id}).status_code == 200
+    response = client.get('/api/top-resumes', query_string={'job_id': job_id, 'cursor': cursor})
+    assert response.status_code == 400
+    assert response.json['error'] == 'Invalid cursor'
+
+
+def test_pages_are_stable_when_candidates_arrive(app, client, job_id, ranked_ids):
+    first = client.get(f'/api/jobs/{job_id}/candidates', query_string={'limit': 10}).json
+    with app.app_context():
+        # A new best candidate lands before the cursor and is not repeated or skipped after it
+        db.session.add(Candidate(name='Late', email='late@example.com', score=99.0,
+                                 resume_path=f'ranked/{job_id}_late.pdf', job_id=job_id))
+        db.session.commit()
+    second = client.get(f'/api/jobs/{job_id}/candidates',
+                        query_string={'limit': 10, 'cursor': first['next_cursor']}).json
+    assert [c['id'] for c in second['candidates']] == ranked_ids[10:20]
+
+
+def test_page_size_is_clamped(app, client, job_id, ranked_ids):
+    limit = app.config['MAX_PAGE_SIZE']
+    app.config['MAX_PAGE_SIZE'] = 4
+    try:
+        response = client.get(f'/api/jobs/{job_id}/candidates', query_string={'limit': 1000})
+    finally:
+        app.config['MAX_PAGE_SIZE'] = limit
+    assert len(response.json['candidates']) == 4
+    assert response.json['next_cursor']
+
+
+@pytest.mark.parametrize('cursor', BAD_CURSORS)
+def test_invalid_cursors_are_rejected(client, job_id, cursor):
+    response = client.get(f'/api/jobs/{job_id}/candidates', query_string={'cursor': cursor})
+    assert response.status_code == 400
+    assert response.json['error'] == 'Invalid cursor'
+
+
+@pytest.mark.parametrize('cursor', [encode_cursor(['a']), encode_cursor([None]), encode_cursor([2.5])])
+def test_invalid_job_cursors_are_rejected(client, cursor):
+    assert client.get('/api/jobs', query_string={'cursor': cursor}).status_code == 400
+
+
+def test_export_streams_every_candidate_in_order(app, client, job_id, ranked_ids):
+    batch_size = app.config['EXPORT_BATCH_SIZE']
+    app.config['EXPORT_BATCH_SIZE'] = 4
+    try:
+        response = client.get(f'/api/jobs/{job_id}/candidates/export')
+    finally:
+        app.config['EXPORT_BATCH_SIZE'] = batch_size
+    assert response.json['job_id'] == job_id
+    assert [c['id'] for c in response.json['candidates']] == ranked_ids
+
+
+def test_job_pages_are_in_creation_order(client):
+    created = [client.post('/api/jobs', json={'title': f'Job {i}', 'description': 'Python'}).json['job']['id']
+               for i in range(5)]
+    ids = walk(client, '/api/jobs', 'jobs', 2)
+    assert ids == sorted(ids)
+    assert ids[-5:] == created
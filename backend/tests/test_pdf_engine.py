@@ -0,0 +1,116 @@
+import threading
+import time
+
+import pytest
+
+from app.pdf_engine import BACKENDS, ExtractionTimeout, PdfBackend, PdfExtractionEngine
+from benchmarks.corpus import make_pdf
+
+INSTALLED = sorted(name for name, backend in BACKENDS.items() if backend.available())
+
+
+class FakeBackend(PdfBackend):
+    def __init__(self, name, pages=(), error=None, spin=False):
+        self.name = name
+        self.texts = list(pages)
+        self.error = error
+        self.spin = spin
+        self.read = 0
+
+    def available(self):
+        return True
+
+    def pages(self, source, max_pages):
+        if self.error:
+            raise self.error
+        for text in self.texts[:max_pages]:
+            self.read += 1
+            if self.spin:
+                # A malformed page that keeps the parser busy
+                started = time.thread_time()
+                while time.thread_time() - started < 1:
+                    pass
+            yield text
+
+
+def engine_with(*backends, **limits):
+    engine = PdfExtractionEngine(','.join(backend.name for backend in backends), **limits)
+    engine._backends = list(backends)
+    return engine
+
+
+@pytest.fixture
+def long_pdf(tmp_path):
+    path = tmp_path / 'long.pdf'
+    path.write_bytes(make_pdf([f'Marker{page} line{line}' for page in range(1, 9) for line in range(3)],
+                              lines_per_page=3))
+    return str(path)
+
+
+@pytest.mark.parametrize('name', INSTALLED)
+def test_backends_stop_at_the_page_limit(long_pdf, name):
+    engine = PdfExtractionEngine(name, max_pages=3)
+    text = engine.extract(long_pdf)
+    assert all(f'Marker{page}' in text for page in (1, 2, 3))
+    assert 'Marker4' not in text
+    assert engine.stats()['timings'][name]['pages'] == 3
+
+
+@pytest.mark.parametrize('name', INSTALLED)
+def test_backends_read_open_buffers(long_pdf, name):
+    with open(long_pdf, 'rb') as f:
+        assert 'Marker1' in PdfExtractionEngine(name).extract(f)
+
+
+def test_text_is_cut_at_the_character_limit():
+    backend = FakeBackend('fake', ['a' * 40, 'b' * 40, 'c' * 40])
+    text = engine_with(backend, max_chars=60).extract('resume.pdf')
+    assert text == 'a' * 40 + '\n' + 'b' * 19
+    # The third page is never read
+    assert backend.read == 2
+
+
+def test_failing_and_empty_backends_fall_back_to_the_next_one():
+    broken = FakeBackend('broken', error=ValueError('bad xref'))
+    empty = FakeBackend('empty', [' ', ''])
+    working = FakeBackend('working', ['Jane Doe'])
+    engine = engine_with(broken, empty, working)
+
+    assert engine.extract('resume.pdf') == 'Jane Doe'
+    timings = engine.stats()['timings']
+    assert timings['broken']['failures'] == 1
+    assert timings['empty']['failures'] == 0 and timings['empty']['pages'] == 2
+    assert timings['working']['calls'] == 1
+    assert engine_with(broken, empty).extract('resume.pdf') == ''
+
+
+def test_cpu_timeout_on_the_main_thread_is_not_retried():
+    spinning = FakeBackend('spinning', ['page'] * 3, spin=True)
+    fallback = FakeBackend('fallback', ['text'])
+    engine = engine_with(spinning, fallback, timeout=0.2)
+
+    started = time.perf_counter()
+    with pytest.raises(ExtractionTimeout):
+        engine.extract('resume.pdf')
+    assert time.perf_counter() - started < 2
+    assert engine.stats()['timings']['spinning']['timeouts'] == 1
+    assert fallback.read == 0
+
+
+def test_cpu_timeout_off_the_main_thread_is_checked_between_pages():
+    spinning = FakeBackend('spinning', ['page'] * 3, spin=True)
+    engine = engine_with(spinning, timeout=0.2)
+    raised = []
+
+    def extract():
+        try:
+            engine.extract('resume.pdf')
+        except ExtractionTimeout as e:
+            raised.append(e)
+
+    thread = threading.Thread(target=extract)
+    thread.start()
+    thread.join(30)
+    assert raised
+    # Without a signal the slow page itself runs to its end
+    assert spinning.read == 1
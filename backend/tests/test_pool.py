@@ -0,0 +1,57 @@
+import threading
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.exc import TimeoutError
+
+from app.pool import InstrumentedQueuePool, engine_options, pool_metrics
+
+
+def test_engine_options_come_from_the_environment(monkeypatch):
+    monkeypatch.setenv('DB_POOL_SIZE', '7')
+    monkeypatch.setenv('DB_MAX_OVERFLOW', '3')
+    monkeypatch.setenv('DB_POOL_PRE_PING', '0')
+    options = engine_options('postgresql://user:secret@db/resumes')
+    assert options['poolclass'] is InstrumentedQueuePool
+    assert (options['pool_size'], options['max_overflow'], options['pool_pre_ping']) == (7, 3, False)
+    assert options['pool_recycle'] == 1800
+    # Flask-SQLAlchemy's own pool is kept for in-memory SQLite
+    assert engine_options('sqlite://') == {'pool_pre_ping': False}
+
+
+def test_checkout_waits_and_timeouts_are_counted(tmp_path, monkeypatch):
+    monkeypatch.setenv('DB_POOL_SIZE', '1')
+    monkeypatch.setenv('DB_MAX_OVERFLOW', '0')
+    monkeypatch.setenv('DB_POOL_TIMEOUT', '0.2')
+    engine = create_engine(f"sqlite:///{tmp_path / 'pool.db'}", **engine_options(f"sqlite:///{tmp_path / 'pool.db'}"))
+    monkeypatch.setattr(pool_metrics, 'pool', None)
+    pool_metrics.watch(engine)
+    before = pool_metrics.to_dict()
+
+    held = engine.connect()
+    with pytest.raises(TimeoutError):
+        engine.connect()
+    stats = pool_metrics.to_dict()
+    assert (stats['pool_size'], stats['checked_out'], stats['idle']) == (1, 1, 0)
+
+    # A checkout that waits for the held connection to come back
+    threading.Timer(0.1, held.close).start()
+    engine.connect().close()
+
+    stats = pool_metrics.to_dict()
+    assert stats['timeouts'] == before['timeouts'] + 1
+    assert stats['checkouts'] == before['checkouts'] + 2
+    assert stats['connects'] == before['connects'] + 1
+    assert stats['wait_seconds_total'] - before['wait_seconds_total'] >= 0.05
+    assert sum(b['count'] for b in stats['wait_histogram']) == stats['checkouts']
+    assert stats['pool'] == 'InstrumentedQueuePool' and stats['checked_out'] == 0
+    engine.dispose()
+
+
+def test_pool_stats_endpoint(client):
+    before = client.get('/api/db/pool').json['pool']
+    client.get('/api/jobs')
+    stats = client.get('/api/db/pool').json['pool']
+    assert stats['pool'] == 'InstrumentedQueuePool'
+    assert stats['checkouts'] > before['checkouts']
+    assert stats['checked_out'] == 0
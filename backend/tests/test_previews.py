@@ -0,0 +1,49 @@
+import importlib.util
+
+import pytest
+
+from app import pipeline
+from app.previews import render_first_page, resume_previews
+from conftest import process, resume_docx, resume_pdf, upload
+
+pytestmark = pytest.mark.skipif(importlib.util.find_spec('pymupdf') is None, reason='PyMuPDF is not installed')
+
+
+def candidate_id(app, client, job_id, data, filename):
+    process(app, upload(client, job_id, data, filename).json['task_id'])
+    candidates = client.get(f'/api/jobs/{job_id}/candidates').json['candidates']
+    return next(c['candidate_id'] for c in candidates if c['resume_path'].endswith(filename[-5:]))
+
+
+def test_first_page_is_rendered_once_on_the_extraction_pool(app, client, job_id, monkeypatch):
+    submitted = []
+    get_pool = pipeline.get_extraction_pool
+
+    class RecordingPool:
+        def __init__(self, config):
+            self.pool = get_pool(config)
+
+        def submit(self, fn, *args):
+            submitted.append(fn)
+            return self.pool.submit(fn, *args)
+
+    monkeypatch.setattr(pipeline, 'get_extraction_pool', RecordingPool)
+    resume = resume_pdf('Uma Vale', 'uma.vale@example.com', mobile='+1 555 700 0001')
+    url = f'/api/candidates/{candidate_id(app, client, job_id, resume, "uma.pdf")}/preview.png'
+    resume_previews.reset()
+
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.mimetype == 'image/png'
+    assert response.data.startswith(b'\x89PNG\r\n\x1a\n')
+    assert submitted == [render_first_page]
+
+    assert client.get(url).data == response.data
+    stats = client.get('/api/previews/stats').json['previews']
+    assert (stats['image_renders'], stats['image_hits'], stats['image_failures']) == (1, 1, 0)
+
+
+def test_docx_resumes_have_no_image(app, client, job_id):
+    resume = resume_docx('Vic Wade', 'vic.wade@example.com')
+    url = f'/api/candidates/{candidate_id(app, client, job_id, resume, "vic.docx")}/preview.png'
+    assert client.get(url).status_code == 404
@@ -0,0 +1,47 @@
+import pytest
+
+from app.pipeline import analyze_resume
+from app.scoring import JobScoringModel, term_frequencies
+from conftest import process, resume_pdf, upload
+
+NEW_DESCRIPTION = 'Java engineer with Spring, SQL and Kubernetes experience'
+
+RESUMES = [
+    ('Ada Kern', 'ada.kern@example.com', '+1 555 400 0001', 'Java Spring SQL'),
+    ('Ben Voss', 'ben.voss@example.com', '+1 555 400 0002', 'Python Flask Docker'),
+    ('Cy Lowe', 'cy.lowe@example.com', '+1 555 400 0003', 'Kubernetes SQL Go'),
+]
+
+
+def candidate_scores(client, job_id):
+    return {c['email']: c['score'] for c in client.get(f'/api/jobs/{job_id}/candidates').json['candidates']}
+
+
+def test_rescore_matches_scoring_each_resume_against_the_whole_corpus(app, client, job_id, tmp_path):
+    tfs = {}
+    for name, email, mobile, skills in RESUMES:
+        resume = resume_pdf(name, email, skills, mobile=mobile)
+        process(app, upload(client, job_id, resume).json['task_id'])
+        path = tmp_path / f'{email}.pdf'
+        path.write_bytes(resume)
+        tfs[email] = term_frequencies(analyze_resume(str(path))['tokens'])
+
+    response = client.put(f'/api/jobs/{job_id}', json={'description': NEW_DESCRIPTION})
+    assert response.status_code == 200
+    assert response.json['rescored_candidates'] == len(RESUMES)
+
+    # What scoring one resume at a time gives once every resume is counted
+    model = JobScoringModel(job_id, NEW_DESCRIPTION)
+    for tf in tfs.values():
+        model.add_document(tf)
+    expected = {email: model.score(tf) for email, tf in tfs.items()}
+    assert candidate_scores(client, job_id) == pytest.approx(expected, abs=0.01)
+    assert max(expected, key=expected.get) == 'ada.kern@example.com'
+
+    response = client.post(f'/api/jobs/{job_id}/rescore')
+    assert response.json['rescored_candidates'] == len(RESUMES)
+    assert candidate_scores(client, job_id) == pytest.approx(expected, abs=0.01)
+
+
+def test_rescoring_a_missing_job(client):
+    assert client.post('/api/jobs/999999/rescore').status_code == 404
@@ -0,0 +1,55 @@
+import hashlib
+
+import pytest
+
+from app.models import db, Job
+from app.scorers import SCORERS
+from app.scoring import model_cache
+from conftest import process, resume_pdf, upload
+
+DESCRIPTION = 'Required: Python, Flask and SQL. Nice to have: Docker, Kubernetes.'
+
+RESUMES = [
+    ('Mia Rose', 'mia.rose@example.com', '+1 555 300 0001', 'Python Flask SQL Docker'),
+    ('Noah Hale', 'noah.hale@example.com', '+1 555 300 0002', 'Java Spring SQL'),
+    ('Olga Pratt', 'olga.pratt@example.com', '+1 555 300 0003', 'Python Kubernetes'),
+]
+
+
+def candidate_scores(client, job_id):
+    return {c['email']: c['score'] for c in client.get(f'/api/jobs/{job_id}/candidates').json['candidates']}
+
+
+@pytest.mark.parametrize('engine', sorted(SCORERS))
+def test_upload_scores_match_rescoring(app, client, engine):
+    job_id = client.post('/api/jobs', json={
+        'title': f'{engine} job', 'description': DESCRIPTION, 'scoring_engine': engine
+    }).json['job']['id']
+    for name, email, mobile, skills in RESUMES:
+        process(app, upload(client, job_id, resume_pdf(name, email, skills, mobile=mobile)).json['task_id'])
+    uploaded = candidate_scores(client, job_id)
+
+    assert client.post(f'/api/jobs/{job_id}/rescore').status_code == 200
+    rescored = candidate_scores(client, job_id)
+    # The last resume was scored against the complete corpus, like every rescored one
+    assert uploaded['olga.pratt@example.com'] == pytest.approx(rescored['olga.pratt@example.com'], abs=0.01)
+    assert rescored['mia.rose@example.com'] > rescored['noah.hale@example.com']
+
+
+@pytest.mark.parametrize('engine', ['skills', 'sections'])
+def test_scorers_read_stored_counts(app, client, job_id, engine, monkeypatch):
+    resume = resume_pdf('Pia Lund', 'pia.lund@example.com', 'Python Flask SQL', mobile='+1 555 300 0004')
+    process(app, upload(client, job_id, resume).json['task_id'])
+    content_hash = hashlib.sha256(resume).hexdigest()
+    scorer = SCORERS[engine]
+    with app.app_context():
+        job = db.session.get(Job, job_id)
+        model = model_cache.get(job)
+        expected = scorer.score(job, model, {'content_hash': content_hash, 'text': ''}, None)
+
+        def tokenize(analysis):
+            raise AssertionError('Resume text tokenized again')
+
+        monkeypatch.setattr(scorer, 'resume_counts', tokenize)
+        assert scorer.score(job, model, {'content_hash': content_hash, 'text': 'ignored'}, None) == expected
+        assert expected > 0
@@ -0,0 +1,130 @@
+import os
+import threading
+from array import array
+from collections import Counter
+from types import SimpleNamespace
+
+from app.scoring import ScoringModelCache, fit_and_score, term_frequencies
+
+
+def make_cache(directory, corpus_loader=None):
+    cache = ScoringModelCache()
+    cache.directory = str(directory)
+    cache.corpus_loader = corpus_loader
+    return cache
+
+
+def make_job(job_id, description='Python developer with Flask and SQL'):
+    return SimpleNamespace(id=job_id, description=description)
+
+
+def test_fit_runs_outside_the_cache_lock(tmp_path):
+    started = threading.Event()
+    release = threading.Event()
+    fits = Counter()
+
+    def slow_corpus(job):
+        fits[job.id] += 1
+        if job.id == 1:
+            started.set()
+            release.wait(5)
+        yield 'a' * 64, term_frequencies('python flask')
+
+    cache = make_cache(tmp_path, slow_corpus)
+    models = []
+    threads = [threading.Thread(target=lambda: models.append(cache.get(make_job(1)))) for _ in range(3)]
+    threads[0].start()
+    assert started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+
+    # Another job's model is available while job 1 is being fitted
+    assert cache.get(make_job(2)).job_id == 2
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert len(models) == 3 and all(model is models[0] for model in models)
+    assert fits == {1: 1, 2: 1}
+
+
+def test_same_content_is_counted_once(tmp_path):
+    cache = make_cache(tmp_path)
+    job = make_job(1)
+    tf = term_frequencies('python flask docker')
+    cache.add_resume(job, tf, 'a' * 64)
+    model = cache.get(job)
+    n_docs, df = model.n_docs, dict(model.df)
+
+    assert not model.add_document(tf, 'a' * 64)
+    cache.add_resume(job, tf, 'a' * 64)
+    assert (model.n_docs, dict(model.df)) == (n_docs, df)
+    cache.add_resume(job, tf, 'b' * 64)
+    assert model.n_docs == n_docs + 1
+
+
+def test_saves_from_several_processes_are_merged(tmp_path):
+    # Two caches on one directory stand for two worker processes
+    first, second = make_cache(tmp_path), make_cache(tmp_path)
+    job = make_job(1)
+    first.get(job)
+    second.get(job)
+    first.add_resume(job, term_frequencies('python flask'), 'a' * 64)
+    second.add_resume(job, term_frequencies('docker sql'), 'b' * 64)
+    second.add_resume(job, term_frequencies('python flask'), 'a' * 64)
+    first.flush()
+    second.flush()
+
+    merged = make_cache(tmp_path).get(job)
+    assert merged.documents == {'a' * 64, 'b' * 64}
+    assert merged.n_docs == 3  # the description and two resumes
+    # The process saving last took over what the other one saved
+    assert second.get(job).to_dict() == merged.to_dict()
+
+
+def model_file(directory, job_id=1):
+    stat = os.stat(os.path.join(directory, f'job_{job_id}.json'))
+    return stat.st_ino, stat.st_mtime_ns
+
+
+def test_saves_are_journaled_until_the_journal_is_full(tmp_path):
+    first, second = make_cache(tmp_path), make_cache(tmp_path)
+    first.compact_every = second.compact_every = 3
+    job = make_job(1)
+    first.get(job)
+    second.get(job)
+    written = model_file(tmp_path)
+
+    first.add_resume(job, term_frequencies('python flask'), 'a' * 64)
+    first.flush()
+    second.add_resume(job, term_frequencies('docker sql'), 'b' * 64)
+    second.flush()
+    # Only appended to the journal, which each save reads back first
+    assert model_file(tmp_path) == written
+    assert second.get(job).documents == {'a' * 64, 'b' * 64}
+    assert make_cache(tmp_path).get(job).to_dict() == second.get(job).to_dict()
+
+    second.add_resume(job, term_frequencies('java spring'), 'c' * 64)
+    second.flush()
+    assert model_file(tmp_path) != written
+    assert not [name for name in os.listdir(tmp_path) if name.endswith('.journal')]
+
+    # The other process finds the model rewritten and merges into it
+    first.add_resume(job, term_frequencies('rust go'), 'd' * 64)
+    first.flush()
+    merged = make_cache(tmp_path).get(job)
+    assert merged.documents == {'a' * 64, 'b' * 64, 'c' * 64, 'd' * 64}
+    assert merged.n_docs == 5
+    assert first.get(job).to_dict() == merged.to_dict()
+
+
+def test_refit_counts_each_resume_once():
+    description = 'Python developer with Flask and SQL'
+    tfs = [term_frequencies('python flask'), term_frequencies('docker sql')]
+    blobs = [(array('I', tf.keys()).tobytes(), array('I', tf.values()).tobytes()) for tf in tfs]
+
+    model, scores = fit_and_score(1, description, blobs + blobs[:1], ['a' * 64, 'b' * 64, 'a' * 64])
+    distinct, _ = fit_and_score(1, description, blobs)
+
+    assert (model.n_docs, dict(model.df)) == (distinct.n_docs, dict(distinct.df))
+    assert model.documents == {'a' * 64, 'b' * 64}
+    assert scores[0] == scores[2]
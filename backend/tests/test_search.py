@@ -0,0 +1,131 @@
+import math
+import random
+from array import array
+from collections import Counter
+
+import pytest
+
+from app.search import B, K1, JobSearchIndex
+from conftest import process, resume_pdf, upload
+
+
+def packed(tf):
+    return array('I', tf.keys()).tobytes(), array('I', tf.values()).tobytes()
+
+
+def reference_bm25(documents, terms, match_all):
+    """Textbook BM25 over {candidate id: Counter of term ids}, best first."""
+    n_docs = len(documents)
+    average_length = sum(sum(tf.values()) for tf in documents.values()) / n_docs
+    scores = {}
+    for candidate_id, tf in documents.items():
+        present = [term for term in terms if tf[term]]
+        if not present or (match_all and len(present) < len(terms)):
+            continue
+        length = sum(tf.values())
+        score = 0.0
+        for term in present:
+            n_term = sum(1 for other in documents.values() if other[term])
+            idf = math.log(1 + (n_docs - n_term + 0.5) / (n_term + 0.5))
+            score += idf * tf[term] * (K1 + 1) / (tf[term] + K1 * (1 - B + B * length / average_length))
+        scores[candidate_id] = score
+    return sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+
+
+def random_documents(count, seed=5):
+    rng = random.Random(seed)
+    return {candidate_id: Counter(rng.choices(range(40), k=rng.randint(5, 60)))
+            for candidate_id in range(1, count + 1)}
+
+
+def make_index(documents):
+    index = JobSearchIndex(1)
+    index.add((candidate_id, *packed(tf)) for candidate_id, tf in documents.items())
+    return index
+
+
+@pytest.mark.parametrize('merged', [False, True])
+@pytest.mark.parametrize('match_all', [True, False])
+def test_search_matches_reference_bm25(merged, match_all):
+    documents = random_documents(60)
+    index = make_index(documents)
+    if merged:
+        index._merge()
+
+    for terms in ([3], [3, 7], [1, 2, 39], [5, 5]):
+        total, hits = index.search(terms, limit=10, match_all=match_all)
+        expected = reference_bm25(documents, list(dict.fromkeys(terms)), match_all)
+        assert total == len(expected)
+        assert [c for c, _ in hits] == [c for c, _ in expected[:10]]
+        assert [s for _, s in hits] == pytest.approx([s for _, s in expected[:10]])
+
+
+def test_replaced_resume_is_searched_as_its_new_version():
+    documents = random_documents(20)
+    index = make_index(documents)
+    documents[4] = Counter({1000: 3, 7: 1})
+    index.add([(4, *packed(documents[4]))])
+
+    for merge in (False, True):
+        if merge:
+            index._merge()
+        assert len(index) == 20
+        total, hits = index.search([1000], limit=5)
+        assert (total, [c for c, _ in hits]) == (1, [4])
+        _, hits = index.search([7], limit=50)
+        expected = reference_bm25(documents, [7], True)
+        assert [c for c, _ in hits] == [c for c, _ in expected]
+        assert [s for _, s in hits] == pytest.approx([s for _, s in expected])
+
+
+def test_missing_term_matches_nothing_when_all_are_required():
+    index = make_index({1: Counter({1: 1, 2: 1})})
+    assert index.search([1, 99], limit=5) == (0, [])
+    assert index.search([1, 99], limit=5, match_all=False)[0] == 1
+    assert JobSearchIndex(2).search([1], limit=5) == (0, [])
+
+
+def search(client, job_id, **params):
+    return client.get(f'/api/jobs/{job_id}/search', query_string=params)
+
+
+def test_search_endpoint(app, client, job_id):
+    resumes = [
+        ('Ann Go', 'ann.go@example.com', '+1 555 000 0001', 'Go Kubernetes Docker'),
+        ('Ben Cpp', 'ben.cpp@example.com', '+1 555 000 0002', 'C++ embedded Linux'),
+        ('Cat Py', 'cat.py@example.com', '+1 555 000 0003', 'Python Flask Docker'),
+    ]
+    for name, email, mobile, skills in resumes:
+        process(app, upload(client, job_id, resume_pdf(name, email, skills, mobile=mobile)).json['task_id'])
+
+    response = search(client, job_id, q='docker')
+    assert response.status_code == 200
+    assert response.json['total'] == 2
+    assert {c['name'] for c in response.json['candidates']} == {'Ann Go', 'Cat Py'}
+
+    # Short and symbol-suffixed skills are searchable
+    for query, name in (('go', 'Ann Go'), ('c++', 'Ben Cpp')):
+        assert [c['name'] for c in search(client, job_id, q=query).json['candidates']] == [name]
+
+    assert search(client, job_id, q='flask kubernetes').json['total'] == 0
+    assert search(client, job_id, q='flask kubernetes', match='any').json['total'] == 2
+
+    assert search(client, job_id).status_code == 400
+    assert search(client, job_id, q=' '.join(['word'] * 100)).status_code == 400
+    assert search(client, 999999, q='python').status_code == 404
+
+
+def test_new_candidates_are_indexed_as_they_are_saved(app, client, job_id):
+    from app.search import search_indexes
+
+    process(app, upload(client, job_id, resume_pdf('Eve Rust', 'eve.rust@example.com', 'Rust WebAssembly',
+                                                   mobile='+1 555 000 0011')).json['task_id'])
+    assert search(client, job_id, q='webassembly').json['total'] == 1
+    index = search_indexes._indexes[job_id]
+    assert len(index) == 1
+
+    process(app, upload(client, job_id, resume_pdf('Fay Zig', 'fay.zig@example.com', 'Zig WebAssembly',
+                                                   mobile='+1 555 000 0012')).json['task_id'])
+    # In the index before any search looks for new candidates
+    assert len(index) == 2
+    assert search(client, job_id, q='webassembly').json['total'] == 2
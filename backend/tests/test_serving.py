@@ -0,0 +1,82 @@
+import hashlib
+import os
+
+import pytest
+
+from conftest import process, resume_pdf, upload
+
+
+@pytest.fixture
+def stored_resume(app, client, job_id):
+    """(download URL, file bytes) of a processed resume."""
+    resume = resume_pdf('Rae Sol', 'rae.sol@example.com', mobile='+1 555 600 0001')
+    process(app, upload(client, job_id, resume).json['task_id'])
+    candidate = client.get(f'/api/jobs/{job_id}/candidates').json['candidates'][0]
+    return f"/api/resumes/{candidate['resume_path']}", resume
+
+
+@pytest.fixture
+def offload(app):
+    def set_mode(mode):
+        app.config['FILE_OFFLOAD'] = mode
+    yield set_mode
+    app.config['FILE_OFFLOAD'] = ''
+
+
+def test_resume_is_served_with_content_hash_etag(client, stored_resume):
+    url, resume = stored_resume
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.data == resume
+    assert response.headers['ETag'] == f'"{hashlib.sha256(resume).hexdigest()}"'
+    assert response.headers['Accept-Ranges'] == 'bytes'
+    assert 'private' in response.headers['Cache-Control']
+    assert 'public' not in response.headers['Cache-Control']
+
+    revalidated = client.get(url, headers={'If-None-Match': response.headers['ETag']})
+    assert revalidated.status_code == 304
+    assert revalidated.data == b''
+
+
+def test_byte_ranges(client, stored_resume):
+    url, resume = stored_resume
+    response = client.get(url, headers={'Range': 'bytes=10-109'})
+    assert response.status_code == 206
+    assert response.data == resume[10:110]
+    assert response.headers['Content-Range'] == f'bytes 10-109/{len(resume)}'
+
+    suffix = client.get(url, headers={'Range': 'bytes=-20'})
+    assert suffix.status_code == 206 and suffix.data == resume[-20:]
+
+    assert client.get(url, headers={'Range': f'bytes={len(resume) + 10}-'}).status_code == 416
+    # A range for an older version of the file gets the whole current file
+    stale = client.get(url, headers={'Range': 'bytes=0-9', 'If-Range': '"not-the-hash"'})
+    assert stale.status_code == 200 and stale.data == resume
+
+
+def test_download_and_missing_files(client, stored_resume):
+    url, _ = stored_resume
+    download = client.get(f'{url}?download')
+    assert download.headers['Content-Disposition'].startswith('attachment')
+    assert client.get('/api/resumes/no/such-file.pdf').status_code == 404
+    assert client.get('/api/resumes/../app/__init__.py').status_code == 404
+
+
+@pytest.mark.parametrize('mode, header', [('x-accel-redirect', 'X-Accel-Redirect'), ('x-sendfile', 'X-Sendfile')])
+def test_offloaded_bodies(app, client, stored_resume, offload, mode, header):
+    url, resume = stored_resume
+    offload(mode)
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.data == b''
+    filename = url[len('/api/resumes/'):]
+    if mode == 'x-accel-redirect':
+        assert response.headers[header] == app.config['ACCEL_REDIRECT_PREFIX'].rstrip('/') + '/' + filename
+    else:
+        assert response.headers[header] == os.path.abspath(os.path.join(app.config['UPLOAD_FOLDER'], filename))
+    assert response.headers['ETag'] == f'"{hashlib.sha256(resume).hexdigest()}"'
+
+    # Conditional requests never reach the proxy
+    revalidated = client.get(url, headers={'If-None-Match': response.headers['ETag']})
+    assert revalidated.status_code == 304
+    assert header not in revalidated.headers
@@ -0,0 +1,76 @@
+import os
+import re
+import runpy
+
+import pytest
+
+from app import pipeline
+from app.pipeline import analyze_resume_timed
+from conftest import process, resume_pdf, upload
+
+GUNICORN_CONF = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'gunicorn.conf.py')
+
+
+def gunicorn_settings(monkeypatch, **environ):
+    for name in ('GUNICORN_WORKER_CLASS', 'GUNICORN_THREADS', 'GUNICORN_BIND', 'WEB_CONCURRENCY',
+                 'EXTRACTION_OFFLOAD'):
+        monkeypatch.delenv(name, raising=False)
+    for name, value in environ.items():
+        monkeypatch.setenv(name, value)
+    settings = {name: value for name, value in runpy.run_path(GUNICORN_CONF).items()
+                if not name.startswith('__') and name != 'os'}
+    return settings, os.environ.get('EXTRACTION_OFFLOAD')
+
+
+def test_gunicorn_defaults_to_threaded_workers_with_offloaded_parsing(monkeypatch):
+    settings, offload = gunicorn_settings(monkeypatch)
+    assert (settings['worker_class'], settings['workers'], settings['threads']) == ('gthread', 2, 8)
+    assert offload == '1'
+    assert 'bind' not in settings
+
+    gunicorn_config = pytest.importorskip('gunicorn.config')
+    known = gunicorn_config.Config().settings
+    assert all(name in known for name in settings), set(settings) - set(known)
+
+
+def test_gunicorn_sync_and_gevent_modes(monkeypatch):
+    settings, offload = gunicorn_settings(monkeypatch, GUNICORN_WORKER_CLASS='sync', GUNICORN_THREADS='16',
+                                          GUNICORN_BIND='0.0.0.0:9000')
+    assert (settings['threads'], settings['bind'], offload) == (1, '0.0.0.0:9000', None)
+
+    settings, offload = gunicorn_settings(monkeypatch, GUNICORN_WORKER_CLASS='gevent', EXTRACTION_OFFLOAD='0')
+    assert settings['worker_class'] == 'gevent' and settings['threads'] == 1
+    # An explicit setting wins
+    assert offload == '0'
+
+
+def extract_count(client):
+    match = re.search(r'^resume_stage_duration_seconds_count\{stage="extract"\} (\d+)$',
+                      client.get('/metrics').get_data(as_text=True), re.MULTILINE)
+    return int(match.group(1)) if match else 0
+
+
+def test_offloaded_uploads_are_parsed_on_the_extraction_pool(app, client, job_id, monkeypatch):
+    submitted = []
+    get_pool = pipeline.get_extraction_pool
+
+    class RecordingPool:
+        def __init__(self, config):
+            self.pool = get_pool(config)
+
+        def submit(self, fn, *args):
+            submitted.append(fn)
+            return self.pool.submit(fn, *args)
+
+    monkeypatch.setattr(pipeline, 'get_extraction_pool', RecordingPool)
+    monkeypatch.setitem(app.config, 'EXTRACTION_OFFLOAD', True)
+    extracted = extract_count(client)
+    resume = resume_pdf('Oli Ford', 'oli.ford@example.com', mobile='+1 555 960 0001')
+    task_id = upload(client, job_id, resume).json['task_id']
+    process(app, task_id)
+
+    assert submitted == [analyze_resume_timed]
+    task = client.get(f'/api/tasks/{task_id}').json['task']
+    assert task['result']['extracted_info']['email'] == 'oli.ford@example.com'
+    # Timed in the pool process, recorded here
+    assert extract_count(client) == extracted + 1
@@ -0,0 +1,63 @@
+import json
+import os
+
+import shortlist
+from conftest import resume_docx, resume_pdf
+
+
+def crash_on_marked_files(task):
+    """Runs in a pool process: dies like a process killed past its limits on files named crash*."""
+    _, key = task
+    if os.path.basename(key[0]).startswith('crash'):
+        os._exit(1)
+    return shortlist.process_resume(task)
+
+
+def make_directory(path, crashing=1):
+    path.mkdir()
+    (path / 'a.pdf').write_bytes(resume_pdf('Ada Byron', 'ada.byron@example.com'))
+    (path / 'b.docx').write_bytes(resume_docx('Bo Chen', 'bo.chen@example.com'))
+    (path / 'nested').mkdir()
+    (path / 'nested' / 'c.pdf').write_bytes(resume_pdf('Cy Dunn', 'cy.dunn@example.com'))
+    for i in range(crashing):
+        (path / f'crash{i}.pdf').write_bytes(resume_pdf('Dee Eng', f'dee{i}@example.com'))
+    return [shortlist.file_key(str(path), p) for p in shortlist.find_resumes(str(path))]
+
+
+def test_dead_pool_process_fails_only_its_file(tmp_path):
+    directory = tmp_path / 'resumes'
+    keys = make_directory(directory)
+    checkpoint = str(tmp_path / 'run.checkpoint')
+    records = {}
+
+    _, extracted = shortlist.extract_all(str(directory), keys, records, checkpoint, 'tfidf', 2, None,
+                                         worker=crash_on_marked_files)
+
+    assert extracted == 4
+    assert records['crash0.pdf']['error'] == shortlist.LOST_ERROR
+    assert {path: record['fields']['email'] for path, record in records.items() if 'error' not in record} == {
+        'a.pdf': 'ada.byron@example.com',
+        'b.docx': 'bo.chen@example.com',
+        os.path.join('nested', 'c.pdf'): 'cy.dunn@example.com',
+    }
+    with open(checkpoint) as f:
+        lines = [json.loads(line) for line in f]
+    assert lines[0] == {'checkpoint': shortlist.CHECKPOINT_VERSION, 'engine': 'tfidf'}
+    assert sorted(line['key'][0] for line in lines[1:]) == sorted(records)
+
+
+def test_resumed_run_only_retries_failures(tmp_path):
+    directory = tmp_path / 'resumes'
+    keys = make_directory(directory, crashing=0)
+    checkpoint = str(tmp_path / 'run.checkpoint')
+    records = {}
+    shortlist.extract_all(str(directory), keys, records, checkpoint, 'tfidf', 1, None)
+    records['a.pdf'] = {'key': records['a.pdf']['key'], 'error': 'Failed before'}
+
+    loaded = shortlist.load_checkpoint(checkpoint, 'tfidf')
+    loaded['a.pdf'] = records['a.pdf']
+    _, extracted = shortlist.extract_all(str(directory), keys, loaded, checkpoint, 'tfidf', 1, None)
+
+    assert extracted == 1
+    assert 'error' not in loaded['a.pdf']
+    assert shortlist.load_checkpoint(checkpoint, 'bm25') == {}
@@ -0,0 +1,100 @@
+import os
+from datetime import datetime, timedelta
+
+import click
+
+from app import _running_cli_command, db
+from app.models import Candidate, Task
+from app.tasks import COMPLETED, FAILED, QUEUED, RUNNING, TaskQueue, claim_next_task
+
+from conftest import process, resume_pdf, upload
+
+
+def _stall(app, task_id, minutes, attempts):
+    # What a worker that crashed mid-task leaves behind
+    with app.app_context():
+        task = db.session.get(Task, task_id)
+        task.status = RUNNING
+        task.started_at = datetime.utcnow() - timedelta(minutes=minutes)
+        task.attempts = attempts
+        db.session.commit()
+
+
+def test_upload_is_processed_by_task(app, client, job_id):
+    response = upload(client, job_id, resume_pdf())
+    assert response.status_code == 202
+    task_id = response.json['task_id']
+    assert client.get(f'/api/tasks/{task_id}').json['task']['status'] == QUEUED
+
+    process(app, task_id)
+
+    task = client.get(f'/api/tasks/{task_id}').json['task']
+    assert task['status'] == COMPLETED
+    assert task['attempts'] == 1
+    assert task['result']['extracted_info']['name'] == 'Jane Doe'
+    with app.app_context():
+        assert Candidate.query.filter_by(job_id=job_id).count() == 1
+
+
+def test_stale_running_task_is_requeued_and_claimed(app, client, job_id):
+    task_id = upload(client, job_id, resume_pdf(email='stale@example.com')).json['task_id']
+    _stall(app, task_id, minutes=60, attempts=1)
+
+    with app.app_context():
+        # Nothing else is queued, so the requeued task is the one claimed
+        while True:
+            claimed = claim_next_task()
+            if claimed in (task_id, None):
+                break
+        assert claimed == task_id
+        task = db.session.get(Task, task_id)
+        assert task.status == RUNNING
+        assert task.attempts == 2
+
+
+def test_recent_running_task_is_left_alone(app, client, job_id):
+    task_id = upload(client, job_id, resume_pdf(email='recent@example.com')).json['task_id']
+    _stall(app, task_id, minutes=1, attempts=1)
+
+    with app.app_context():
+        claim_next_task()
+        task = db.session.get(Task, task_id)
+        assert task.status == RUNNING
+        assert task.attempts == 1
+
+
+def test_task_fails_after_max_attempts(app, client, job_id):
+    task_id = upload(client, job_id, resume_pdf(email='doomed@example.com')).json['task_id']
+    _stall(app, task_id, minutes=60, attempts=app.config['TASK_MAX_ATTEMPTS'])
+
+    with app.app_context():
+        filename = db.session.get(Task, task_id).filename
+        claim_next_task()
+        db.session.expire_all()
+        task = db.session.get(Task, task_id)
+        assert task.status == FAILED
+        assert 'Abandoned' in task.error
+    # A worker that is only slow may still be reading it
+    assert os.path.exists(os.path.join(app.config['UPLOAD_FOLDER'], filename))
+
+
+def test_workers_start_once_per_process(app, monkeypatch):
+    monkeypatch.setitem(app.config, 'TASK_WORKERS', 2)
+    # Workers that would only look at the database in an hour
+    monkeypatch.setitem(app.config, 'TASK_POLL_INTERVAL', 3600)
+    monkeypatch.setitem(app.config, 'BACKGROUND_THREADS', False)
+    workers = TaskQueue()
+    workers.init_app(app)
+    assert workers._threads == []
+
+    monkeypatch.setitem(app.config, 'BACKGROUND_THREADS', True)
+    workers.init_app(app)
+    workers.init_app(app)
+    assert len(workers._threads) == 2
+
+
+def test_flask_commands_other_than_run_start_no_threads():
+    assert not _running_cli_command()
+    for command, background in (('shell', False), ('routes', False), ('run', True)):
+        with click.Context(click.Command(command), info_name=command):
+            assert _running_cli_command() != background
@@ -0,0 +1,43 @@
+import argparse
+import multiprocessing
+import os
+import time
+
+
+def run_worker(threads):
+    """Runs one worker process: the app's task pool with no web server attached."""
+    os.environ['TASK_WORKERS'] = str(threads)
+    from app import create_app
+    create_app()
+    while True:
+        time.sleep(3600)
+
+
+def main():
+    """
+    Starts dedicated resume-processing workers. Web processes can then run
+    with TASK_WORKERS=0 and throughput scales by adding worker processes.
+    """
+    parser = argparse.ArgumentParser(description='Resume processing workers')
+    parser.add_argument('--processes', type=int, default=multiprocessing.cpu_count(),
+                        help='number of worker processes (default: CPU count)')
+    parser.add_argument('--threads', type=int, default=1,
+                        help='worker threads per process (default: 1)')
+    args = parser.parse_args()
+
+    print(f"Starting {args.processes} worker process(es) with {args.threads} thread(s) each")
+    processes = [
+        multiprocessing.Process(target=run_worker, args=(args.threads,), daemon=True)
+        for _ in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        print("Stopping workers")
+
+
+if __name__ == "__main__":
+    main()
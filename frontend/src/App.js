@@ -9,6 +9,32 @@ if (window.location.hostname === 'localhost') {
   axios.defaults.baseURL = 'http://localhost:5000';
 }
 
+// Poll a background processing task until the worker pool finishes it; gives up
+// with a TaskTimeoutError once timeoutMs has passed
+class TaskTimeoutError extends Error {}
+
+const waitForTask = async (taskId, intervalMs = 1000, timeoutMs = 5 * 60 * 1000) => {
+  const deadline = Date.now() + timeoutMs;
+  for (;;) {
+    const response = await axios.get(`/api/tasks/${taskId}`);
+    const task = response.data.task;
+    if (task.status === 'completed' || task.status === 'failed') {
+      return task;
+    }
+    if (Date.now() + intervalMs > deadline) {
+      throw new TaskTimeoutError(`Processing did not finish within ${Math.round(timeoutMs / 1000)} seconds`);
+    }
+    await new Promise(resolve => setTimeout(resolve, intervalMs));
+  }
+};
+
+// Listing endpoints return one page at a time; the next_cursor of a page (null on
+// the last one) fetches the page after it when the user asks for more
+const fetchPage = async (url, key, cursor = null) => {
+  const response = await axios.get(url, { params: cursor ? { cursor } : {} });
+  return { items: response.data[key], nextCursor: response.data.next_cursor };
+};
+
 // Custom modal component for displaying results
 const ResultModal = ({ isOpen, onClose, results }) => {
   if (!isOpen) return null;
@@ -61,6 +87,7 @@ const TopResumesPage = () => {
   const [limit, setLimit] = useState(10);
   const [selectedJobId, setSelectedJobId] = useState('all');
   const [availableJobs, setAvailableJobs] = useState([]);
+  const [jobsCursor, setJobsCursor] = useState(null);
   const limitOptions = [10, 20, 30, 50, 100];
 
   useEffect(() => {
@@ -68,10 +95,11 @@ const TopResumesPage = () => {
     fetchTopResumes();
   }, [limit, selectedJobId]);
 
-  const fetchJobs = async () => {
+  const fetchJobs = async (cursor = null) => {
     try {
-      const response = await axios.get('/api/jobs');
-      setAvailableJobs(response.data.jobs);
+      const page = await fetchPage('/api/jobs', 'jobs', cursor);
+      setAvailableJobs(prevJobs => cursor ? [...prevJobs, ...page.items] : page.items);
+      setJobsCursor(page.nextCursor);
     } catch (err) {
       console.error("Failed to fetch jobs for filter:", err);
     }
@@ -124,6 +152,11 @@ const TopResumesPage = () => {
               </option>
             ))}
           </select>
+          {jobsCursor && (
+            <button type="button" className="load-more-btn" onClick={() => fetchJobs(jobsCursor)}>
+              More jobs
+            </button>
+          )}
         </div>
         
         <div className="limit-selector">
@@ -188,6 +221,8 @@ function App() {
   const [jobs, setJobs] = useState([]);
   const [selectedJob, setSelectedJob] = useState(null);
   const [candidates, setCandidates] = useState([]);
+  const [jobsCursor, setJobsCursor] = useState(null);
+  const [candidatesCursor, setCandidatesCursor] = useState(null);
   const [newJob, setNewJob] = useState({ title: '', description: '' });
   const [candidateInfo, setCandidateInfo] = useState({ name: '', email: '', mobile: '', city: '' });
   const [error, setError] = useState('');
@@ -204,11 +239,12 @@ function App() {
     fetchJobs();
   }, []);
 
-  const fetchJobs = async () => {
+  const fetchJobs = async (cursor = null) => {
     try {
       setLoading(true);
-      const response = await axios.get('/api/jobs');
-      setJobs(response.data.jobs);
+      const page = await fetchPage('/api/jobs', 'jobs', cursor);
+      setJobs(prevJobs => cursor ? [...prevJobs, ...page.items] : page.items);
+      setJobsCursor(page.nextCursor);
       setError('');
     } catch (err) {
       setError('Failed to fetch jobs');
@@ -313,6 +349,7 @@ function App() {
         success: 0,
         skipped: 0,
         failed: 0,
+        timedOut: 0,
         skippedFiles: []
       };
       
@@ -329,11 +366,20 @@ function App() {
         }
         
         try {
-          await axios.post(`/api/jobs/${selectedJob.id}/upload-resume`, formData);
+          const response = await axios.post(`/api/jobs/${selectedJob.id}/upload-resume`, formData);
+          const task = await waitForTask(response.data.task_id);
+          if (task.status === 'failed') {
+            results.failed++;
+            return { status: 'failed', file, error: task.error };
+          }
           results.success++;
           return { status: 'success', file };
         } catch (err) {
-          if (err.response && err.response.status === 400 && 
+          if (err instanceof TaskTimeoutError) {
+            results.failed++;
+            results.timedOut++;
+            return { status: 'failed', file, error: err.message };
+          } else if (err.response && err.response.status === 400 && 
               err.response.data.error && 
               err.response.data.error.includes('No email or mobile number found')) {
             results.skipped++;
@@ -353,7 +399,9 @@ function App() {
       await Promise.all(uploadPromises);
       fetchCandidates(selectedJob.id);
       
-      setError('');
+      setError(results.timedOut > 0
+        ? `${results.timedOut} resume${results.timedOut !== 1 ? 's are' : ' is'} still processing after the time limit; refresh the candidates later.`
+        : '');
       setCandidateInfo({ name: '', email: '', mobile: '', city: '' });
       setShowCandidateForm(false);
       setSelectedFiles([]);
@@ -373,11 +421,12 @@ function App() {
     }
   };
 
-  const fetchCandidates = async (jobId) => {
+  const fetchCandidates = async (jobId, cursor = null) => {
     try {
       setLoading(true);
-      const response = await axios.get(`/api/jobs/${jobId}/candidates`);
-      setCandidates(response.data.candidates);
+      const page = await fetchPage(`/api/jobs/${jobId}/candidates`, 'candidates', cursor);
+      setCandidates(prevCandidates => cursor ? [...prevCandidates, ...page.items] : page.items);
+      setCandidatesCursor(page.nextCursor);
       setError('');
     } catch (err) {
       setError('Failed to fetch candidates');
@@ -469,6 +518,11 @@ function App() {
                   </button>
                 </div>
               ))}
+              {jobsCursor && (
+                <button className="load-more-btn" onClick={() => fetchJobs(jobsCursor)} disabled={loading}>
+                  Load more jobs
+                </button>
+              )}
             </div>
 
             {selectedJob && (
@@ -562,7 +616,7 @@ function App() {
                 
                 {candidates.length > 0 ? (
                   <>
-                    <h3>Results ({candidates.length} candidate{candidates.length !== 1 && 's'})</h3>
+                    <h3>Results ({candidates.length}{candidatesCursor ? '+' : ''} candidate{candidates.length !== 1 && 's'})</h3>
                     {candidates.map(candidate => (
                       <div key={candidate.id} className="candidate-item">
                         <h3>{candidate.name || `Candidate ${candidate.candidate_id.substring(0, 8)}`}</h3>
@@ -572,6 +626,15 @@ function App() {
                         <p className="score">Score: {candidate.score.toFixed(2)}%</p>
                       </div>
                     ))}
+                    {candidatesCursor && (
+                      <button
+                        className="load-more-btn"
+                        onClick={() => fetchCandidates(selectedJob.id, candidatesCursor)}
+                        disabled={loading}
+                      >
+                        Load more candidates
+                      </button>
+                    )}
                   </>
                 ) : (
                   !showCandidateForm && (
@@ -1,6 +1,9 @@
 from backend.app import create_app
 
-app = create_app()
+# Spawned extraction processes re-import this file as __mp_main__ and must
+# not create an app of their own
+if __name__ != '__mp_main__':
+    app = create_app()
 
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file